@@ -0,0 +1,383 @@
+"""
+Asyncio serial transport.
+
+All transports share one private event loop running in a background thread, so
+any number of ports is served by a single OS thread. On POSIX the port file
+descriptors are watched by the loop itself (add_reader/add_writer); elsewhere
+reads and writes fall back to the loop's thread pool.
+"""
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtWidgets import QMessageBox
+import asyncio
+import os
+import threading
+import time
+import serial
+from Serial import FrameParser
+from BinaryFraming import records_to_frames, telemetry_format_command
+
+class EventLoopThread:
+    """
+    An asyncio event loop running in a daemon thread.
+    """
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, name="AsyncSerialLoop"):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.run, name=name, daemon=True)
+        self.thread.start()
+
+    @classmethod
+    def shared(cls):
+        """
+        Return the loop thread shared by all transports, starting it on first use.
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coroutine):
+        """
+        Schedule a coroutine on the loop from any thread.
+
+        Returns:
+            concurrent.futures.Future: Its result; cancel() cancels the coroutine.
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+class AsyncSerialTransport:
+    """
+    One serial port driven by the running asyncio loop.
+
+    Usage, inside a coroutine:
+        transport = AsyncSerialTransport("/dev/ttyUSB0")
+        await transport.open()
+        async for frames in transport.read_frames(idle_timeout=5):
+            ...
+        await transport.send('{"Controls": {"StartM": 1}}')
+        await transport.close()
+    """
+    def __init__(self, port, baudrate=921600, binary=False):
+        """
+        Parameters:
+            port (str): Serial port to open.
+            baudrate (int): Baud rate of the serial line.
+            binary (bool): Ask the controller for binary telemetry frames (see BinaryFraming).
+        """
+        self.port = port
+        self.baudrate = baudrate
+        self.binary = binary
+        self.debug = False
+        self.serial = None
+        self.fd = None
+        self.chunks = None
+        self.poll_task = None
+        self.write_lock = None
+        self.parser = FrameParser(binary)
+        # Monotonic ns at which the oldest queued chunk was read
+        self.read_ns = 0
+        # Monotonic ns at which the last batch yielded by read_frames() was read and decoded
+        self.batch_read_ns = self.batch_decoded_ns = 0
+
+    @property
+    def is_open(self):
+        return self.serial is not None and self.serial.is_open
+
+    async def open(self, timeout=2.0):
+        """
+        Open the port.
+
+        Parameters:
+            timeout (float): Seconds to wait for the driver to open the port.
+
+        Raises:
+            serial.SerialException: The port could not be opened.
+            asyncio.TimeoutError: Opening took longer than timeout.
+        """
+        loop = asyncio.get_running_loop()
+        # timeout=0 makes pyserial reads return what is buffered without waiting
+        self.serial = await asyncio.wait_for(
+            loop.run_in_executor(None, lambda: serial.Serial(self.port, self.baudrate, timeout=0)), timeout)
+        self.chunks = asyncio.Queue()
+        self.write_lock = asyncio.Lock()
+        if os.name == "posix":
+            self.fd = self.serial.fileno()
+            loop.add_reader(self.fd, self.on_readable)
+        else:
+            self.poll_task = loop.create_task(self.poll_reads())
+        if self.binary:
+            await self.send(telemetry_format_command(True))
+
+    async def close(self):
+        """
+        Stop reading and close the port. Safe to call more than once.
+        """
+        if not self.is_open:
+            return
+        if self.binary:
+            try:
+                await self.send(telemetry_format_command(False), timeout=0.5)
+            except (serial.SerialException, OSError, asyncio.TimeoutError):
+                pass
+        if self.fd is not None:
+            asyncio.get_running_loop().remove_reader(self.fd)
+            self.fd = None
+        if self.poll_task is not None:
+            self.poll_task.cancel()
+            self.poll_task = None
+        self.serial.close()
+
+    def on_readable(self):
+        try:
+            data = self.serial.read(max(1, self.serial.in_waiting))
+        except serial.SerialException as e:
+            # The device went away; hand the error to read_frames() and stop watching
+            asyncio.get_running_loop().remove_reader(self.fd)
+            self.fd = None
+            self.chunks.put_nowait(e)
+            return
+        if data:
+            self.queue_chunk(data)
+
+    async def poll_reads(self, interval=0.005):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                data = await loop.run_in_executor(None, self.serial.read, max(1, self.serial.in_waiting))
+            except serial.SerialException as e:
+                self.chunks.put_nowait(e)
+                return
+            if data:
+                self.queue_chunk(data)
+            else:
+                await asyncio.sleep(interval)
+
+    def queue_chunk(self, data):
+        if self.chunks.empty():
+            self.read_ns = time.monotonic_ns()
+        self.chunks.put_nowait(data)
+
+    async def read_frames(self, idle_timeout=None):
+        """
+        Yield the frames decoded from each burst of received bytes.
+
+        Bytes that arrived while the caller was busy are decoded together, so a
+        slow consumer gets fewer, larger batches. batch_read_ns and batch_decoded_ns
+        hold the times at which the yielded batch was read and decoded.
+
+        Parameters:
+            idle_timeout (float): Raise asyncio.TimeoutError when nothing arrives for
+                this many seconds; wait forever when None.
+
+        Yields:
+            list: Decoded JSON frames (dict) and blocks of binary records (ndarray).
+
+        Raises:
+            serial.SerialException: The port failed while reading.
+        """
+        while True:
+            parts = [await asyncio.wait_for(self.chunks.get(), idle_timeout)]
+            while not self.chunks.empty():
+                parts.append(self.chunks.get_nowait())
+            read_ns = self.read_ns
+            errors = [part for part in parts if isinstance(part, Exception)]
+            frames = self.decode(b"".join(part for part in parts if not isinstance(part, Exception)))
+            if frames:
+                self.batch_read_ns, self.batch_decoded_ns = read_ns, time.monotonic_ns()
+                yield frames
+            if errors:
+                raise errors[0]
+
+    def decode(self, data):
+        frames, blocks = self.parser.feed(data)
+        return frames + blocks
+
+    async def send(self, data, timeout=1.0):
+        """
+        Write a command. Concurrent sends are written one after the other, in call order.
+
+        Parameters:
+            data (str or bytes): The command.
+            timeout (float): Seconds to wait for the port to accept all bytes.
+
+        Raises:
+            asyncio.TimeoutError: The port did not accept the bytes in time.
+        """
+        payload = data.encode('latin-1') if isinstance(data, str) else data
+        async with self.write_lock:
+            await asyncio.wait_for(self.write_all(payload), timeout)
+        if self.debug:
+            print("Debug serial class - Data written to serial:", payload.decode('latin-1'))
+
+    async def write_all(self, payload):
+        loop = asyncio.get_running_loop()
+        if os.name != "posix":
+            await loop.run_in_executor(None, self.serial.write, payload)
+            return
+        fd = self.serial.fileno()
+        view = memoryview(payload)
+        while view:
+            try:
+                view = view[os.write(fd, view):]
+            except BlockingIOError:
+                pass
+            if view:
+                writable = loop.create_future()
+                loop.add_writer(fd, writable.set_result, None)
+                try:
+                    await writable
+                finally:
+                    loop.remove_writer(fd)
+
+class AsyncSerialSource(QObject):
+    """
+    Telemetry source with the interface of SerialThread, backed by AsyncSerialTransport.
+
+    Can be passed to Widget in place of SerialThread; disconnecting cancels the
+    read task, which closes the port.
+    """
+    data_received = Signal(dict)
+    batch_received = Signal(list)
+    write_failed = Signal(str)
+
+    def __init__(self, port='COM12', baudrate=921600, batch_interval_ms=20, binary=False, loop_thread=None):
+        """
+        Parameters:
+            port (str): Serial port to open.
+            baudrate (int): Baud rate of the serial line.
+            batch_interval_ms (int): Minimum time between batch_received signals;
+                0 emits every frame through data_received.
+            binary (bool): Ask the controller for binary telemetry frames.
+            loop_thread (EventLoopThread): Loop to run on; the shared one when None.
+        """
+        super().__init__()
+        self.port = port
+        self.baudrate = baudrate
+        self.batch_interval_ms = batch_interval_ms
+        self.binary = binary
+        self.loop_thread = loop_thread or EventLoopThread.shared()
+        self.debug = False
+        self.recorder = None
+        self.latency = None
+        # Optional callable taking each batch in the loop thread instead of the signals
+        self.sink = None
+        self.transport = None
+        self.future = None
+        self.finished = threading.Event()
+
+    @property
+    def parser(self):
+        """
+        FrameParser of the current connection, as SerialThread.parser.
+        """
+        return self.transport.parser if self.transport is not None else None
+
+    def start(self):
+        self.transport = AsyncSerialTransport(self.port, self.baudrate, self.binary)
+        self.transport.debug = self.transport.parser.debug = self.debug
+        self.finished.clear()
+        self.future = self.loop_thread.submit(self.run())
+
+    def record_emit(self, latency):
+        """
+        Times the decode->emit stage and queues the read/emit timestamps for the GUI slot, as SerialThread.
+        """
+        emit_ns = time.monotonic_ns()
+        latency.record("decode->emit", self.transport.batch_decoded_ns, emit_ns)
+        latency.stamp(self.transport.batch_read_ns, emit_ns)
+
+    async def run(self):
+        try:
+            await self.transport.open()
+            print("Serial connection status: Open")
+            async for frames in self.transport.read_frames():
+                latency = self.latency
+                if latency is not None:
+                    latency.record("read->decode", self.transport.batch_read_ns, self.transport.batch_decoded_ns)
+                if self.recorder is not None:
+                    for data in self.frames_as_dicts(frames):
+                        self.recorder.record(data)
+                if self.sink is not None:
+                    self.sink(frames)
+                elif self.batch_interval_ms > 0:
+                    if latency is not None:
+                        self.record_emit(latency)
+                    self.batch_received.emit(frames)
+                else:
+                    for data in self.frames_as_dicts(frames):
+                        if latency is not None:
+                            self.record_emit(latency)
+                        self.data_received.emit(data)
+                if self.batch_interval_ms > 0:
+                    # Bytes keep queueing meanwhile and make up the next batch
+                    await asyncio.sleep(self.batch_interval_ms / 1000)
+        except (serial.SerialException, OSError, asyncio.TimeoutError) as e:
+            print(f"Serial connection error: {e}")
+        finally:
+            try:
+                if self.transport.is_open:
+                    await self.transport.close()
+                    print("Serial connection status: Closed")
+            finally:
+                self.finished.set()
+
+    @staticmethod
+    def frames_as_dicts(frames):
+        for frame in frames:
+            if isinstance(frame, dict):
+                yield frame
+            else:
+                yield from records_to_frames(frame)
+
+    def isRunning(self):
+        return self.future is not None and not self.finished.is_set()
+
+    def stop(self):
+        """
+        Cancel the read task; the port is closed as the task unwinds.
+        """
+        if self.future is not None:
+            self.future.cancel()
+
+    def wait(self, timeout=None):
+        """
+        Block until the read task has finished and the port is closed.
+
+        Parameters:
+            timeout (float): Seconds to wait at most; forever when None.
+        """
+        # The future of a cancelled task reports done at once, before the port is closed
+        return self.future is None or self.finished.wait(timeout)
+
+    def on_write_done(self, future):
+        # Runs in the loop thread; a failed or timed out write would otherwise go unnoticed
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            print(f"Error writing to serial: {type(error).__name__}: {error}")
+            self.write_failed.emit(f"{type(error).__name__}: {error}")
+
+    def write_to_serial(self, data, key=None):
+        """
+        Schedule a command on the transport without waiting for the port.
+
+        Commands are written in call order. key is accepted for compatibility with
+        SerialThread; commands are written as soon as the loop gets to them, so
+        nothing is left to coalesce. None (nothing to send) is ignored.
+        """
+        if data is None:
+            # JSONHandler.command() had nothing to send
+            return
+        if self.transport is not None and self.transport.is_open:
+            future = self.loop_thread.submit(self.transport.send(data))
+            future.add_done_callback(self.on_write_done)
+        else:
+            print("Serial port is not open.")
+            QMessageBox.critical(None, "Serial Port Error", "Serial port is not open.")
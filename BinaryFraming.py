@@ -0,0 +1,137 @@
+"""
+Compact binary framing for high-rate telemetry.
+
+Frame layout (little endian):
+    sync     2 bytes   SYNC (0xA5 0x5A; 0xA5 is not ASCII, so it never starts a JSON line)
+    type     uint8     message type id, see WIRE_LAYOUTS
+    length   uint16    payload length in bytes, a multiple of the record size
+    payload  length    packed records of the message type
+    crc      uint32    zlib.crc32 of type, length and payload
+
+Settings messages stay JSON lines; both kinds can share the same stream.
+"""
+import json
+import struct
+import zlib
+import numpy as np
+from MessageSchema import SCHEMAS
+
+SYNC = b"\xa5\x5a"
+HEADER = struct.Struct("<2sBH")
+CRC = struct.Struct("<I")
+MAX_PAYLOAD = 0xFFFF
+
+# Message type -> (type id, wire type of each store column, in schema order)
+WIRE_LAYOUTS = {
+    "Controls": (1, ["u1", "<f4", "u1", "<f4", "u1", "u1"]),
+}
+
+def wire_dtype(name):
+    """
+    Packed record layout of a message type, with the store column names.
+    """
+    type_id, wire_types = WIRE_LAYOUTS[name]
+    columns = [column for column, dtype in SCHEMAS[name].dtype]
+    return np.dtype(list(zip(columns, wire_types)))
+
+# Type id -> (message type, record dtype)
+RECORD_TYPES = {type_id: (name, wire_dtype(name)) for name, (type_id, wire_types) in WIRE_LAYOUTS.items()}
+
+def telemetry_format_command(binary):
+    """
+    Command asking the controller to send telemetry as binary frames (True) or JSON lines (False).
+    """
+    return json.dumps({"Telemetry format": {"Binary": int(binary)}})
+
+def encode_frame(name, records):
+    """
+    Build one binary frame.
+
+    Parameters:
+        name (str): Message type, e.g. "Controls".
+        records: Structured array in wire_dtype(name), or a sequence of row tuples.
+
+    Returns:
+        bytes: The encoded frame.
+    """
+    type_id = WIRE_LAYOUTS[name][0]
+    payload = np.asarray(records, dtype=wire_dtype(name)).tobytes()
+    if len(payload) > MAX_PAYLOAD:
+        raise ValueError(f"Binary frame payload of {len(payload)} bytes exceeds {MAX_PAYLOAD}")
+    header = HEADER.pack(SYNC, type_id, len(payload))
+    return header + payload + CRC.pack(zlib.crc32(payload, zlib.crc32(header[2:])))
+
+def records_to_frames(records):
+    """
+    Turn a block of binary records back into JSON-style frames.
+
+    Used where consumers expect dicts (per-frame signals, the telemetry recorder).
+    """
+    name = next(name for name, dtype in RECORD_TYPES.values() if dtype == records.dtype)
+    keys = [key for key, columns, dtype in SCHEMAS[name].fields]
+    return [{name: dict(zip(keys, row))} for row in records.tolist()]
+
+class BinaryFrameParser:
+    """
+    Separates the binary frames of a byte stream from the text (JSON lines) around them.
+
+    Frames with an unknown type, an invalid length or a wrong CRC are skipped by
+    searching for the next sync word; they are counted in errors.
+    """
+    def __init__(self):
+        self.buffer = bytearray()
+        self.frames = 0
+        self.errors = 0
+
+    def feed(self, data):
+        """
+        Add received bytes.
+
+        Parameters:
+            data (bytes): Bytes read from the serial line.
+
+        Returns:
+            tuple: (blocks, text). blocks is a list of structured arrays, one per
+            message type, holding the records of all complete frames; text holds
+            the bytes found between frames, to be split into lines by LineSplitter.
+        """
+        buffer = self.buffer
+        buffer += data
+        payloads = {}
+        text = []
+        offset = 0
+        size = len(buffer)
+        while True:
+            sync = buffer.find(SYNC, offset)
+            if sync < 0:
+                # A trailing first sync byte may be the start of the next frame
+                end = size - 1 if size > offset and buffer[-1] == SYNC[0] else size
+                text.append(buffer[offset:end])
+                offset = end
+                break
+            if sync > offset:
+                text.append(buffer[offset:sync])
+            if size - sync < HEADER.size:
+                offset = sync
+                break
+            _, type_id, length = HEADER.unpack_from(buffer, sync)
+            record_type = RECORD_TYPES.get(type_id)
+            if record_type is None or length == 0 or length % record_type[1].itemsize:
+                self.errors += 1
+                offset = sync + 1
+                continue
+            end = sync + HEADER.size + length + CRC.size
+            if size < end:
+                offset = sync
+                break
+            payload_end = end - CRC.size
+            if zlib.crc32(buffer[sync + 2:payload_end]) != CRC.unpack_from(buffer, payload_end)[0]:
+                self.errors += 1
+                offset = sync + 1
+                continue
+            payloads.setdefault(type_id, []).append(buffer[sync + HEADER.size:payload_end])
+            self.frames += 1
+            offset = end
+        del buffer[:offset]
+        blocks = [np.frombuffer(b"".join(parts), RECORD_TYPES[type_id][1]) for type_id, parts in payloads.items()]
+        return blocks, b"".join(text)
@@ -0,0 +1,214 @@
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout,
+    QPushButton, QTableWidget, QTableWidgetItem
+    )
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
+import time
+import numpy as np
+from AsyncSerial import AsyncSerialSource, EventLoopThread
+from JSONHandler import JSONHandler
+
+class Device:
+    """
+    One controller of the rack: its transport and its telemetry store.
+    """
+    def __init__(self, device_id, port, source, handler):
+        self.device_id = device_id
+        self.port = port
+        self.source = source
+        self.handler = handler
+        self.frames = 0
+
+    def receive(self, frames):
+        """
+        Store a batch. Runs in the transport's worker thread, never in the GUI thread;
+        the GUI only reads the store.
+        """
+        self.handler.ingest_batch(frames)
+        self.frames += sum(len(frame) if isinstance(frame, np.ndarray) else 1 for frame in frames)
+
+    @property
+    def connected(self):
+        return self.source.isRunning()
+
+class DeviceManager(QObject):
+    """
+    Owns the transports and telemetry stores of several controllers, keyed by device id.
+
+    Every transport runs on one of a few shared asyncio worker threads, which also
+    decode and store the frames. The GUI thread is not involved per frame or per
+    batch, so adding a controller only adds one row to refresh in DeviceOverview.
+    """
+    devices_changed = Signal()
+
+    def __init__(self, workers=1, capacity=200000):
+        """
+        Parameters:
+            workers (int): Worker threads shared by all devices; devices are spread
+                over them round robin.
+            capacity (int): Telemetry frames kept in memory per device.
+        """
+        super().__init__()
+        if workers == 1:
+            self.workers = [EventLoopThread.shared()]
+        else:
+            self.workers = [EventLoopThread(f"DeviceWorker{i}") for i in range(workers)]
+        self.capacity = capacity
+        self.devices = {}
+
+    def add_device(self, device_id, port, baudrate=921600, binary=False):
+        """
+        Register a controller; it is not connected yet.
+
+        Returns:
+            Device: The new device.
+        """
+        if device_id in self.devices:
+            raise ValueError(f"Device '{device_id}' already exists")
+        worker = self.workers[len(self.devices) % len(self.workers)]
+        source = AsyncSerialSource(port, baudrate, batch_interval_ms=20, binary=binary, loop_thread=worker)
+        device = Device(device_id, port, source, JSONHandler(self.capacity))
+        source.sink = device.receive
+        # Emitted in the worker thread: queued to this object, in the GUI thread that sends the commands
+        source.write_failed.connect(self.on_write_failed)
+        self.devices[device_id] = device
+        self.devices_changed.emit()
+        return device
+
+    def remove_device(self, device_id):
+        """
+        Disconnect a controller and stop the writers of its logging bursts and histories.
+        """
+        self.disconnect_devices(device_id)
+        self.release(self.devices.pop(device_id))
+        self.devices_changed.emit()
+
+    def close(self):
+        """
+        Disconnect and remove every controller, stopping the writers of their logging bursts and histories.
+        """
+        self.disconnect_devices()
+        for device in self.devices.values():
+            self.release(device)
+        self.devices.clear()
+        self.devices_changed.emit()
+
+    def release(self, device):
+        # Write the queued bursts and history rows, then end the writer threads
+        device.handler.logging_writer.stop()
+        device.handler.logging_writer.wait()
+        device.handler.stop_history()
+
+    @Slot(str)
+    def on_write_failed(self, error):
+        # A command that was not written leaves the controller state unknown
+        for device in self.devices.values():
+            if device.source is self.sender():
+                device.handler.resync_commands()
+
+    def selected(self, device_id):
+        return self.devices.values() if device_id is None else [self.devices[device_id]]
+
+    def connect_devices(self, device_id=None):
+        """
+        Open the port of one device, or of all devices when device_id is None.
+        """
+        for device in self.selected(device_id):
+            if not device.connected:
+                device.handler.resync_commands()
+                device.source.start()
+
+    def disconnect_devices(self, device_id=None):
+        """
+        Close the port of one device, or of all devices when device_id is None.
+        """
+        devices = [device for device in self.selected(device_id) if device.connected]
+        for device in devices:
+            device.source.stop()
+        for device in devices:
+            device.source.wait(2)
+
+    def send(self, device_id, message):
+        """
+        Send one of the device's json_to_send_* dicts, delta encoded.
+        """
+        device = self.devices[device_id]
+        device.source.write_to_serial(device.handler.command(message))
+
+class DeviceOverview(QWidget):
+    """
+    One row per device with its connection state, frame rate and latest telemetry.
+    """
+    COLUMNS = ["Device", "Port", "Status", "Frames/s", "State", "Yaw angle", "Yaw std", "Warning level", "Head error 1", "Head error 2"]
+    FIELDS = ["controller_state_list", "yaw_angle_list", "yaw_std_list", "warning_level_list", "error_axis1_list", "error_axis2_list"]
+
+    def __init__(self, manager, refresh_hz=10):
+        """
+        Args:
+            manager (DeviceManager): Devices to show.
+            refresh_hz (int): Table refresh rate.
+        """
+        super().__init__()
+        self.setWindowTitle("Sapphire Testbench - Devices")
+        self.manager = manager
+        self.layout = QVBoxLayout(self)
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.layout.addWidget(self.table)
+        buttons = QHBoxLayout()
+        self.button_connect_all = QPushButton("Connect all")
+        self.button_connect_all.clicked.connect(lambda: self.manager.connect_devices())
+        buttons.addWidget(self.button_connect_all)
+        self.button_disconnect_all = QPushButton("Disconnect all")
+        self.button_disconnect_all.clicked.connect(lambda: self.manager.disconnect_devices())
+        buttons.addWidget(self.button_disconnect_all)
+        self.layout.addLayout(buttons)
+        self.rows = []
+        self.shown = {}
+        self.rate_counts = {}
+        self.manager.devices_changed.connect(self.build_rows)
+        self.build_rows()
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(int(1000 / refresh_hz))
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start()
+
+    def build_rows(self):
+        self.rows = list(self.manager.devices.values())
+        self.table.setRowCount(len(self.rows))
+        self.shown = {}
+        for row, device in enumerate(self.rows):
+            for col in range(len(self.COLUMNS)):
+                self.table.setItem(row, col, QTableWidgetItem(""))
+            self.set_cell(row, 0, str(device.device_id))
+            self.set_cell(row, 1, device.port)
+        # Sized once here: ResizeToContents would measure every row on each cell update
+        self.table.resizeColumnsToContents()
+
+    def refresh(self):
+        """
+        Update the cells whose text changed. Cost grows with the number of rows only.
+        """
+        now = time.monotonic()
+        for row, device in enumerate(self.rows):
+            last_time, last_frames = self.rate_counts.get(device.device_id, (now, device.frames))
+            rate = (device.frames - last_frames) / (now - last_time) if now > last_time else 0.0
+            if now - last_time >= 1.0 or device.device_id not in self.rate_counts:
+                self.rate_counts[device.device_id] = (now, device.frames)
+                self.set_cell(row, 3, f"{rate:.0f}")
+            self.set_cell(row, 2, "Connected" if device.connected else "Disconnected")
+            handler = device.handler
+            if handler.controls_store.count == 0:
+                continue
+            for col, field in enumerate(self.FIELDS, start=4):
+                self.set_cell(row, col, handler.latest_text(field))
+
+    def set_cell(self, row, col, text):
+        if self.shown.get((row, col)) != text:
+            self.table.item(row, col).setText(text)
+            self.shown[(row, col)] = text
+
+    def closeEvent(self, event):
+        self.refresh_timer.stop()
+        self.manager.close()
+        event.accept()
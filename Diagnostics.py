@@ -0,0 +1,172 @@
+from collections import deque
+from datetime import datetime
+import json
+import time
+
+class LatencyHistogram:
+    """
+    Log-scale latency histogram with four buckets per power of two.
+
+    Each histogram has a single writing thread, so record() takes no lock;
+    readers copy the counts and may see a sample in flight, which is fine
+    for monitoring.
+    """
+    MIN_BITS = 10  # values below 2**10 ns (~1 us) share the first bucket
+    MAX_BITS = 36  # values above 2**36 ns (~69 s) share the last bucket
+
+    def __init__(self):
+        self.counts = [0] * ((self.MAX_BITS - self.MIN_BITS + 1) * 4)
+        self.count = 0
+        self.max_ns = 0
+
+    def record(self, ns):
+        """
+        Add one latency sample.
+
+        Parameters:
+            ns (int): Latency in nanoseconds.
+        """
+        bits = ns.bit_length()
+        if bits <= self.MIN_BITS:
+            index = 0
+        elif bits > self.MAX_BITS:
+            index = len(self.counts) - 1
+        else:
+            index = (bits - self.MIN_BITS) * 4 + ((ns >> (bits - 3)) & 3)
+        self.counts[index] += 1
+        self.count += 1
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    @classmethod
+    def bucket_upper_ns(cls, index):
+        if index == 0:
+            return 1 << cls.MIN_BITS
+        bits = index // 4 + cls.MIN_BITS
+        return (4 + index % 4 + 1) << (bits - 3)
+
+    def percentile(self, q, counts=None):
+        """
+        Return the upper bound of the bucket holding the q-th percentile, in nanoseconds.
+        """
+        counts = list(self.counts) if counts is None else counts
+        total = sum(counts)
+        if total == 0:
+            return 0
+        target = total * q / 100
+        running = 0
+        for index, count in enumerate(counts):
+            running += count
+            if running >= target:
+                return min(self.bucket_upper_ns(index), self.max_ns)
+        return self.max_ns
+
+    def summary(self):
+        counts = list(self.counts)
+        return {
+            "count": sum(counts),
+            "p50_us": self.percentile(50, counts) / 1000,
+            "p99_us": self.percentile(99, counts) / 1000,
+            "max_us": self.max_ns / 1000,
+        }
+
+class LatencyMonitor:
+    """
+    Latency histograms for each stage of the telemetry pipeline.
+
+    Stages, timed with time.monotonic_ns():
+        read->decode:    bytes returned by read() until the chunk is decoded (serial thread)
+        decode->emit:    decoded until the signal is emitted, incl. batching (serial thread)
+        emit->handle:    signal emitted until the GUI slot starts (GUI thread)
+        handle->store:   GUI slot start until JSONHandler stored the frames (GUI thread)
+        store->display:  frames stored until the widgets show them (GUI thread)
+        read->display:   end to end (GUI thread)
+
+    The reader calls stamp() for every signal it emits and the GUI slot calls
+    take() for every signal it handles; both count their signals, so each slot
+    gets the timestamps of its own signal. When the GUI falls more than
+    PENDING_SIZE signals behind, the oldest timestamps are dropped: the slots of
+    those signals get None and are counted in dropped instead of being paired
+    with the timestamps of later signals.
+    """
+    PENDING_SIZE = 1024
+
+    STAGES = ["read->decode", "decode->emit", "emit->handle", "handle->store", "store->display", "read->display"]
+
+    def __init__(self):
+        self.histograms = {stage: LatencyHistogram() for stage in self.STAGES}
+        # (sequence, read_ns, emit_ns) per emitted signal, consumed in order by the GUI slot
+        self.pending = deque(maxlen=self.PENDING_SIZE)
+        # Signals stamped by the reader (its thread only) and handled by the GUI (GUI thread only)
+        self.emitted = 0
+        self.handled = 0
+        self.dropped = 0
+        self.started = time.monotonic()
+
+    def record(self, stage, start_ns, end_ns):
+        self.histograms[stage].record(end_ns - start_ns)
+
+    def stamp(self, read_ns, emit_ns):
+        """
+        Keep the timestamps of a signal about to be emitted. Runs in the reader's thread.
+        """
+        self.pending.append((self.emitted, read_ns, emit_ns))
+        self.emitted += 1
+
+    def take(self):
+        """
+        Return (read_ns, emit_ns) of the signal the GUI slot is handling, or None
+        when its timestamps were dropped or the source does not stamp its signals.
+        """
+        sequence = self.handled
+        self.handled += 1
+        pending = self.pending
+        while pending and pending[0][0] < sequence:
+            pending.popleft()
+        if not pending:
+            return None
+        if pending[0][0] > sequence:
+            self.dropped += 1
+            return None
+        return pending.popleft()[1:]
+
+    @property
+    def measured(self):
+        """
+        False once signals were handled from a source that never stamps them.
+        """
+        return self.emitted > 0 or self.handled == 0
+
+    def snapshot(self):
+        """
+        Return p50/p99/max and sample count per stage.
+        """
+        return {stage: histogram.summary() for stage, histogram in self.histograms.items()}
+
+    def reset(self):
+        # pending and the signal counts are left alone: they pair timestamps with signals still in flight
+        self.histograms = {stage: LatencyHistogram() for stage in self.STAGES}
+        self.dropped = 0
+        self.started = time.monotonic()
+
+    def dump(self, path=None):
+        """
+        Write the snapshot as JSON.
+
+        Parameters:
+            path (str): Output file; a timestamped file in the working directory when None.
+
+        Returns:
+            str: The path written.
+        """
+        if path is None:
+            current_datetime = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+            path = f"Diagnostics_{current_datetime}.json"
+        with open(path, "w") as json_file:
+            json.dump({
+                "created": datetime.now().isoformat(),
+                "seconds_monitored": time.monotonic() - self.started,
+                "signals_not_timed": self.dropped,
+                "latency": self.snapshot(),
+            }, json_file, indent=4)
+        return path
@@ -0,0 +1,326 @@
+import json
+import os
+import queue
+import threading
+import time
+import numpy as np
+
+# Index record of a chunk or block: first and last timestamp, number of rows
+INDEX_DTYPE = np.dtype([("t0", "<f8"), ("t1", "<f8"), ("n", "<i8")])
+RANGE_DTYPE = np.dtype([("min", "<f8"), ("max", "<f8")])
+
+class HistoryStore:
+    """
+    Persistent telemetry history in chunked column files.
+
+    Rows are grouped into one chunk per chunk_seconds of arrival time and
+    each chunk is written as an .npz file holding one array per column, so a
+    query only reads the columns it asks for. Two index levels are appended
+    next to the chunks: one record per chunk, which is also the sparse time
+    index used to find the chunks of a range, and one per block of block_size
+    rows. Each index record has the time span and row count, and each column
+    has the min and max of every record.
+
+    query() reads the coarsest level that still has max_points records in the
+    range (chunks, blocks or raw rows) and reduces it to min/max per time
+    bucket, so it never reads more than about max_points * block_size rows
+    however long the range is.
+
+    Like TelemetryRecorder, record() never blocks: rows go through a bounded
+    queue to a writer thread, and rows that do not fit are dropped and counted.
+    A chunk can be queried once it has been written: when rows of a later
+    chunk arrive, at most flush_interval seconds after its end time has
+    passed, or when stop() is called.
+    """
+    def __init__(self, directory, columns, chunk_seconds=60, block_size=256, queue_size=10000, flush_interval=1.0):
+        """
+        Parameters:
+            directory (str): Folder holding the history; created if missing.
+            columns (list): (column, dtype) pairs, e.g. SCHEMAS["Controls"].dtype.
+            chunk_seconds (float): Arrival time covered by one chunk file.
+            block_size (int): Rows per block index record.
+            queue_size (int): Batches that may wait for the writer before new ones are dropped.
+            flush_interval (float): Seconds the writer waits for rows before checking
+                whether the current chunk has ended and can be written.
+
+        Raises:
+            ValueError: The directory holds a history with other columns or chunk layout.
+        """
+        self.directory = directory
+        self.dtype = np.dtype(columns)
+        self.chunk_seconds = chunk_seconds
+        self.block_size = block_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.thread = None
+        self.lock = threading.Lock()
+        self.pending = []
+        self.pending_chunk = None
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.chunks_written = 0
+        os.makedirs(os.path.join(directory, "chunks"), exist_ok=True)
+        self.check_layout()
+        self.counts = {level: self.index_size(level) for level in ("chunks", "blocks")}
+        # The chunk index is small (one record per chunk) and kept in memory
+        self.chunk_index = self.read_index("chunks", 0, self.counts["chunks"]).copy()
+
+    def check_layout(self):
+        layout = {
+            "columns": [[name, self.dtype[name].str] for name in self.dtype.names],
+            "chunk_seconds": self.chunk_seconds,
+            "block_size": self.block_size,
+        }
+        path = os.path.join(self.directory, "layout.json")
+        if os.path.exists(path):
+            with open(path) as layout_file:
+                stored = json.load(layout_file)
+            if stored != layout:
+                raise ValueError(f"{self.directory} holds a history with another layout: {stored}")
+        else:
+            with open(path, "w") as layout_file:
+                json.dump(layout, layout_file, indent=4)
+
+    def index_path(self, level, column=None):
+        return os.path.join(self.directory, f"{level}.{column or 'index'}")
+
+    def index_size(self, level):
+        # Records only count once every file of the level holds them, e.g. after an interrupted write
+        paths = [(self.index_path(level), INDEX_DTYPE)]
+        paths += [(self.index_path(level, name), RANGE_DTYPE) for name in self.dtype.names]
+        sizes = [os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0 for path, dtype in paths]
+        return min(sizes)
+
+    def read_index(self, level, start, stop, column=None):
+        """
+        Return index records start..stop-1 of a level, memory-mapped.
+
+        Parameters:
+            level (str): "chunks" or "blocks".
+            column (str): Column whose min/max records are read; the time records when None.
+        """
+        dtype = INDEX_DTYPE if column is None else RANGE_DTYPE
+        if stop <= start:
+            return np.empty(0, dtype)
+        return np.memmap(self.index_path(level, column), dtype, mode="r",
+                         offset=start * dtype.itemsize, shape=(stop - start,))
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self.run, name="HistoryStore", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """
+        Write the rows still queued and the current chunk, and end the writer thread.
+        """
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def record(self, rows, timestamp=None):
+        """
+        Queue rows for writing without blocking.
+
+        Parameters:
+            rows: Structured array with the history's columns (in this order),
+                or a sequence of row tuples; converted by the writer thread.
+            timestamp (float): Arrival time of the rows in seconds since the epoch;
+                now when None. All rows of one call get this time.
+
+        Returns:
+            bool: False when the queue was full and the rows were dropped.
+        """
+        self.recorded += len(rows)
+        try:
+            self.queue.put_nowait((time.time() if timestamp is None else timestamp, rows))
+        except queue.Full:
+            self.dropped += len(rows)
+            return False
+        return True
+
+    def stats(self):
+        """
+        Return the history counters.
+
+        Returns:
+            dict: recorded, written and dropped row counts, chunks written by this
+            instance, chunks stored and queue depth.
+        """
+        return {
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "chunks_written": self.chunks_written,
+            "chunks": self.counts["chunks"],
+            "queue_depth": self.queue.qsize(),
+        }
+
+    def run(self):
+        while True:
+            try:
+                item = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                # No rows for a while: write the chunk once its time span is over
+                if self.pending and (self.pending_chunk + 1) * self.chunk_seconds <= time.time():
+                    self.write_pending()
+                continue
+            if item is None:
+                break
+            timestamp, rows = item
+            chunk = int(timestamp // self.chunk_seconds)
+            if self.pending and chunk != self.pending_chunk:
+                self.write_pending()
+            self.pending_chunk = chunk
+            if not (isinstance(rows, np.ndarray) and rows.dtype == self.dtype):
+                # Binary frames use narrower wire types; fields are matched by position
+                rows = rows.astype(self.dtype) if isinstance(rows, np.ndarray) else np.array(rows, dtype=self.dtype)
+            self.pending.append((timestamp, rows))
+        self.write_pending()
+
+    def write_pending(self):
+        if not self.pending:
+            return
+        times = np.concatenate([np.full(len(rows), timestamp) for timestamp, rows in self.pending])
+        rows = np.concatenate([rows for timestamp, rows in self.pending])
+        self.pending = []
+        self.write_chunk(times, rows)
+
+    def write_chunk(self, times, rows):
+        """
+        Write one chunk and append its index records.
+
+        Parameters:
+            times (numpy.ndarray): Arrival time of each row, non-decreasing.
+            rows (numpy.ndarray): Structured array with the history's columns.
+        """
+        n = len(rows)
+        if n == 0:
+            return
+        path = self.chunk_path(times[0])
+        # Written under a temporary name so that a query never opens half a file
+        with open(path + ".tmp", "wb") as chunk_file:
+            np.savez(chunk_file, time=times, **{name: rows[name] for name in self.dtype.names})
+        os.replace(path + ".tmp", path)
+        starts = np.arange(0, n, self.block_size)
+        ends = np.minimum(starts + self.block_size, n)
+        blocks = np.empty(len(starts), INDEX_DTYPE)
+        blocks["t0"], blocks["t1"], blocks["n"] = times[starts], times[ends - 1], ends - starts
+        chunk = np.array([(times[0], times[-1], n)], INDEX_DTYPE)
+        block_ranges = {}
+        chunk_ranges = {}
+        for name in self.dtype.names:
+            values = rows[name].astype(np.float64)
+            ranges = np.empty(len(starts), RANGE_DTYPE)
+            ranges["min"] = np.minimum.reduceat(values, starts)
+            ranges["max"] = np.maximum.reduceat(values, starts)
+            block_ranges[name] = ranges
+            chunk_ranges[name] = np.array([(ranges["min"].min(), ranges["max"].max())], RANGE_DTYPE)
+        self.append_index("blocks", blocks, block_ranges)
+        self.append_index("chunks", chunk, chunk_ranges)
+        with self.lock:
+            self.chunk_index = np.concatenate((self.chunk_index, chunk))
+            self.counts["blocks"] += len(blocks)
+            self.counts["chunks"] += 1
+        self.written += n
+        self.chunks_written += 1
+
+    def chunk_path(self, t0):
+        return os.path.join(self.directory, "chunks", f"{int(round(t0 * 1e6)):d}.npz")
+
+    def append_index(self, level, records, ranges):
+        with open(self.index_path(level), "ab") as index_file:
+            index_file.write(records.tobytes())
+        for name, values in ranges.items():
+            with open(self.index_path(level, name), "ab") as index_file:
+                index_file.write(values.tobytes())
+
+    def time_range(self):
+        """
+        Return (first, last) timestamp of the written history, or None when it is empty.
+        """
+        with self.lock:
+            index = self.chunk_index
+        if len(index) == 0:
+            return None
+        return float(index["t0"][0]), float(index["t1"].max())
+
+    def query(self, field, t0, t1, max_points=2000):
+        """
+        Return the values of a column between two times, decimated to at most max_points.
+
+        Parameters:
+            field (str): Column name, e.g. "yaw_angle_list".
+            t0 (float): Start time in seconds since the epoch.
+            t1 (float): End time in seconds since the epoch.
+            max_points (int): Most points returned.
+
+        Returns:
+            tuple: (times, values) arrays, oldest first. When the range holds more than
+            max_points rows it is split into max_points // 2 equal time buckets and
+            each non-empty bucket gives its min and its max, both at the bucket centre;
+            blocks and chunks at the edges of the range are then counted whole.
+
+        Raises:
+            KeyError: Unknown column.
+        """
+        if field not in self.dtype.names:
+            raise KeyError(f"No column '{field}' in the history")
+        with self.lock:
+            chunk_index = self.chunk_index
+            n_blocks = self.counts["blocks"]
+        # Chunks are appended in time order: the sparse index gives the chunks of the range
+        first_chunk = int(np.searchsorted(chunk_index["t1"], t0, side="left"))
+        last_chunk = int(np.searchsorted(chunk_index["t0"], t1, side="right"))
+        if last_chunk <= first_chunk:
+            return np.empty(0), np.empty(0)
+        chunks = chunk_index[first_chunk:last_chunk]
+        # Each chunk starts a new block: the blocks before the range follow from the chunk sizes
+        blocks_per_chunk = -(-chunk_index["n"] // self.block_size)
+        first_block = int(blocks_per_chunk[:first_chunk].sum())
+        count_blocks = int(blocks_per_chunk[first_chunk:last_chunk].sum())
+        if len(chunks) >= max_points:
+            index, ranges = chunks, self.read_index("chunks", first_chunk, last_chunk, field)
+        elif count_blocks >= max_points:
+            stop = min(first_block + count_blocks, n_blocks)
+            index = self.read_index("blocks", first_block, stop)
+            ranges = self.read_index("blocks", first_block, stop, field)
+        else:
+            times, values = self.read_rows(field, chunks, t0, t1)
+            if len(times) <= max_points:
+                return times, values
+            return self.decimate(times, values, values, t0, t1, max_points)
+        inside = (index["t1"] >= t0) & (index["t0"] <= t1)
+        centres = (index["t0"][inside] + index["t1"][inside]) / 2
+        return self.decimate(centres, ranges["min"][inside], ranges["max"][inside], t0, t1, max_points)
+
+    def read_rows(self, field, chunks, t0, t1):
+        times, values = [], []
+        for chunk_t0 in chunks["t0"]:
+            with np.load(self.chunk_path(chunk_t0)) as chunk:
+                chunk_times = chunk["time"]
+                first = np.searchsorted(chunk_times, t0, side="left")
+                last = np.searchsorted(chunk_times, t1, side="right")
+                times.append(chunk_times[first:last])
+                values.append(chunk[field][first:last].astype(np.float64))
+        return np.concatenate(times), np.concatenate(values)
+
+    def decimate(self, times, mins, maxs, t0, t1, max_points):
+        """
+        Reduce time-ordered records to the min and max of each of max_points // 2 time buckets.
+        """
+        n_buckets = max(1, max_points // 2)
+        span = max(t1 - t0, 1e-9)
+        buckets = np.clip(((times - t0) / span * n_buckets).astype(np.int64), 0, n_buckets - 1)
+        if len(buckets) == 0:
+            return np.empty(0), np.empty(0)
+        # Records are in time order, so each bucket is one run of records
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        centres = t0 + (buckets[starts] + 0.5) * span / n_buckets
+        out_times = np.repeat(centres, 2)
+        out_values = np.empty(2 * len(starts))
+        out_values[0::2] = np.minimum.reduceat(mins, starts)
+        out_values[1::2] = np.maximum.reduceat(maxs, starts)
+        return out_times, out_values
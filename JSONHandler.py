@@ -1,52 +1,69 @@
+import copy
 import json
-from datetime import datetime
-import pandas as pd
+import os
+import numpy as np
+from TelemetryStore import TelemetryStore
+from LoggingWriter import LoggingWriter
+from HistoryStore import HistoryStore
+from MessageSchema import SCHEMAS
+
+# Keys sent with every command of their section, whether they changed or not:
+# the write triggers and the pulses, which the GUI resets to 0 without always
+# sending the reset, so the known state cannot tell whether a 1 is new
+ALWAYS_SENT = {
+    "Controls": {"StartM", "StopM", "Re contr prot", "Re intf prot"},
+    "General settings": {"Write general settings"},
+    "Control settings": {"Write control settings"},
+    "Expert procedures": {"Profile motion Start", "Profile motion Stop",
+                          "Ramp cycles motion Start", "Ramp cycles motion Stop", "Logging"},
+}
+
+# Sections the controller reports back; their read-backs replace the known state
+ACKNOWLEDGED = {"General settings", "Control settings"}
 
 class JSONHandler:
-    def __init__(self):
-        self.controller_state_list      = []
-        self.yaw_angle_list             = []
-        self.warning_level_list         = [0]
-        self.yaw_std_list               = []
-        self.error_axis1_list           = []
-        self.error_axis2_list           = []
-        self.yaw_offset_list            = []
-        self.aar_offset_list            = []
-        self.control_instability_protection_list = []
-        self.min_voltage_list           = []
-        self.max_voltage_list           = []
-        self.open_loop_max_speed_list   = []
-        self.closed_loop_max_speed_list = []
-        self.min_PID_limit_list         = []
-        self.max_PID_limit_list         = []
-        self.prefilter_numerator_arg1   = []
-        self.prefilter_numerator_arg2   = []
-        self.prefilter_numerator_arg3   = []
-        self.prefilter_numerator_arg4   = []
-        self.prefilter_denominator_arg1 = []
-        self.prefilter_denominator_arg2 = []
-        self.filter_1_numerator_arg1    = []
-        self.filter_1_numerator_arg2    = []
-        self.filter_1_numerator_arg3    = []
-        self.filter_1_numerator_arg4    = []
-        self.filter_1_denominator_arg1  = []
-        self.filter_1_denominator_arg2  = []
-        self.filter_2_numerator_arg1    = []
-        self.filter_2_numerator_arg2    = []
-        self.filter_2_denominator_arg1  = []
-        self.filter_3_numerator_arg1    = []
-        self.filter_3_numerator_arg2    = []
-        self.filter_3_denominator_arg1  = []
-        self.hysteresis_compensation_list    = []
-        self.compensation_offset_list        = []
-        self.quadratic_parameters_arg1_list  = []
-        self.quadratic_parameters_arg2_list  = []
-        self.f_parameters_arg1_list     = []
-        self.f_parameters_arg2_list     = []
-        self.k_parameters_arg1_list     = []
-        self.k_parameters_arg2_list     = []
-        self.time_list                  = []
+    def __init__(self, capacity=200000, settings_capacity=1000, logging_processes=0, history_directory=None):
+        """
+        Parameters:
+            capacity (int): Number of telemetry frames kept in memory. Older frames
+                are overwritten once the capacity is reached.
+            settings_capacity (int): Number of settings read-backs kept in memory.
+            logging_processes (int): Worker processes writing "Logging" bursts (see
+                LoggingWriter); 0 writes them in the writer thread.
+            history_directory (str): Folder the telemetry messages are also kept in on
+                disk (see HistoryStore), one sub-folder per message type; None keeps
+                them in memory only.
+        """
+        self.stores = {
+            name: TelemetryStore(schema.dtype, capacity if schema.telemetry else settings_capacity)
+            for name, schema in SCHEMAS.items()
+        }
+        self.controls_store = self.stores["Controls"]
+        self.general_settings_store = self.stores["General settings"]
+        self.control_settings_store = self.stores["Control settings"]
+        self.time_store = TelemetryStore([("time_list", np.int64)], capacity)
+        self.stores["time"] = self.time_store
+        # One lookup per frame: message type -> (row decoder, store)
+        self.decoders = {name: (schema.decode, self.stores[name]) for name, schema in SCHEMAS.items()}
+        self.field_stores = {field: store for store in self.stores.values() for field in store.fields}
         self.counter = 0
+        self.logging_writer = LoggingWriter(processes=logging_processes)
+        # Telemetry message type -> on-disk history
+        self.histories = {}
+        if history_directory is not None:
+            for name, schema in SCHEMAS.items():
+                if schema.telemetry:
+                    self.histories[name] = HistoryStore(os.path.join(history_directory, name), schema.dtype)
+                    self.histories[name].start()
+        # Values the controller is known to hold per command section: what was last
+        # sent, overwritten by settings read-backs. command() sends only the differences.
+        self.delta_commands = True
+        self.resync_interval = 100
+        self.command_state = {}
+        self.commands_since_resync = {}
+        # Keys whose value changed in the last command() when it was a delta, None when it was full
+        self.last_delta = None
+        self.command_bytes = {"sent": 0, "full": 0}
         # --- tab 1 --- #
         controls_dict = {
             "StartM": 0,
@@ -116,6 +133,9 @@ class JSONHandler:
         """
         Parse JSON data from a string.
 
+        Kept for text sources; frames coming from SerialThread are already
+        decoded and should go through ingest() instead.
+
         Parameters:
             json_string (str): The JSON string to parse.
 
@@ -125,70 +145,239 @@ class JSONHandler:
         try:
             json_string = json_string.replace("'", '"')
             parsed_data = json.loads(json_string)
-            first_key = list(parsed_data.keys())[0]
-            # --- tab 1 --- #
-            if first_key == "Controls":
-                self.controller_state_list.append(parsed_data[first_key]["state"])
-                self.yaw_angle_list.append(parsed_data[first_key]["yawAngle"])
-                self.warning_level_list.append(parsed_data[first_key]["warninglevel"])
-                self.yaw_std_list.append(parsed_data[first_key]["yawAngleStdDeviation"])
-                self.error_axis1_list.append(parsed_data[first_key]["errorAxis1"])
-                self.error_axis2_list.append(parsed_data[first_key]["errorAxis2"])
-            # --- tab 2 --- #
-            if first_key == "General settings":
-                self.yaw_offset_list.append(parsed_data[first_key]["yawOffset"])
-                self.aar_offset_list.append(parsed_data[first_key]["AAROffset"])
-                self.control_instability_protection_list.append(parsed_data[first_key]["controlInstabilityProtection"])
-                self.min_voltage_list.append(parsed_data[first_key]["minVoltage"])
-                self.max_voltage_list.append(parsed_data[first_key]["maxVoltage"])
-                self.open_loop_max_speed_list.append(parsed_data[first_key]["openLoopMaxSpeed"])
-                self.closed_loop_max_speed_list.append(parsed_data[first_key]["closedLoopMaxSpeed"])
-                self.min_PID_limit_list.append(parsed_data[first_key]["minPIDLimit"])
-                self.max_PID_limit_list.append(parsed_data[first_key]["maxPIDLimit"])
-            # --- tab 3 --- #
-            if first_key == "Control settings":
-                self.prefilter_numerator_arg1.append(parsed_data[first_key]["prefilterNumerator"][0])
-                self.prefilter_numerator_arg2.append(parsed_data[first_key]["prefilterNumerator"][1])
-                self.prefilter_numerator_arg3.append(parsed_data[first_key]["prefilterNumerator"][2])
-                self.prefilter_numerator_arg4.append(parsed_data[first_key]["prefilterNumerator"][3])
-                self.prefilter_denominator_arg1.append(parsed_data[first_key]["prefilterDenominator"][0])
-                self.prefilter_denominator_arg2.append(parsed_data[first_key]["prefilterDenominator"][1])
-                # filter 1
-                self.filter_1_numerator_arg1.append(parsed_data[first_key]["filter1Numerator"][0])
-                self.filter_1_numerator_arg2.append(parsed_data[first_key]["filter1Numerator"][1])
-                self.filter_1_numerator_arg3.append(parsed_data[first_key]["filter1Numerator"][2])
-                self.filter_1_numerator_arg4.append(parsed_data[first_key]["filter1Numerator"][3])
-                self.filter_1_denominator_arg1.append(parsed_data[first_key]["filter1Denominator"][0])
-                self.filter_1_denominator_arg2.append(parsed_data[first_key]["filter1Denominator"][1])
-                # filter 2
-                self.filter_2_numerator_arg1.append(parsed_data[first_key]["filter2Numerator"][0])
-                self.filter_2_numerator_arg2.append(parsed_data[first_key]["filter2Numerator"][1])
-                self.filter_2_denominator_arg1.append(parsed_data[first_key]["filter2Denominator"])
-                # filter 3
-                self.filter_3_numerator_arg1.append(parsed_data[first_key]["filter3Numerator"][0])
-                self.filter_3_numerator_arg2.append(parsed_data[first_key]["filter3Numerator"][1])
-                self.filter_3_denominator_arg1.append(parsed_data[first_key]["filter3Denominator"])
-
-                self.hysteresis_compensation_list.append(parsed_data[first_key]["hysteresisCompensation"])
-                self.compensation_offset_list.append(parsed_data[first_key]["compensationOffset"])
-                
-                self.quadratic_parameters_arg1_list.append(parsed_data[first_key]["quadraticParameters"][0])
-                self.quadratic_parameters_arg2_list.append(parsed_data[first_key]["quadraticParameters"][1])
-                
-                self.f_parameters_arg1_list.append(parsed_data[first_key]["fParameters"][0])
-                self.f_parameters_arg2_list.append(parsed_data[first_key]["fParameters"][1])
-                self.k_parameters_arg1_list.append(parsed_data[first_key]["kParameters"][0])
-                self.k_parameters_arg2_list.append(parsed_data[first_key]["kParameters"][1])
-            if first_key == "Logging":
-                current_datetime = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-                filename_Axis1Logging = f"logging\\Logging_{current_datetime}.csv"
-                even_items = parsed_data["Logging"][::2]
-                odd_items = parsed_data["Logging"][1::2]
-                df = pd.DataFrame({'Yaw angle (urad)': even_items, 'Output voltage (V)': odd_items})
-                df.to_csv(filename_Axis1Logging, index=False)
-            self.counter = self.counter + 1
-            self.time_list.append(self.counter)
-            return parsed_data
         except json.JSONDecodeError as e:
             print(f"Error decoding JSON: {e}")
-            return None
\ No newline at end of file
+            return None
+        return self.ingest(parsed_data)
+
+    def ingest_batch(self, messages):
+        """
+        Store a list of already decoded messages, oldest first.
+
+        Rows of the same message type are written to their store in one block.
+
+        Parameters:
+            messages (list): Decoded JSON messages, as emitted by SerialThread.batch_received.
+                Binary telemetry arrives as structured arrays (see BinaryFraming) holding
+                many records each; they are written to the store of their columns as is.
+        """
+        rows = {}
+        n_messages = 0
+        for message in messages:
+            if isinstance(message, np.ndarray):
+                self.field_stores[message.dtype.names[0]].extend(message)
+                history = self.history_of(message.dtype.names[0])
+                if history is not None:
+                    history.record(message)
+                n_messages += len(message)
+                continue
+            n_messages += 1
+            first_key = next(iter(message))
+            decoder = self.decoders.get(first_key)
+            if decoder is not None:
+                rows.setdefault(first_key, []).append(decoder[0](message[first_key]))
+                if first_key in ACKNOWLEDGED and first_key in self.command_state:
+                    self.acknowledge(first_key, message[first_key])
+            elif first_key == "Logging":
+                self.save_logging(message[first_key])
+        for name, block in rows.items():
+            self.stores[name].extend(block)
+            if name in self.histories:
+                self.histories[name].record(block)
+        times = np.empty(n_messages, dtype=self.time_store.data.dtype)
+        times["time_list"] = np.arange(self.counter + 1, self.counter + n_messages + 1)
+        self.time_store.extend(times)
+        self.counter = self.counter + n_messages
+
+    def ingest(self, message):
+        """
+        Store an already decoded message.
+
+        Parameters:
+            message (dict): The decoded JSON message, keyed by message type.
+
+        Returns:
+            dict: The message that was stored.
+        """
+        first_key = next(iter(message))
+        decoder = self.decoders.get(first_key)
+        if decoder is not None:
+            decode, store = decoder
+            row = decode(message[first_key])
+            store.append(row)
+            if first_key in self.histories:
+                self.histories[first_key].record([row])
+            if first_key in ACKNOWLEDGED and first_key in self.command_state:
+                self.acknowledge(first_key, message[first_key])
+        elif first_key == "Logging":
+            self.save_logging(message[first_key])
+        self.counter = self.counter + 1
+        self.time_store.append((self.counter,))
+        return message
+
+    def save_logging(self, values):
+        """
+        Hand a "Logging" burst to the background writer.
+
+        Parameters:
+            values (list): Interleaved yaw angle and output voltage samples.
+        """
+        self.logging_writer.submit(values)
+
+    def command(self, message, full=False):
+        """
+        Build the JSON command for one of the json_to_send_* dicts.
+
+        Only the keys whose value differs from what the controller is known to hold
+        are sent. The whole section is sent for the first command, after
+        resync_commands(), every resync_interval commands, when full is True or
+        when delta_commands is False. last_delta holds the keys of a delta command
+        whose value changed, not counting the ALWAYS_SENT ones, and is None after
+        a full one.
+
+        The sent values are taken as the controller state right away. A command
+        that is then not written must be followed by resync_commands().
+
+        Parameters:
+            message (dict): A json_to_send_* dict, {section: {key: value}}.
+            full (bool): Send every key of the section.
+
+        Returns:
+            str: The JSON command to pass to write_to_serial(), or None when there
+            is nothing to send.
+        """
+        section, values = next(iter(message.items()))
+        state = self.command_state.get(section)
+        sent_count = self.commands_since_resync.get(section, 0)
+        if full or state is None or not self.delta_commands or sent_count >= self.resync_interval:
+            changes = values
+            sent_count = 0
+            self.last_delta = None
+        else:
+            always = ALWAYS_SENT.get(section, ())
+            changed = {key for key, value in values.items() if state.get(key) != value}
+            self.last_delta = changed
+            changes = {key: value for key, value in values.items() if key in always or key in changed}
+            if not changes:
+                return None
+        self.command_state[section] = copy.deepcopy(values)
+        self.commands_since_resync[section] = sent_count + 1
+        command = json.dumps({section: changes})
+        self.command_bytes["sent"] += len(command)
+        self.command_bytes["full"] += len(json.dumps(message))
+        return command
+
+    def resync_commands(self):
+        """
+        Forget the known controller state, so the next command of every section is sent in full.
+        """
+        self.command_state.clear()
+        self.commands_since_resync.clear()
+
+    def acknowledge(self, section, values):
+        """
+        Take the values read back from the controller as its current state.
+        Only the ACKNOWLEDGED sections are read back.
+        """
+        state = self.command_state[section]
+        for key, value in values.items():
+            if key in state:
+                state[key] = value
+
+    def latest(self, field, default=None):
+        """
+        Return the most recent value of a stored field.
+
+        Parameters:
+            field (str): Field name, e.g. "yaw_angle_list".
+            default: Value returned when nothing has been received yet.
+                When None, an IndexError is raised instead.
+        """
+        store = self.field_stores[field]
+        if store.count == 0 and default is not None:
+            return default
+        return store.latest(field)
+
+    def latest_text(self, field):
+        """
+        Return the most recent value of a stored field as display text.
+
+        Values received as float32 (binary telemetry) are shown with the digits of
+        the float32, e.g. -0.008674 rather than -0.008674000389873981.
+
+        Raises:
+            IndexError: If nothing has been received yet.
+        """
+        value = self.latest(field)
+        if isinstance(value, np.floating) and np.isfinite(value) and np.float32(value) == value:
+            return str(np.float32(value))
+        return str(value)
+
+    def window(self, field, n=None):
+        """
+        Return the last n values of a stored field, oldest first.
+
+        Parameters:
+            field (str): Field name, e.g. "yaw_angle_list".
+            n (int): Number of values; everything still in memory when None.
+
+        Returns:
+            numpy.ndarray: The requested values.
+        """
+        return self.field_stores[field].window(field, n)
+
+    def history_of(self, field):
+        """
+        Return the on-disk history holding a field, or None when it is not kept.
+        """
+        for history in self.histories.values():
+            if field in history.dtype.names:
+                return history
+        return None
+
+    def query_history(self, field, t0, t1, max_points=2000):
+        """
+        Return the values of a field between two times from the on-disk history.
+
+        Parameters:
+            field (str): Field name, e.g. "yaw_angle_list".
+            t0 (float): Start time in seconds since the epoch.
+            t1 (float): End time in seconds since the epoch.
+            max_points (int): Most points returned; longer ranges are decimated to
+                min/max per time bucket (see HistoryStore.query).
+
+        Returns:
+            tuple: (times, values) arrays, oldest first.
+
+        Raises:
+            KeyError: The field is not kept in a history.
+        """
+        history = self.history_of(field)
+        if history is None:
+            raise KeyError(f"No history kept for '{field}'")
+        return history.query(field, t0, t1, max_points)
+
+    def stop_history(self):
+        """
+        Write the rows still queued for the on-disk histories and stop their writers.
+        """
+        for history in self.histories.values():
+            history.stop()
+
+    def memory_footprint(self):
+        """
+        Return the bytes preallocated for each store and in total.
+
+        The footprint is fixed at construction and does not grow with the number of frames.
+        """
+        report = {name: store.nbytes for name, store in self.stores.items()}
+        report["total"] = sum(report.values())
+        return report
+
+    def __getattr__(self, name):
+        # Keep the historical *_list attribute names readable; they now return
+        # the values still held in the ring buffer, oldest first.
+        field_stores = self.__dict__.get("field_stores", {})
+        if name in field_stores:
+            return field_stores[name].window(name)
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
@@ -0,0 +1,235 @@
+from PySide6.QtWidgets import QWidget
+from PySide6.QtCore import QRectF, Qt
+from PySide6.QtGui import QPainter, QPen, QColor, QPolygonF
+import ctypes
+import numpy as np
+import shiboken6
+
+def polygon_view(polygon, size):
+    """
+    Resize a QPolygonF and return a writable (size, 2) NumPy view of its points.
+
+    Filling the view avoids creating one QPointF object per point.
+    """
+    polygon.resize(size)
+    if size == 0:
+        return np.empty((0, 2))
+    address = shiboken6.getCppPointer(polygon.data())[0]
+    buffer = (ctypes.c_double * (2 * size)).from_address(address)
+    return np.frombuffer(buffer, dtype=np.float64).reshape(size, 2)
+
+class PlotTrace:
+    """
+    One series of a LivePlot, decimated to min/max per pixel column.
+
+    Samples are grouped into buckets of samples_per_column consecutive samples,
+    aligned on the absolute sample index of the TelemetryStore. Finished buckets
+    are kept in a ring, so each refresh only reduces the samples that arrived
+    since the previous one.
+    """
+    def __init__(self, store, field, color):
+        """
+        Parameters:
+            store (TelemetryStore): Store holding the samples.
+            field (str): Column to plot.
+            color (str): Line colour.
+        """
+        self.store = store
+        self.field = field
+        self.pen = QPen(QColor(color))
+        self.pen.setCosmetic(True)
+        self.polygon = QPolygonF()
+        self.reset(1, 1)
+
+    def reset(self, columns, samples_per_column):
+        """
+        Drop the decimation cache, e.g. after the plot width changed.
+        """
+        self.columns = columns
+        self.samples_per_column = samples_per_column
+        self.mins = np.full(columns, np.nan)
+        self.maxs = np.full(columns, np.nan)
+        self.open_bucket = None
+        self.last_bucket = -1
+
+    def update(self):
+        """
+        Fold the samples received since the last call into the bucket ring.
+        """
+        count = self.store.count
+        if count == 0:
+            return
+        spc = self.samples_per_column
+        oldest_available = count - len(self.store)
+        last_bucket = (count - 1) // spc
+        first_bucket = max(last_bucket - self.columns + 1, oldest_available // spc)
+        if self.open_bucket is None or not first_bucket <= self.open_bucket <= last_bucket + 1:
+            self.mins[:] = np.nan
+            self.maxs[:] = np.nan
+            self.open_bucket = first_bucket
+        start = max(self.open_bucket * spc, oldest_available)
+        if start >= count:
+            return
+        values = self.store.window(self.field, count - start).astype(np.float64)
+        # Offsets of each bucket boundary inside values
+        buckets = np.arange(start // spc, last_bucket + 1)
+        offsets = np.maximum(buckets * spc - start, 0)
+        slots = buckets % self.columns
+        self.mins[slots] = np.minimum.reduceat(values, offsets)
+        self.maxs[slots] = np.maximum.reduceat(values, offsets)
+        self.last_bucket = last_bucket
+        # The newest bucket stays open until it holds samples_per_column samples
+        self.open_bucket = count // spc
+
+    def visible(self):
+        """
+        Return (column, min, max) arrays for the buckets currently on screen, oldest first.
+        """
+        buckets = np.arange(self.last_bucket - self.columns + 1, self.last_bucket + 1)
+        buckets = buckets[buckets >= 0]
+        slots = buckets % self.columns
+        mins = self.mins[slots]
+        maxs = self.maxs[slots]
+        valid = ~np.isnan(mins)
+        columns = buckets - (self.last_bucket - self.columns + 1)
+        return columns[valid], mins[valid], maxs[valid]
+
+class LivePlot(QWidget):
+    """
+    Scrolling plot of the last `window` samples of one or more store columns.
+
+    Drawing cost depends on the widget width, not on the number of samples:
+    each pixel column is drawn from its cached min/max.
+    """
+    margin = 4
+
+    def __init__(self, title, window=20000, parent=None):
+        """
+        Parameters:
+            title (str): Text drawn in the top left corner.
+            window (int): Number of most recent samples shown.
+        """
+        super().__init__(parent)
+        self.title = title
+        self.window = window
+        self.traces = []
+        self.setMinimumHeight(90)
+        self.setAutoFillBackground(True)
+        palette = self.palette()
+        palette.setColor(self.backgroundRole(), QColor("white"))
+        self.setPalette(palette)
+
+    def add_trace(self, store, field, color):
+        trace = PlotTrace(store, field, color)
+        self.traces.append(trace)
+        self.reset_traces()
+        return trace
+
+    def plot_columns(self):
+        return max(1, self.width() - 2 * self.margin)
+
+    def reset_traces(self):
+        columns = self.plot_columns()
+        samples_per_column = max(1, -(-self.window // columns))
+        for trace in self.traces:
+            trace.reset(columns, samples_per_column)
+
+    def resizeEvent(self, event):
+        self.reset_traces()
+        self.refresh()
+        super().resizeEvent(event)
+
+    def refresh(self):
+        """
+        Pull new samples from the stores and schedule a repaint.
+        """
+        for trace in self.traces:
+            trace.update()
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        rect = QRectF(self.rect()).adjusted(self.margin, self.margin, -self.margin, -self.margin)
+        visible = [trace.visible() for trace in self.traces]
+        lows = [mins.min() for columns, mins, maxs in visible if len(mins)]
+        highs = [maxs.max() for columns, mins, maxs in visible if len(maxs)]
+        painter.setPen(QColor("gray"))
+        painter.drawRect(rect)
+        if not lows:
+            painter.drawText(rect, Qt.AlignLeft | Qt.AlignTop, self.title)
+            return
+        low, high = min(lows), max(highs)
+        if high == low:
+            low, high = low - 1, high + 1
+        # Keep the first text line clear of the traces
+        rect.setTop(rect.top() + painter.fontMetrics().height())
+        scale = rect.height() / (high - low)
+        for trace, (columns, mins, maxs) in zip(self.traces, visible):
+            x = rect.left() + columns
+            y_min = rect.bottom() - (mins - low) * scale
+            y_max = rect.bottom() - (maxs - low) * scale
+            # Alternate min and max per column so spikes stay visible
+            points = polygon_view(trace.polygon, 2 * len(columns))
+            points[0::2, 0] = x
+            points[1::2, 0] = x
+            points[0::2, 1] = y_min
+            points[1::2, 1] = y_max
+            painter.setPen(trace.pen)
+            painter.drawPolyline(trace.polygon)
+        painter.setPen(QColor("black"))
+        painter.drawText(self.rect().adjusted(self.margin, self.margin, 0, 0), Qt.AlignLeft | Qt.AlignTop,
+                         f"{self.title}  [{low:.6g}, {high:.6g}]")
+
+class SpectrumPlot(QWidget):
+    """
+    Amplitude spectrum drawn from arrays set with set_spectrum(), on a log amplitude axis.
+    """
+    margin = 4
+
+    def __init__(self, title, color="purple", parent=None):
+        super().__init__(parent)
+        self.title = title
+        self.pen = QPen(QColor(color))
+        self.pen.setCosmetic(True)
+        self.polygon = QPolygonF()
+        self.frequencies = np.empty(0)
+        self.amplitudes = np.empty(0)
+        self.setMinimumHeight(90)
+        self.setAutoFillBackground(True)
+        palette = self.palette()
+        palette.setColor(self.backgroundRole(), QColor("white"))
+        self.setPalette(palette)
+
+    def set_spectrum(self, frequencies, amplitudes):
+        """
+        Show a new spectrum; bin 0 (the mean) is left out.
+        """
+        self.frequencies = frequencies[1:]
+        self.amplitudes = amplitudes[1:]
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        rect = QRectF(self.rect()).adjusted(self.margin, self.margin, -self.margin, -self.margin)
+        painter.setPen(QColor("gray"))
+        painter.drawRect(rect)
+        if len(self.amplitudes) < 2:
+            painter.drawText(rect, Qt.AlignLeft | Qt.AlignTop, self.title)
+            return
+        levels = np.log10(np.maximum(self.amplitudes, 1e-12))
+        low, high = levels.min(), levels.max()
+        if high == low:
+            low, high = low - 1, high + 1
+        rect.setTop(rect.top() + painter.fontMetrics().height())
+        # One point per pixel column at most: keep the largest amplitude of each column
+        columns = max(1, int(rect.width()))
+        edges = np.linspace(0, len(levels), min(columns, len(levels)) + 1).astype(int)
+        peaks = np.maximum.reduceat(levels, edges[:-1])
+        points = polygon_view(self.polygon, len(peaks))
+        points[:, 0] = rect.left() + np.arange(len(peaks)) * rect.width() / max(1, len(peaks) - 1)
+        points[:, 1] = rect.bottom() - (peaks - low) * rect.height() / (high - low)
+        painter.setPen(self.pen)
+        painter.drawPolyline(self.polygon)
+        painter.setPen(QColor("black"))
+        painter.drawText(self.rect().adjusted(self.margin, self.margin, 0, 0), Qt.AlignLeft | Qt.AlignTop,
+                         f"{self.title}  [0, {self.frequencies[-1]:.6g}]  amplitude 1e{low:.1f} - 1e{high:.1f}")
@@ -0,0 +1,217 @@
+from PySide6.QtCore import QThread, Signal
+from datetime import datetime
+import os
+import queue
+import time
+import numpy as np
+
+COLUMNS = ['Yaw angle (urad)', 'Output voltage (V)']
+
+def chunks(pairs, chunk_size):
+    for start in range(0, len(pairs), chunk_size):
+        yield pairs[start:start + chunk_size]
+
+def write_csv(path, pairs, chunk_size):
+    # pandas takes longer to import than the rest of the GUI; only load it for CSV exports
+    import pandas as pd
+    with open(path, "w", newline="") as csv_file:
+        csv_file.write(",".join(COLUMNS) + "\n")
+        for chunk in chunks(pairs, chunk_size):
+            pd.DataFrame(chunk, columns=COLUMNS).to_csv(csv_file, header=False, index=False)
+
+def write_npy(path, pairs, chunk_size):
+    dtype = np.dtype([(column, np.float64) for column in COLUMNS])
+    output = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(len(pairs),))
+    offset = 0
+    for chunk in chunks(pairs, chunk_size):
+        output[COLUMNS[0]][offset:offset + len(chunk)] = chunk[:, 0]
+        output[COLUMNS[1]][offset:offset + len(chunk)] = chunk[:, 1]
+        offset += len(chunk)
+    output.flush()
+    del output
+
+def write_parquet(path, pairs, chunk_size):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    schema = pa.schema([(column, pa.float64()) for column in COLUMNS])
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in chunks(pairs, chunk_size):
+            writer.write_table(pa.table({COLUMNS[0]: chunk[:, 0], COLUMNS[1]: chunk[:, 1]}, schema=schema))
+
+WRITERS = {"csv": write_csv, "npy": write_npy, "parquet": write_parquet}
+
+def write_logging_file(samples, path, file_format, chunk_size=65536):
+    """
+    Write a "Logging" burst to a file and summarise it.
+
+    Module level so it can also run in an OffloadPool worker process.
+
+    Parameters:
+        samples (numpy.ndarray): Interleaved yaw angle and output voltage samples.
+        path (str): Output file.
+        file_format (str): One of LoggingWriter.FORMATS.
+        chunk_size (int): Number of samples written per chunk.
+
+    Returns:
+        dict: path, samples, bytes, seconds, mb_per_s and statistics (mean, std,
+        min and max of each column) of the written file.
+    """
+    start = time.perf_counter()
+    pairs = samples[:len(samples) // 2 * 2].reshape(-1, 2)
+    WRITERS[file_format](path, pairs, chunk_size)
+    statistics = {}
+    if len(pairs):
+        for index, column in enumerate(COLUMNS):
+            values = pairs[:, index]
+            statistics[column] = {
+                "mean": float(values.mean()),
+                "std": float(values.std()),
+                "min": float(values.min()),
+                "max": float(values.max()),
+            }
+    seconds = time.perf_counter() - start
+    size = os.path.getsize(path)
+    return {
+        "path": path,
+        "samples": len(pairs),
+        "bytes": size,
+        "seconds": seconds,
+        "mb_per_s": size / 1e6 / seconds if seconds > 0 else float("inf"),
+        "statistics": statistics,
+    }
+
+class LoggingWriter(QThread):
+    """
+    Writes "Logging" bursts to disk from a background thread.
+
+    Bursts are queued by submit() and written in chunks, so the GUI thread never
+    waits for the disk. Each finished file is reported through write_finished.
+
+    With processes > 0 the conversion to CSV/NPY/Parquet and the statistics run in
+    an OffloadPool instead: this thread only turns the burst into an array, which
+    reaches the worker processes through shared memory. The workers are started
+    by the first burst and stopped by stop().
+    """
+    write_finished = Signal(dict)
+
+    FORMATS = {"csv": ".csv", "npy": ".npy", "parquet": ".parquet"}
+
+    def __init__(self, directory="logging", file_format="csv", chunk_size=65536, processes=0):
+        """
+        Parameters:
+            directory (str): Folder the log files are written to; created if missing.
+            file_format (str): "csv", "npy" (memory-mapped NumPy) or "parquet" (needs pyarrow).
+            chunk_size (int): Number of samples written per chunk.
+            processes (int): Worker processes writing the files; 0 writes them in this thread.
+        """
+        super().__init__()
+        self.directory = directory
+        self.file_format = file_format
+        self.chunk_size = chunk_size
+        self.jobs = queue.Queue()
+        self.last_result = None
+        self.pool = None
+        if processes > 0:
+            from OffloadPool import OffloadPool
+            self.pool = OffloadPool(processes)
+            self.pool.result_ready.connect(self.on_offloaded)
+            self.pool.failed.connect(self.on_offload_failed)
+
+    @property
+    def file_format(self):
+        return self._file_format
+
+    @file_format.setter
+    def file_format(self, file_format):
+        if file_format not in self.FORMATS:
+            raise ValueError(f"Unknown logging format '{file_format}', expected one of {', '.join(self.FORMATS)}")
+        if file_format == "parquet":
+            import pyarrow  # noqa: F401 - fail when selected rather than on the first burst
+        self._file_format = file_format
+
+    def submit(self, values):
+        """
+        Queue a "Logging" burst for writing.
+
+        Parameters:
+            values (list): Interleaved yaw angle and output voltage samples.
+        """
+        current_datetime = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        self.jobs.put((current_datetime, values, self.file_format))
+        if self.pool is not None:
+            self.pool.start()
+        if not self.isRunning():
+            self.start()
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                if self.pool is not None:
+                    self.pool.shutdown()
+                break
+            try:
+                if self.pool is not None:
+                    self.offload(*job)
+                    continue
+                result = self.write(*job)
+            except Exception as e:
+                print(f"Error writing logging file: {e}")
+                continue
+            self.finish(result)
+
+    def stop(self):
+        """
+        Finish the queued bursts, then end the thread and the worker processes.
+        """
+        if self.isRunning():
+            self.jobs.put(None)
+        elif self.pool is not None:
+            self.pool.shutdown()
+
+    def write(self, timestamp, values, file_format):
+        """
+        Write one burst to a file in this thread.
+
+        Parameters:
+            timestamp (str): Used in the file name.
+            values (list): Interleaved yaw angle and output voltage samples.
+            file_format (str): One of FORMATS.
+
+        Returns:
+            dict: See write_logging_file().
+        """
+        samples = np.asarray(values, dtype=np.float64)
+        return write_logging_file(samples, self.path(timestamp, file_format), file_format, self.chunk_size)
+
+    def offload(self, timestamp, values, file_format):
+        """
+        Hand one burst to the worker processes; the result arrives through on_offloaded.
+        """
+        self.pool.submit(write_logging_file, values, path=self.path(timestamp, file_format),
+                         file_format=file_format, chunk_size=self.chunk_size)
+
+    def on_offloaded(self, result):
+        self.finish(result)
+
+    def on_offload_failed(self, error):
+        print(f"Error writing logging file: {error}")
+
+    def finish(self, result):
+        self.last_result = result
+        print(f"Logging written to {result['path']}: {result['bytes'] / 1e6:.2f} MB "
+              f"in {result['seconds']:.2f} s ({result['mb_per_s']:.1f} MB/s)")
+        self.write_finished.emit(result)
+
+    def path(self, timestamp, file_format):
+        # Bursts within the same second get a suffix; worker processes may write them concurrently
+        os.makedirs(self.directory, exist_ok=True)
+        extension = self.FORMATS[file_format]
+        path = os.path.join(self.directory, f"Logging_{timestamp}{extension}")
+        suffix = 1
+        while os.path.exists(path):
+            path = os.path.join(self.directory, f"Logging_{timestamp}_{suffix}{extension}")
+            suffix += 1
+        # Claim the name now; the file is written later, maybe by another process
+        open(path, "a").close()
+        return path
@@ -0,0 +1,137 @@
+from operator import itemgetter
+import numpy as np
+
+# Types json.loads gives numbers (true/false are stored as 1/0)
+NUMBER_TYPES = frozenset([int, float, bool])
+
+class MessageSchema:
+    """
+    Declarative description of one incoming message type.
+
+    Each field maps a JSON key to one store column (scalars) or to several
+    columns (fixed-width arrays such as "prefilterNumerator").
+    """
+    def __init__(self, name, fields, telemetry=False):
+        """
+        Parameters:
+            name (str): Message type, i.e. the first key of the JSON message.
+            fields (list): (json_key, column, dtype) entries. column is a column
+                name for scalar values or a list of column names for arrays.
+            telemetry (bool): True for high-rate messages, which get the large
+                telemetry capacity instead of the settings capacity.
+        """
+        self.name = name
+        self.fields = fields
+        self.telemetry = telemetry
+        self.decode = self.compile()
+        # Columns per row; checked for every received frame, so not derived each time
+        self.width = len(self.dtype)
+
+    @property
+    def dtype(self):
+        """
+        Store layout as (column, dtype) pairs, in row order.
+        """
+        layout = []
+        for key, columns, dtype in self.fields:
+            if isinstance(columns, str):
+                layout.append((columns, dtype))
+            else:
+                layout.extend((column, dtype) for column in columns)
+        return layout
+
+    def compile(self):
+        """
+        Build the function turning a message body into one store row.
+
+        Returns:
+            callable: Takes the message body (dict) and returns a row tuple.
+        """
+        keys = [key for key, columns, dtype in self.fields]
+        getter = itemgetter(*keys)
+        if len(keys) == 1:
+            return lambda body: (getter(body),)
+        widths = [1 if isinstance(columns, str) else len(columns) for key, columns, dtype in self.fields]
+        if all(width == 1 for width in widths):
+            return getter
+
+        def decode(body):
+            row = []
+            for value, width in zip(getter(body), widths):
+                if width == 1:
+                    row.append(value)
+                else:
+                    row.extend(value[:width])
+            return tuple(row)
+        return decode
+
+    def valid(self, body):
+        """
+        Check that a message body can be stored: every key present, arrays long
+        enough and all values numbers.
+
+        Parameters:
+            body: The value under the message type key.
+
+        Returns:
+            bool: False for bodies the row decoder would fail on or store wrongly.
+        """
+        try:
+            row = self.decode(body)
+        except (KeyError, TypeError):
+            return False
+        return len(row) == self.width and NUMBER_TYPES.issuperset(map(type, row))
+
+SCHEMAS = {}
+
+def register_schema(schema):
+    """
+    Add a message schema to the registry used by JSONHandler.
+    """
+    SCHEMAS[schema.name] = schema
+    return schema
+
+# --- tab 1 --- #
+register_schema(MessageSchema("Controls", [
+    ("state", "controller_state_list", np.int64),
+    ("yawAngle", "yaw_angle_list", np.float64),
+    ("warninglevel", "warning_level_list", np.int64),
+    ("yawAngleStdDeviation", "yaw_std_list", np.float64),
+    ("errorAxis1", "error_axis1_list", np.int64),
+    ("errorAxis2", "error_axis2_list", np.int64),
+], telemetry=True))
+
+# --- tab 2 --- #
+register_schema(MessageSchema("General settings", [
+    ("yawOffset", "yaw_offset_list", np.float64),
+    ("AAROffset", "aar_offset_list", np.float64),
+    ("controlInstabilityProtection", "control_instability_protection_list", np.int64),
+    ("minVoltage", "min_voltage_list", np.float64),
+    ("maxVoltage", "max_voltage_list", np.float64),
+    ("openLoopMaxSpeed", "open_loop_max_speed_list", np.float64),
+    ("closedLoopMaxSpeed", "closed_loop_max_speed_list", np.float64),
+    ("minPIDLimit", "min_PID_limit_list", np.float64),
+    ("maxPIDLimit", "max_PID_limit_list", np.float64),
+]))
+
+# --- tab 3 --- #
+register_schema(MessageSchema("Control settings", [
+    ("prefilterNumerator", ["prefilter_numerator_arg1", "prefilter_numerator_arg2",
+                            "prefilter_numerator_arg3", "prefilter_numerator_arg4"], np.float64),
+    ("prefilterDenominator", ["prefilter_denominator_arg1", "prefilter_denominator_arg2"], np.float64),
+    # filter 1
+    ("filter1Numerator", ["filter_1_numerator_arg1", "filter_1_numerator_arg2",
+                          "filter_1_numerator_arg3", "filter_1_numerator_arg4"], np.float64),
+    ("filter1Denominator", ["filter_1_denominator_arg1", "filter_1_denominator_arg2"], np.float64),
+    # filter 2
+    ("filter2Numerator", ["filter_2_numerator_arg1", "filter_2_numerator_arg2"], np.float64),
+    ("filter2Denominator", "filter_2_denominator_arg1", np.float64),
+    # filter 3
+    ("filter3Numerator", ["filter_3_numerator_arg1", "filter_3_numerator_arg2"], np.float64),
+    ("filter3Denominator", "filter_3_denominator_arg1", np.float64),
+    ("hysteresisCompensation", "hysteresis_compensation_list", np.int64),
+    ("compensationOffset", "compensation_offset_list", np.float64),
+    ("quadraticParameters", ["quadratic_parameters_arg1_list", "quadratic_parameters_arg2_list"], np.float64),
+    ("fParameters", ["f_parameters_arg1_list", "f_parameters_arg2_list"], np.float64),
+    ("kParameters", ["k_parameters_arg1_list", "k_parameters_arg2_list"], np.float64),
+]))
@@ -0,0 +1,135 @@
+"""
+Worker-process pool for heavy post-processing.
+
+Arrays are handed to the workers through multiprocessing.shared_memory: the
+parent copies them once into a shared block and only the block name, shape and
+dtype are pickled. The work runs outside the GUI process, so it does not hold
+its GIL, and results come back through Qt signals.
+"""
+from PySide6.QtCore import QObject, Signal
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import multiprocessing
+import os
+import numpy as np
+
+def share_array(values, dtype=np.float64, chunk_size=65536):
+    """
+    Copy an array, or a list of numbers, into a new shared memory block.
+
+    Lists are converted straight into the block, chunk by chunk, so the calling
+    thread lets go of the GIL between chunks instead of holding it for the whole
+    conversion.
+
+    Parameters:
+        values (numpy.ndarray or sequence): The data; sequences are read as a flat array of dtype.
+        dtype: Element type used for sequences.
+        chunk_size (int): Elements converted per chunk.
+
+    Returns:
+        tuple: (block, spec). The caller owns block and must close and unlink it;
+        spec is what a worker needs to attach to it.
+    """
+    if isinstance(values, np.ndarray):
+        shape, dtype = values.shape, values.dtype
+    else:
+        shape, dtype = (len(values),), np.dtype(dtype)
+    block = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * dtype.itemsize))
+    array = np.ndarray(shape, dtype, buffer=block.buf)
+    for start in range(0, len(array), chunk_size):
+        array[start:start + chunk_size] = values[start:start + chunk_size]
+    del array
+    return block, (block.name, shape, dtype.str)
+
+def run_shared(function, spec, kwargs):
+    """
+    Worker side: attach to the shared block and call function(array, **kwargs).
+    """
+    name, shape, dtype = spec
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        array = np.ndarray(shape, dtype, buffer=block.buf)
+        try:
+            return function(array, **kwargs)
+        finally:
+            # The view must go before the block can be closed
+            del array
+    finally:
+        block.close()
+
+class OffloadPool(QObject):
+    """
+    Runs module-level functions on arrays in worker processes.
+
+    Usage:
+        pool = OffloadPool()
+        pool.result_ready.connect(on_result)
+        pool.submit(write_logging_file, pairs, path="Logging.csv", file_format="csv")
+    """
+    result_ready = Signal(dict)
+    failed = Signal(str)
+
+    def __init__(self, workers=2):
+        """
+        Parameters:
+            workers (int): Number of worker processes, started on first use.
+        """
+        super().__init__()
+        self.workers = workers
+        self.executor = None
+
+    def submit(self, function, array, **kwargs):
+        """
+        Run function(array, **kwargs) in a worker process.
+
+        array is a NumPy array or a list of floats (see share_array); the worker
+        gets a NumPy view of the shared block, valid until function returns.
+
+        function must be importable by the workers (defined at module level) and
+        return a dict, which is emitted through result_ready; an exception is
+        emitted through failed instead.
+
+        Returns:
+            concurrent.futures.Future: The result, for callers that prefer to wait.
+        """
+        self.start()
+        block, spec = share_array(array)
+        try:
+            future = self.executor.submit(run_shared, function, spec, kwargs)
+        except Exception:
+            block.close()
+            block.unlink()
+            raise
+        future.add_done_callback(lambda future: self.on_done(future, block))
+        return future
+
+    def start(self):
+        """
+        Start the worker processes now rather than on the first submit(), which
+        would otherwise pay for spawning them.
+        """
+        if self.executor is None:
+            # spawn: workers must not inherit the Qt state of the GUI process
+            self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            for _ in range(self.workers):
+                self.executor.submit(os.getpid)
+
+    def on_done(self, future, block):
+        # Runs in the executor's management thread; the signals are queued to the receivers
+        block.close()
+        block.unlink()
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            self.failed.emit(f"{type(error).__name__}: {error}")
+        else:
+            self.result_ready.emit(future.result())
+
+    def shutdown(self, wait=True):
+        """
+        Stop the workers, after the submitted work when wait is True.
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait, cancel_futures=not wait)
+            self.executor = None
@@ -0,0 +1,153 @@
+from PySide6.QtCore import QThread, Signal, Slot
+import gzip
+import json
+import mmap
+import threading
+import time
+from TelemetryRecorder import RECORD_HEADER
+
+def read_capture(path):
+    """
+    Iterate over the (timestamp, frame) records of a TelemetryRecorder capture.
+
+    Uncompressed files are memory-mapped; gzip files (.gz) are decompressed into memory.
+
+    Parameters:
+        path (str): Capture file written by TelemetryRecorder.
+
+    Yields:
+        tuple: (timestamp, frame) in file order.
+    """
+    if path.endswith(".gz"):
+        with gzip.open(path, "rb") as capture:
+            data = capture.read()
+        yield from parse_capture(data, ".ndjson" in path)
+        return
+    with open(path, "rb") as capture:
+        if capture.seek(0, 2) == 0:
+            return
+        with mmap.mmap(capture.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield from parse_capture(data, path.endswith(".ndjson"))
+
+def parse_capture(data, ndjson):
+    """
+    Split capture bytes into (timestamp, frame) records.
+
+    Parameters:
+        data: bytes or mmap holding the capture.
+        ndjson (bool): True for newline-delimited JSON, False for the binary format.
+    """
+    size = len(data)
+    offset = 0
+    if ndjson:
+        while offset < size:
+            end = data.find(b"\n", offset)
+            if end < 0:
+                end = size
+            if end > offset:
+                record = json.loads(data[offset:end])
+                yield record["t"], record["frame"]
+            offset = end + 1
+        return
+    header_size = RECORD_HEADER.size
+    while offset + header_size <= size:
+        length, timestamp = RECORD_HEADER.unpack_from(data, offset)
+        offset += header_size
+        yield timestamp, json.loads(data[offset:offset + length])
+        offset += length
+
+class ReplayThread(QThread):
+    """
+    Drives the GUI from a recorded capture instead of the serial port.
+
+    Offers the same signals as SerialThread, so it can be passed to Widget in its place.
+    """
+    data_received = Signal(dict)
+    batch_received = Signal(list)
+    replay_finished = Signal(dict)
+    # Interface of SerialThread; a replay writes nothing, so it is never emitted
+    write_failed = Signal(str)
+
+    def __init__(self, path, speed=1.0, batch_interval_ms=20, max_pending_batches=4):
+        """
+        Parameters:
+            path (str): Capture file written by TelemetryRecorder.
+            speed (float): Playback speed factor; 1 is real time, 0 is as fast as possible.
+            batch_interval_ms (int): Frames are emitted in batches covering this interval;
+                0 emits every frame through data_received.
+            max_pending_batches (int): Batches that may wait in the GUI event queue before
+                the replay pauses, so fast replays cannot flood the GUI thread.
+        """
+        super().__init__()
+        self.path = path
+        self.speed = speed
+        self.batch_interval_ms = batch_interval_ms
+        self.pending = threading.Semaphore(max_pending_batches)
+        self.recorder = None
+        self.running = False
+        self.result = None
+        self.batch_received.connect(self.batch_delivered)
+
+    @Slot(list)
+    def batch_delivered(self, frames):
+        # Runs in the GUI thread once the event queue reached this batch
+        self.pending.release()
+
+    def emit_batch(self, batch):
+        while self.running and not self.pending.acquire(timeout=0.1):
+            pass
+        self.batch_received.emit(batch)
+
+    def run(self):
+        self.running = True
+        batch_interval = self.batch_interval_ms / 1000
+        batch = []
+        frames = 0
+        start = time.monotonic()
+        batch_deadline = start + batch_interval
+        first_timestamp = None
+        print(f"Replay started: {self.path}")
+        for timestamp, frame in read_capture(self.path):
+            if not self.running:
+                break
+            if first_timestamp is None:
+                first_timestamp = timestamp
+            if self.speed > 0:
+                delay = (timestamp - first_timestamp) / self.speed - (time.monotonic() - start)
+                if delay > 0:
+                    if batch:
+                        self.emit_batch(batch)
+                        batch = []
+                    time.sleep(delay)
+            if self.recorder is not None:
+                self.recorder.record(frame, timestamp)
+            frames += 1
+            if batch_interval > 0:
+                batch.append(frame)
+                if time.monotonic() >= batch_deadline:
+                    self.emit_batch(batch)
+                    batch = []
+                    batch_deadline = time.monotonic() + batch_interval
+            else:
+                self.data_received.emit(frame)
+        if batch:
+            self.emit_batch(batch)
+        seconds = time.monotonic() - start
+        self.result = {
+            "frames": frames,
+            "seconds": seconds,
+            "frames_per_s": frames / seconds if seconds > 0 else float("inf"),
+        }
+        print(f"Replay finished: {frames} frames in {seconds:.2f} s ({self.result['frames_per_s']:.0f} frames/s)")
+        self.replay_finished.emit(self.result)
+        self.running = False
+
+    def write_to_serial(self, data, key=None):
+        """
+        Commands have no destination during a replay; they are only printed.
+        """
+        if data is not None:
+            print("Debug replay - command not sent:", data)
+
+    def stop(self):
+        self.running = False
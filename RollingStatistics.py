@@ -0,0 +1,217 @@
+import time
+import numpy as np
+
+class RollingStatistics:
+    """
+    Statistics over the last `window` samples of one TelemetryStore column.
+
+    Each update() only processes the samples that arrived since the previous
+    call: sliding sums of x, x**2 and i*x give mean, std and the drift slope;
+    min and max are kept per block of block_size samples, like the LivePlot
+    buckets, so only the blocks that changed are reduced again. The sums are
+    recomputed exactly once per window of samples, which bounds the rounding
+    error of adding and removing values.
+
+    The spectrum is an FFT of the last spectrum_size samples, recomputed at most
+    every spectrum_interval seconds.
+    """
+    def __init__(self, store, field, window=10000, spectrum_size=4096, block_size=256,
+                 sample_rate_hz=None, spectrum_interval=1.0):
+        """
+        Parameters:
+            store (TelemetryStore): Store holding the samples.
+            field (str): Column to analyse.
+            window (int): Number of most recent samples the statistics cover.
+            spectrum_size (int): Samples per FFT; capped to window.
+            block_size (int): Samples per min/max block.
+            sample_rate_hz (float): Telemetry rate, used for the drift slope and the
+                spectrum frequencies; estimated from the arrival rate when None.
+            spectrum_interval (float): Minimum seconds between two FFTs.
+        """
+        self.store = store
+        self.field = field
+        self.block_size = block_size
+        self.spectrum_size = spectrum_size
+        self.sample_rate_hz = sample_rate_hz
+        self.spectrum_interval = spectrum_interval
+        self.set_window(window)
+
+    def set_window(self, window):
+        """
+        Change the window; the statistics restart from the samples in the store.
+        """
+        if window <= 0:
+            raise ValueError("window must be positive")
+        # Whole blocks, so that block i always covers ring slots i*block_size onwards
+        self.window = -(-window // self.block_size) * self.block_size
+        self.values = np.full(self.window, np.nan)
+        n_blocks = self.window // self.block_size
+        self.block_mins = np.full(n_blocks, np.nan)
+        self.block_maxs = np.full(n_blocks, np.nan)
+        self.n = 0
+        self.head = 0
+        self.reference = 0.0
+        self.sum = 0.0
+        self.sum_squares = 0.0
+        self.sum_index = 0.0
+        self.since_resum = 0
+        self.seen = max(0, self.store.count - self.window)
+        self.rate_time = None
+        self.rate_count = self.store.count
+        self.estimated_rate_hz = None
+        self.spectrum = None
+        self.spectrum_time = None
+
+    def update(self):
+        """
+        Fold the samples received since the last call into the statistics.
+
+        Returns:
+            int: Number of new samples.
+        """
+        count = self.store.count
+        if count < self.seen:
+            # The store was cleared
+            self.set_window(self.window)
+        self.update_rate(count)
+        # Samples overwritten in the store before we saw them are skipped
+        first = max(self.seen, count - len(self.store), count - self.window)
+        if first >= count:
+            return 0
+        values = self.store.window(self.field, count - first).astype(np.float64)
+        self.seen = count
+        self.push(values)
+        return len(values)
+
+    def update_rate(self, count):
+        now = time.monotonic()
+        if self.rate_time is None:
+            self.rate_time, self.rate_count = now, count
+        elif now - self.rate_time >= 1.0:
+            self.estimated_rate_hz = (count - self.rate_count) / (now - self.rate_time)
+            self.rate_time, self.rate_count = now, count
+
+    def push(self, values):
+        k = len(values)
+        if self.n == 0 or self.since_resum + k >= self.window:
+            self.write_ring(values)
+            self.n = min(self.window, self.n + k)
+            self.resum()
+            return
+        # Values leaving the window, oldest first, with their positions 0..drop-1
+        drop = max(0, self.n + k - self.window)
+        if drop:
+            old = self.ring_slice(self.head - self.n, drop) - self.reference
+            self.sum -= old.sum()
+            self.sum_squares -= np.dot(old, old)
+            self.sum_index -= np.dot(np.arange(drop), old)
+            self.n -= drop
+            # The remaining values move down by drop positions
+            self.sum_index -= drop * self.sum
+        new = values - self.reference
+        self.sum += new.sum()
+        self.sum_squares += np.dot(new, new)
+        self.sum_index += np.dot(np.arange(self.n, self.n + k), new)
+        self.n += k
+        self.since_resum += k
+        self.write_ring(values)
+
+    def ring_slice(self, start, length):
+        slots = (start + np.arange(length)) % self.window
+        return self.values[slots]
+
+    def write_ring(self, values):
+        values = values[-self.window:]
+        k = len(values)
+        slots = (self.head + np.arange(k)) % self.window
+        self.values[slots] = values
+        self.head = (self.head + k) % self.window
+        # Only the blocks that were written are reduced again
+        blocks = np.unique(slots // self.block_size)
+        starts = blocks * self.block_size
+        segments = self.values[(starts[:, None] + np.arange(self.block_size)).ravel()].reshape(-1, self.block_size)
+        self.block_mins[blocks] = np.fmin.reduce(segments, axis=1)
+        self.block_maxs[blocks] = np.fmax.reduce(segments, axis=1)
+
+    def resum(self):
+        """
+        Recompute the sliding sums exactly from the ring.
+        """
+        values = self.window_values()
+        self.reference = float(values[0]) if len(values) else 0.0
+        shifted = values - self.reference
+        self.sum = shifted.sum()
+        self.sum_squares = np.dot(shifted, shifted)
+        self.sum_index = np.dot(np.arange(len(shifted)), shifted)
+        self.since_resum = 0
+
+    def window_values(self):
+        """
+        Return the samples in the window, oldest first.
+        """
+        return self.ring_slice(self.head - self.n, self.n)
+
+    def rate_hz(self):
+        return self.sample_rate_hz or self.estimated_rate_hz
+
+    def statistics(self):
+        """
+        Returns:
+            dict: samples, mean, std, min, max, peak_to_peak and drift (slope per second,
+            or per sample while the rate is unknown); empty before the first sample.
+        """
+        n = self.n
+        if n == 0:
+            return {}
+        mean = self.sum / n
+        variance = max(self.sum_squares / n - mean * mean, 0.0)
+        # Least squares slope against positions 0..n-1
+        index_mean = (n - 1) / 2
+        index_variance = (n * n - 1) / 12
+        slope = (self.sum_index / n - index_mean * mean) / index_variance if n > 1 else 0.0
+        rate = self.rate_hz()
+        # Blocks of an unfilled window only hold NaN outside the samples
+        low = np.fmin.reduce(self.block_mins)
+        high = np.fmax.reduce(self.block_maxs)
+        return {
+            "samples": n,
+            "mean": mean + self.reference,
+            "std": variance ** 0.5,
+            "min": float(low),
+            "max": float(high),
+            "peak_to_peak": float(high - low),
+            "drift": slope * rate if rate else slope,
+            "drift_unit": "per s" if rate else "per sample",
+        }
+
+    def update_spectrum(self, force=False):
+        """
+        Recompute the amplitude spectrum of the last spectrum_size samples when
+        spectrum_interval has passed.
+
+        Returns:
+            dict or None: frequencies (Hz, or cycles per sample while the rate is
+            unknown), amplitudes, peak_frequency and peak_amplitude; None before
+            spectrum_size samples have arrived.
+        """
+        now = time.monotonic()
+        if not force and self.spectrum_time is not None and now - self.spectrum_time < self.spectrum_interval:
+            return self.spectrum
+        size = min(self.spectrum_size, self.window)
+        if self.n < size:
+            return self.spectrum
+        self.spectrum_time = now
+        values = self.ring_slice(self.head - size, size)
+        taper = np.hanning(size)
+        amplitudes = np.abs(np.fft.rfft((values - values.mean()) * taper)) * 2 / taper.sum()
+        rate = self.rate_hz()
+        frequencies = np.fft.rfftfreq(size, 1 / rate if rate else 1.0)
+        # Bin 0 is the removed mean
+        peak = int(np.argmax(amplitudes[1:])) + 1
+        self.spectrum = {
+            "frequencies": frequencies,
+            "amplitudes": amplitudes,
+            "peak_frequency": float(frequencies[peak]),
+            "peak_amplitude": float(amplitudes[peak]),
+        }
+        return self.spectrum
@@ -1,51 +1,377 @@
 from PySide6.QtCore import QThread, Signal
 from PySide6.QtWidgets import QMessageBox
+from collections import deque
 import serial
 import json
+import threading
+import time
+from BinaryFraming import BinaryFrameParser, records_to_frames, telemetry_format_command
+from MessageSchema import SCHEMAS
+
+# Start of a "Logging" burst, a single line of several hundred KB
+LOGGING_PREFIX = b'{"Logging"'
+
+class LineSplitter:
+    """
+    Splits a byte stream into newline terminated lines.
+
+    Bytes after the last newline are kept until the next call to feed(). They
+    are kept as a list of reads and joined once the line is complete, so a long
+    line arriving in many reads is not copied again on every read.
+    """
+    def __init__(self):
+        self.parts = []
+        # Bytes held in parts
+        self.size = 0
+
+    @property
+    def remainder(self):
+        """
+        The bytes of the incomplete last line.
+        """
+        if len(self.parts) > 1:
+            self.parts = [b"".join(self.parts)]
+        return self.parts[0] if self.parts else b""
+
+    @remainder.setter
+    def remainder(self, value):
+        self.parts = [value] if value else []
+        self.size = len(value)
+
+    def head(self, n):
+        """
+        Return the first n bytes of the incomplete last line without joining it.
+        """
+        head = b""
+        for part in self.parts:
+            head += part[:n - len(head)]
+            if len(head) >= n:
+                break
+        return head
+
+    def feed(self, data):
+        """
+        Add received bytes and return the lines they complete.
+
+        Parameters:
+            data (bytes): Bytes read from the serial line.
+
+        Returns:
+            list: Complete lines (bytes), without the trailing newline.
+        """
+        if b"\n" not in data:
+            if data:
+                self.parts.append(data)
+                self.size += len(data)
+            return []
+        lines = data.split(b"\n")
+        if self.parts:
+            self.parts.append(lines[0])
+            lines[0] = b"".join(self.parts)
+        self.remainder = lines.pop()
+        return lines
+
+class FrameParser:
+    """
+    Incremental parser turning the serial byte stream into frames.
+
+    JSON frames are newline terminated; binary frames (see BinaryFraming) are
+    separated from the text around them first. Bad input never raises:
+
+        framing: lines not wrapped in braces, frames joined by a lost newline,
+                 lines longer than max_line_bytes, or max_logging_bytes for
+                 "Logging" bursts (dropped up to the next newline), and binary frames with a wrong type, length or CRC;
+                 the frames around noise or a lost newline are kept;
+        decode:  lines wrapped in braces that are not valid JSON;
+        schema:  JSON frames of an unknown message type, or whose body does
+                 not match its MessageSchema.
+
+    Bad frames are skipped and counted in errors. The lines of one feed() are
+    decoded with a single json.loads call; only when it fails are they decoded
+    one by one to find the bad ones.
+    """
+    ERRORS = ["framing", "decode", "schema"]
+
+    def __init__(self, binary=False, max_line_bytes=65536, max_logging_bytes=64 * 1024 * 1024, debug=False):
+        """
+        Parameters:
+            binary (bool): Expect binary telemetry frames between the JSON lines.
+            max_line_bytes (int): Longest line accepted before it is dropped as garbage.
+            max_logging_bytes (int): Longest "Logging" burst accepted; a burst of
+                one million samples takes about 25 MB.
+            debug (bool): Print every line.
+        """
+        self.splitter = LineSplitter()
+        self.binary = BinaryFrameParser() if binary else None
+        self.max_line_bytes = max_line_bytes
+        self.max_logging_bytes = max_logging_bytes
+        self.debug = debug
+        # Drop everything up to the next newline, after an over-long line
+        self.skipping = False
+        self.frames = 0
+        self.errors = dict.fromkeys(self.ERRORS, 0)
+
+    def feed(self, data):
+        """
+        Add received bytes.
+
+        Parameters:
+            data (bytes): Bytes read from the serial line.
+
+        Returns:
+            tuple: (frames, blocks). frames is a list of decoded JSON frames (dict)
+            and blocks a list of structured arrays of binary records.
+        """
+        blocks = []
+        if self.binary is not None:
+            binary_errors = self.binary.errors
+            blocks, data = self.binary.feed(data)
+            self.errors["framing"] += self.binary.errors - binary_errors
+            self.frames += sum(len(block) for block in blocks)
+        lines = self.splitter.feed(data)
+        if self.skipping and lines:
+            # The end of the over-long line
+            lines.pop(0)
+            self.skipping = False
+        if self.splitter.size > self.max_line_bytes and (
+                self.splitter.size > self.max_logging_bytes
+                or self.splitter.head(len(LOGGING_PREFIX)) != LOGGING_PREFIX):
+            self.splitter.remainder = b""
+            if not self.skipping:
+                self.skipping = True
+                self.errors["framing"] += 1
+        candidates = []
+        for raw_line in lines:
+            line = raw_line.strip()
+            if self.debug:
+                print('Debug serial class - data received: ', line.decode('latin-1'))
+            if line.startswith(b"{") and line.endswith(b"}"):
+                candidates.append(line)
+            elif line:
+                self.errors["framing"] += 1
+                # Noise in front of a frame: resynchronize on its opening brace
+                start = line.find(b"{")
+                if start > 0 and line.endswith(b"}"):
+                    candidates.append(line[start:])
+        if not candidates:
+            return [], blocks
+        frames = self.decode(candidates)
+        valid = [frame for frame in frames if self.valid(frame)]
+        self.errors["schema"] += len(frames) - len(valid)
+        self.frames += len(valid)
+        return valid, blocks
+
+    def decode(self, lines):
+        try:
+            frames = json.loads((b"[" + b",".join(lines) + b"]").decode('latin-1'))
+            # Broken lines can pair up into valid JSON, but then fewer frames come out
+            if len(frames) == len(lines):
+                return frames
+        except ValueError:
+            pass
+        frames = []
+        for line in lines:
+            try:
+                frames.append(json.loads(line.decode('latin-1')))
+                continue
+            except ValueError:
+                pass
+            if b"}{" not in line:
+                self.errors["decode"] += 1
+                continue
+            # A lost newline joined frames: split them again
+            self.errors["framing"] += 1
+            for part in line.replace(b"}{", b"}\n{").split(b"\n"):
+                try:
+                    frames.append(json.loads(part.decode('latin-1')))
+                except ValueError:
+                    self.errors["decode"] += 1
+        return frames
+
+    def valid(self, frame):
+        if not frame:
+            return False
+        name = next(iter(frame))
+        schema = SCHEMAS.get(name)
+        if schema is not None:
+            return schema.valid(frame[name])
+        return name == "Logging" and isinstance(frame[name], list)
+
+    def error_counts(self):
+        """
+        Return the frames (JSON frames and binary records) decoded and the errors
+        per kind since the parser was created.
+        """
+        return dict(self.errors, frames=self.frames)
 
 class SerialThread(QThread):
     data_received = Signal(dict)
+    batch_received = Signal(list)
+    # Emitted with the error when queued commands could not be written
+    write_failed = Signal(str)
 
-    def __init__(self):
+    def __init__(self, port='COM12', baudrate=921600, read_timeout=0.05, batch_interval_ms=0, binary=False):
+        """
+        Parameters:
+            port (str): Serial port to open.
+            baudrate (int): Baud rate of the serial line.
+            read_timeout (float): Seconds a read blocks while the line is idle.
+                This bounds how long stop() takes to be honoured.
+            batch_interval_ms (int): When greater than 0, frames decoded within each
+                interval are collected and emitted together through batch_received
+                instead of one data_received per frame.
+            binary (bool): Ask the controller for binary "Controls" telemetry (see
+                BinaryFraming) once the port is open. Batches then carry the records
+                as structured NumPy arrays; settings messages stay JSON.
+        """
         super().__init__()
+        self.port = port
+        self.baudrate = baudrate
+        self.read_timeout = read_timeout
+        self.batch_interval_ms = batch_interval_ms
+        self.binary = binary
+        self.debug = False
+        # Optional TelemetryRecorder receiving every decoded frame
+        self.recorder = None
+        # Optional Diagnostics.LatencyMonitor; the read->decode and decode->emit stages are timed here
+        self.latency = None
+        # FrameParser of the current connection; its error counts are shown on the Diagnostics tab
+        self.parser = None
         self.serial = None
         self.running = False
+        # Commands queued by write_to_serial() and written by run(), oldest first
+        self.tx_queue = deque()
+        self.tx_lock = threading.Lock()
+        self.tx_written = 0
+        self.tx_coalesced = 0
 
     def run(self):
         try:
-            self.serial = serial.Serial('COM12', 921600)
+            batch_interval = self.batch_interval_ms / 1000
+            timeout = min(self.read_timeout, batch_interval) if batch_interval > 0 else self.read_timeout
+            self.serial = serial.Serial(self.port, self.baudrate, timeout=timeout)
             print("Serial connection status: Open")
             self.running = True
+            self.parser = parser = FrameParser(self.binary, debug=self.debug)
+            if self.binary:
+                self.serial.write(telemetry_format_command(True).encode('latin-1'))
+            batch = []
+            batch_deadline = time.monotonic() + batch_interval
+            # Monotonic ns at which the oldest frame of the batch was read and decoded
+            batch_read_ns = batch_decoded_ns = 0
             while self.running:
-                if self.serial.in_waiting > 0:
-                    line = self.serial.readline().decode('latin-1').strip()
-                    print('Debug serial class - data received: ', line)
-                    if line.startswith("{") and line.endswith("}"):
-                        data = json.loads(line)
-                        self.data_received.emit(data)
+                # Block until at least one byte arrives (or the timeout expires),
+                # then take everything already buffered in the same call.
+                chunk = self.serial.read(max(1, self.serial.in_waiting))
+                self.flush_tx()
+                latency = self.latency
+                if latency is not None and chunk:
+                    read_ns = time.monotonic_ns()
+                frames, blocks = parser.feed(chunk)
+                if blocks and batch_interval <= 0:
+                    # data_received carries one dict per frame
+                    for block in blocks:
+                        frames.extend(records_to_frames(block))
+                    blocks = []
+                if frames or blocks:
+                    if latency is not None:
+                        decoded_ns = time.monotonic_ns()
+                        latency.record("read->decode", read_ns, decoded_ns)
+                    if self.recorder is not None:
+                        for data in frames:
+                            self.recorder.record(data)
+                        for block in blocks:
+                            for data in records_to_frames(block):
+                                self.recorder.record(data)
+                    if batch_interval > 0:
+                        if latency is not None and not batch:
+                            batch_read_ns, batch_decoded_ns = read_ns, decoded_ns
+                        batch.extend(frames)
+                        batch.extend(blocks)
+                    else:
+                        for data in frames:
+                            if latency is not None:
+                                self.record_emit(latency, read_ns, decoded_ns)
+                            self.data_received.emit(data)
+                if batch_interval > 0 and time.monotonic() >= batch_deadline:
+                    if batch:
+                        if latency is not None:
+                            self.record_emit(latency, batch_read_ns, batch_decoded_ns)
+                        self.batch_received.emit(batch)
+                        batch = []
+                    batch_deadline = time.monotonic() + batch_interval
+            if batch:
+                if self.latency is not None:
+                    self.record_emit(self.latency, batch_read_ns, batch_decoded_ns)
+                self.batch_received.emit(batch)
+            self.flush_tx()
+            if self.binary:
+                self.serial.write(telemetry_format_command(False).encode('latin-1'))
         except serial.SerialException as e:
             print(f"Serial connection error: {e}")
         finally:
             if self.serial:
                 self.serial.close()
                 print("Serial connection status: Closed")
-    
-    def write_to_serial(self, data):
+
+    def record_emit(self, latency, read_ns, decoded_ns):
         """
-        Method to write a string to the serial line.
+        Times the decode->emit stage and queues the read/emit timestamps for the GUI slot.
+        """
+        emit_ns = time.monotonic_ns()
+        latency.record("decode->emit", decoded_ns, emit_ns)
+        latency.stamp(read_ns, emit_ns)
+
+    def write_to_serial(self, data, key=None):
+        """
+        Method to queue a string for writing to the serial line.
+
+        The string is encoded here and written by the serial thread, so the caller
+        never waits for the port. Commands are written in the order they are queued.
 
         Parameters:
-            data (str): The string to write to the serial line.
+            data (str): The string to write to the serial line; None is ignored.
+            key (str): Commands sharing a key supersede each other: when the last
+                queued command, not written yet, has the same key, this one replaces
+                it. A command queued after it keeps the earlier one, so the order of
+                the commands is never changed. None for commands that must all be sent.
         """
+        if data is None:
+            # JSONHandler.command() had nothing to send
+            return
         if self.serial and self.serial.is_open:
-            try:
-                self.serial.write(data.encode('latin-1'))
-                print("Debug serial class - Data written to serial:", data)
-            except Exception as e:
-                print("Error writing to serial:", e)
+            payload = data.encode('latin-1')
+            with self.tx_lock:
+                if key is not None and self.tx_queue and self.tx_queue[-1][0] == key:
+                    self.tx_queue[-1] = (key, payload)
+                    self.tx_coalesced += 1
+                else:
+                    self.tx_queue.append((key, payload))
+            # Wake the serial thread from its blocking read
+            self.serial.cancel_read()
         else:
             print("Serial port is not open.")
             QMessageBox.critical(None, "Serial Port Error", "Serial port is not open.")
 
+    def flush_tx(self):
+        """
+        Write the queued commands in one call. Runs in the serial thread.
+        """
+        with self.tx_lock:
+            if not self.tx_queue:
+                return
+            items = self.tx_queue
+            self.tx_queue = deque()
+        try:
+            self.serial.write(b"".join(payload for key, payload in items))
+        except serial.SerialException as e:
+            print("Error writing to serial:", e)
+            self.write_failed.emit(str(e))
+            return
+        self.tx_written += len(items)
+        if self.debug:
+            for key, payload in items:
+                print("Debug serial class - Data written to serial:", payload.decode('latin-1'))
+
     def stop(self):
-        self.running = False
\ No newline at end of file
+        self.running = False
@@ -0,0 +1,139 @@
+from PySide6.QtWidgets import QAbstractButton
+from MessageSchema import SCHEMAS
+import time
+
+class SettingsBinding:
+    """
+    Maps the widgets of a settings tab to the keys of one command section.
+
+    Each widget is bound once to a JSON key (and array index); the store column
+    it is read from follows from the message schema. read() fills all widgets
+    from one lookup of the latest read-back and only sets, with its signals
+    blocked, each widget not already showing the value; write() copies them
+    into the command dict.
+
+    The tab's updates are not suspended around read(): Qt already merges the
+    repaints of the changed widgets into one paint pass, and re-enabling updates
+    would repaint the whole tab instead (about twice the cost, see
+    `python benchmark.py settings`).
+    """
+    def __init__(self, section, command):
+        """
+        Parameters:
+            section (str): Message type, e.g. "Control settings".
+            command (dict): The json_to_send_* dict the section is written to.
+        """
+        self.section = section
+        self.command = command
+        self.columns = {key: columns for key, columns, dtype in SCHEMAS[section].fields}
+        self.positions = {column: position for position, (column, dtype) in enumerate(SCHEMAS[section].dtype)}
+        # (widget, json key, array index or None, store column)
+        self.bindings = []
+        # (widget, position in the store row, is a check box), for read()
+        self.targets = []
+        # Per spin box, the read-back value read() last set and the value the widget then showed
+        self.shown = []
+        self.last_sync = {}
+
+    def bind(self, widget, key, index=None):
+        """
+        Bind a spin box or check box to a key of the section.
+
+        Parameters:
+            widget (QDoubleSpinBox or QCheckBox): The widget.
+            key (str): JSON key, e.g. "prefilterNumerator".
+            index (int): Position in the key's array; None for scalar keys.
+        """
+        columns = self.columns[key]
+        column = columns if index is None else columns[index]
+        self.bindings.append((widget, key, index, column))
+        self.targets.append((widget, self.positions[column], isinstance(widget, QAbstractButton)))
+        self.shown.append(None)
+        return widget
+
+    def read(self, store):
+        """
+        Show the latest read-back of the section.
+
+        Parameters:
+            store (TelemetryStore): The section's store.
+
+        Returns:
+            bool: False when nothing has been read back yet.
+        """
+        if store.count == 0:
+            return False
+        start = time.perf_counter()
+        values = store.latest_row().tolist()
+        changed = 0
+        shown = self.shown
+        for i, (widget, position, button) in enumerate(self.targets):
+            value = values[position]
+            if button:
+                value = value == 1
+                if widget.isChecked() != value:
+                    blocked = widget.blockSignals(True)
+                    widget.setChecked(value)
+                    widget.blockSignals(blocked)
+                    changed += 1
+                continue
+            # The spin box rounds and clamps, so compare with what it showed for
+            # this read-back last time; a value edited since then is set again
+            current = widget.value()
+            if shown[i] == (value, current):
+                continue
+            blocked = widget.blockSignals(True)
+            widget.setValue(value)
+            widget.blockSignals(blocked)
+            shown[i] = (value, widget.value())
+            if shown[i][1] != current:
+                changed += 1
+        self.last_sync["read_ms"] = (time.perf_counter() - start) * 1000
+        self.last_sync["changed"] = changed
+        return True
+
+    def show(self, body):
+        """
+        Set the widgets from a body of the section, e.g. one restored from a snapshot.
+
+        Parameters:
+            body (dict): {key: value} in the layout of the command dict.
+        """
+        for widget, key, index, column in self.bindings:
+            if key not in body:
+                continue
+            value = body[key] if index is None else body[key][index]
+            blocked = widget.blockSignals(True)
+            if isinstance(widget, QAbstractButton):
+                widget.setChecked(value == 1)
+            else:
+                widget.setValue(float(value))
+            widget.blockSignals(blocked)
+
+    def write(self):
+        """
+        Copy the widget values into the command dict.
+        """
+        start = time.perf_counter()
+        body = self.command[self.section]
+        for widget, key, index, column in self.bindings:
+            if isinstance(widget, QAbstractButton):
+                value = 1 if widget.isChecked() else 0
+            else:
+                value = widget.value()
+            if index is None:
+                body[key] = value
+            else:
+                body[key][index] = value
+        self.last_sync["write_ms"] = (time.perf_counter() - start) * 1000
+
+    def status(self):
+        """
+        Text describing the last synchronisation, for the tab.
+        """
+        parts = []
+        if "read_ms" in self.last_sync:
+            parts.append(f"read {self.last_sync['read_ms']:.2f} ms ({self.last_sync['changed']} changed)")
+        if "write_ms" in self.last_sync:
+            parts.append(f"write {self.last_sync['write_ms']:.2f} ms")
+        return f"{len(self.bindings)} settings synchronised: " + ", ".join(parts) if parts else ""
@@ -0,0 +1,265 @@
+"""
+Simulated motion controller on a Linux pseudo terminal.
+
+Run it standalone and point the GUI at the printed port:
+    python Simulator.py --rate 1000
+    python main.py --port /dev/pts/N
+"""
+import argparse
+import json
+import math
+import os
+import random
+import threading
+import time
+from Serial import LineSplitter
+from BinaryFraming import encode_frame
+from MessageSchema import SCHEMAS
+
+# JSON keys of the "Controls" values, in binary record order
+CONTROLS_KEYS = [key for key, columns, dtype in SCHEMAS["Controls"].fields]
+
+class ControllerSimulator:
+    """
+    Emulates the controller firmware over a pty pair.
+
+    It streams "Controls" telemetry at a configurable rate and answers the
+    "Controls", "General settings", "Control settings" and "Expert procedures"
+    commands the GUI sends. Every telemetry frame carries an extra "simTime"
+    key (time.monotonic() when it was written), which the GUI ignores and
+    benchmarks use to measure latency.
+
+    After a {"Telemetry format": {"Binary": 1}} command the telemetry is sent as
+    binary frames (see BinaryFraming) instead, without "simTime".
+    """
+    def __init__(self, rate_hz=1000.0, logging_samples=10000):
+        """
+        Parameters:
+            rate_hz (float): Telemetry frames per second.
+            logging_samples (int): Yaw/voltage sample pairs sent per "Logging" burst.
+        """
+        self.rate_hz = rate_hz
+        self.logging_samples = logging_samples
+        self.master_fd = None
+        self.slave_fd = None
+        self.port = None
+        self.running = False
+        self.threads = []
+        self.write_lock = threading.Lock()
+        self.frames_sent = 0
+        self.commands_received = 0
+        self.binary = False
+        # --- controller state --- #
+        self.mode = 0
+        self.setpoint = 0.0
+        self.moving = False
+        self.yaw_angle = 0.0
+        self.warning_level = 0
+        self.ramp = None
+        self.profile = None
+        self.general_settings = {
+            "yawOffset": 0.0, "AAROffset": 0.0, "controlInstabilityProtection": 1,
+            "minVoltage": -10.0, "maxVoltage": 10.0, "openLoopMaxSpeed": 1.0,
+            "closedLoopMaxSpeed": 10.0, "minPIDLimit": -5.0, "maxPIDLimit": 5.0,
+        }
+        self.control_settings = {
+            "prefilterNumerator": [1.0, 0.0, 0.0, 0.0], "prefilterDenominator": [1.0, 0.0],
+            "filter1Numerator": [1.0, 0.0, 0.0, 0.0], "filter1Denominator": [1.0, 0.0],
+            "filter2Numerator": [1.0, 0.0], "filter2Denominator": 1.0,
+            "filter3Numerator": [1.0, 0.0], "filter3Denominator": 1.0,
+            "hysteresisCompensation": 0, "compensationOffset": 0.0,
+            "quadraticParameters": [0.0, 0.0], "fParameters": [0.0, 0.0], "kParameters": [0.0, 0.0],
+        }
+
+    def start(self):
+        """
+        Open the pty pair and start streaming.
+
+        Returns:
+            str: Serial port path to open with SerialThread.
+        """
+        import pty
+        import tty
+        self.master_fd, slave_fd = pty.openpty()
+        tty.setraw(slave_fd)
+        self.port = os.ttyname(slave_fd)
+        self.slave_fd = slave_fd
+        self.running = True
+        self.threads = [
+            threading.Thread(target=self.telemetry_loop, name="SimulatorTelemetry", daemon=True),
+            threading.Thread(target=self.command_loop, name="SimulatorCommands", daemon=True),
+        ]
+        for thread in self.threads:
+            thread.start()
+        self.send({"General settings": self.general_settings})
+        self.send({"Control settings": self.control_settings})
+        return self.port
+
+    def stop(self):
+        self.running = False
+        for thread in self.threads:
+            thread.join(timeout=1)
+        for fd in (self.master_fd, self.slave_fd):
+            if fd is None:
+                continue
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self.master_fd = self.slave_fd = None
+
+    def send(self, message):
+        self.write((json.dumps(message) + "\n").encode("latin-1"))
+
+    def write(self, data):
+        with self.write_lock:
+            view = memoryview(data)
+            while view and self.running:
+                try:
+                    written = os.write(self.master_fd, view)
+                except BlockingIOError:
+                    time.sleep(0.001)
+                    continue
+                except OSError:
+                    return
+                view = view[written:]
+
+    # -- telemetry -- #
+    def telemetry_loop(self):
+        start = time.monotonic()
+        while self.running:
+            now = time.monotonic()
+            due = int((now - start) * self.rate_hz) - self.frames_sent
+            if due > 0:
+                frames = [self.next_frame(now) for _ in range(due)]
+                if self.binary:
+                    rows = [tuple(frame["Controls"][key] for key in CONTROLS_KEYS) for frame in frames]
+                    # Up to 1000 records per frame keeps the payload below the 16 bit length
+                    self.write(b"".join(encode_frame("Controls", rows[i:i + 1000]) for i in range(0, due, 1000)))
+                else:
+                    self.write(("\n".join(json.dumps(frame) for frame in frames) + "\n").encode("latin-1"))
+                self.frames_sent += due
+            time.sleep(0.001)
+
+    def next_frame(self, now):
+        self.step_motion(now)
+        noise = random.gauss(0.0, 0.05)
+        return {
+            "Controls": {
+                "state": self.mode,
+                "yawAngle": round(self.yaw_angle + noise, 6),
+                "warninglevel": self.warning_level,
+                "yawAngleStdDeviation": 0.05,
+                "errorAxis1": 0,
+                "errorAxis2": 0,
+                "simTime": now,
+            }
+        }
+
+    def step_motion(self, now):
+        if self.ramp is not None:
+            start, cycles, rate = self.ramp
+            # Triangle between 0 and 100 urad at `rate` urad/s
+            period = 200.0 / max(abs(rate), 1e-6)
+            phase = (now - start) / period
+            if phase >= cycles:
+                self.ramp = None
+            else:
+                self.yaw_angle = 100.0 * (1 - abs(2 * (phase % 1) - 1))
+        elif self.profile is not None:
+            start, waveform = self.profile
+            self.yaw_angle = 10.0 * (waveform + 1) * math.sin(2 * math.pi * (now - start))
+        elif self.moving:
+            self.yaw_angle += (self.setpoint - self.yaw_angle) * 0.01
+
+    # -- commands -- #
+    def command_loop(self):
+        import select
+        splitter = LineSplitter()
+        fd = self.master_fd
+        while self.running:
+            try:
+                readable, _, _ = select.select([fd], [], [], 0.05)
+                if not readable:
+                    continue
+                data = os.read(fd, 65536)
+            except (OSError, ValueError):
+                # stop() closed the pty
+                return
+            # Commands are written without separators, so split on "}{" as well as newlines
+            for line in splitter.feed(data.replace(b"}{", b"}\n{")):
+                self.handle_command(line)
+            # The last command has no terminator; handle it once it parses as a whole
+            if splitter.remainder.endswith(b"}") and self.handle_command(splitter.remainder, quiet=True):
+                splitter.remainder = b""
+
+    def handle_command(self, line, quiet=False):
+        """
+        Apply one JSON command.
+
+        Returns:
+            bool: False when the line is not valid JSON.
+        """
+        try:
+            command = json.loads(line)
+        except json.JSONDecodeError:
+            if not quiet:
+                print("Simulator - invalid command:", line)
+            return False
+        self.commands_received += 1
+        section, values = next(iter(command.items()))
+        if section == "Controls":
+            if isinstance(values.get("Mode"), int):
+                self.mode = values["Mode"]
+            if values.get("StartM") == 1:
+                self.setpoint = float(values.get("SP (V/urad)", self.setpoint))
+                self.moving = True
+            if values.get("StopM") == 1:
+                self.moving = False
+            if values.get("Re contr prot") == 1:
+                self.warning_level = 0
+        elif section == "General settings" and values.get("Write general settings") == 1:
+            self.general_settings.update({key: values[key] for key in self.general_settings if key in values})
+            self.send({"General settings": self.general_settings})
+        elif section == "Control settings" and values.get("Write control settings") == 1:
+            self.control_settings.update({key: values[key] for key in self.control_settings if key in values})
+            self.send({"Control settings": self.control_settings})
+        elif section == "Expert procedures":
+            now = time.monotonic()
+            if values.get("Profile motion Start") == 1:
+                self.profile = (now, values.get("waveformID", 0))
+            if values.get("Profile motion Stop") == 1:
+                self.profile = None
+            if values.get("Ramp cycles motion Start") == 1:
+                self.ramp = (now, values.get("numberCycles", 1), values.get("rampRate", 10.0))
+            if values.get("Ramp cycles motion Stop") == 1:
+                self.ramp = None
+            if values.get("Logging") == 1:
+                self.send_logging_burst()
+        elif section == "Telemetry format":
+            self.binary = values.get("Binary") == 1
+        return True
+
+    def send_logging_burst(self):
+        samples = []
+        for i in range(self.logging_samples):
+            samples.append(round(self.yaw_angle + math.sin(i / 50.0), 6))
+            samples.append(round(math.cos(i / 50.0), 6))
+        self.send({"Logging": samples})
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulated motion controller on a pty")
+    parser.add_argument("--rate", type=float, default=1000.0, help="telemetry frames per second")
+    parser.add_argument("--logging-samples", type=int, default=10000, help="sample pairs per Logging burst")
+    args = parser.parse_args()
+    simulator = ControllerSimulator(args.rate, args.logging_samples)
+    port = simulator.start()
+    print(f"Simulated controller on {port} at {args.rate:g} frames/s (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        simulator.stop()
+
+if __name__ == "__main__":
+    main()
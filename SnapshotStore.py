@@ -0,0 +1,184 @@
+from datetime import datetime
+import json
+import sqlite3
+import time
+
+# Sections loaded back into their tabs by a restore. "Controls" and
+# "Expert procedures" hold motion and logging pulses, so they are only kept
+# for reference and diffs.
+RESTORED_SECTIONS = ["General settings", "Control settings"]
+# Sections a restore also writes to the controller. The Control settings tab
+# does not send its settings either, so they are only loaded.
+WRITTEN_SECTIONS = ["General settings"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    tag TEXT NOT NULL DEFAULT '',
+    note TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS snapshots_created ON snapshots (created);
+CREATE INDEX IF NOT EXISTS snapshots_tag ON snapshots (tag, created);
+CREATE TABLE IF NOT EXISTS snapshot_values (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots (id) ON DELETE CASCADE,
+    section TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (snapshot_id, section, key)
+) WITHOUT ROWID;
+"""
+
+class SnapshotStore:
+    """
+    Settings snapshots in a local SQLite file.
+
+    A snapshot holds the json_to_send_* sections, one row per JSON key with
+    the value stored as JSON. Snapshots are indexed by time and tag, and
+    loading or diffing one only reads its own rows through the primary key, so
+    both stay fast however many snapshots the file holds.
+    """
+    def __init__(self, path="settings_snapshots.sqlite"):
+        """
+        Parameters:
+            path (str): Database file; created if missing. ":memory:" keeps it in memory.
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        if path != ":memory:":
+            self.connection.execute("PRAGMA journal_mode = WAL")
+            self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def save(self, sections, tag="", note="", created=None):
+        """
+        Store a snapshot.
+
+        Parameters:
+            sections (list): json_to_send_* dicts, each {section name: {key: value}}.
+            tag (str): Free text used to find the snapshot again, e.g. "axis 2 tuned".
+            note (str): Longer description.
+            created (float): Seconds since the epoch; now when None.
+
+        Returns:
+            int: Id of the new snapshot.
+        """
+        rows = []
+        for message in sections:
+            for section, body in message.items():
+                rows.extend((section, key, json.dumps(value)) for key, value in body.items())
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO snapshots (created, tag, note) VALUES (?, ?, ?)",
+                (time.time() if created is None else created, tag, note))
+            snapshot_id = cursor.lastrowid
+            self.connection.executemany(
+                "INSERT INTO snapshot_values (snapshot_id, section, key, value) VALUES (?, ?, ?, ?)",
+                [(snapshot_id,) + row for row in rows])
+        return snapshot_id
+
+    def list(self, tag=None, limit=200, before=None):
+        """
+        Return the most recent snapshots, newest first.
+
+        Parameters:
+            tag (str): Only snapshots with this tag; all when None or empty.
+            limit (int): Maximum number of snapshots returned.
+            before (float): Only snapshots created before this time, to page back.
+
+        Returns:
+            list: (id, created, tag, note) tuples.
+        """
+        query = "SELECT id, created, tag, note FROM snapshots"
+        conditions, parameters = [], []
+        if tag:
+            conditions.append("tag = ?")
+            parameters.append(tag)
+        if before is not None:
+            conditions.append("created < ?")
+            parameters.append(before)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY created DESC LIMIT ?"
+        return self.connection.execute(query, parameters + [limit]).fetchall()
+
+    def count(self):
+        return self.connection.execute("SELECT count(*) FROM snapshots").fetchone()[0]
+
+    def load(self, snapshot_id):
+        """
+        Return the sections of a snapshot.
+
+        Returns:
+            dict: {section name: {key: value}}, the layout of the json_to_send_* dicts.
+
+        Raises:
+            KeyError: No snapshot with this id.
+        """
+        sections = {}
+        for section, key, value in self.connection.execute(
+                "SELECT section, key, value FROM snapshot_values WHERE snapshot_id = ?", (snapshot_id,)):
+            sections.setdefault(section, {})[key] = json.loads(value)
+        if not sections and not self.exists(snapshot_id):
+            raise KeyError(f"No snapshot {snapshot_id}")
+        return sections
+
+    def exists(self, snapshot_id):
+        return self.connection.execute("SELECT 1 FROM snapshots WHERE id = ?", (snapshot_id,)).fetchone() is not None
+
+    def diff(self, first_id, second_id):
+        """
+        Compare two snapshots key by key.
+
+        Returns:
+            list: (section, key, first value, second value) for every key whose
+            value differs or that only one snapshot has (its other value is None).
+        """
+        rows = self.connection.execute("""
+            SELECT a.section, a.key, a.value, b.value FROM snapshot_values a
+            LEFT JOIN snapshot_values b ON b.snapshot_id = ? AND b.section = a.section AND b.key = a.key
+            WHERE a.snapshot_id = ? AND b.value IS NOT a.value
+            UNION ALL
+            SELECT b.section, b.key, NULL, b.value FROM snapshot_values b
+            WHERE b.snapshot_id = ? AND NOT EXISTS (
+                SELECT 1 FROM snapshot_values a
+                WHERE a.snapshot_id = ? AND a.section = b.section AND a.key = b.key)
+            ORDER BY 1, 2
+            """, (second_id, first_id, second_id, first_id)).fetchall()
+        differences = []
+        for section, key, a, b in rows:
+            a = None if a is None else json.loads(a)
+            b = None if b is None else json.loads(b)
+            # The text differs but not the value, e.g. 0 and 0.0
+            if a is None or b is None or a != b:
+                differences.append((section, key, a, b))
+        return differences
+
+    def delete(self, snapshot_id):
+        with self.connection:
+            self.connection.execute("DELETE FROM snapshots WHERE id = ?", (snapshot_id,))
+
+    def export(self, snapshot_id, path):
+        """
+        Write one snapshot as an indented JSON file.
+
+        Raises:
+            KeyError: No snapshot with this id.
+        """
+        row = self.connection.execute(
+            "SELECT id, created, tag, note FROM snapshots WHERE id = ?", (snapshot_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"No snapshot {snapshot_id}")
+        snapshot_id, created, tag, note = row
+        with open(path, "w") as json_file:
+            json.dump({
+                "id": snapshot_id,
+                "created": datetime.fromtimestamp(created).isoformat(),
+                "tag": tag,
+                "note": note,
+                "sections": self.load(snapshot_id),
+            }, json_file, indent=4)
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,170 @@
+from datetime import datetime
+import gzip
+import json
+import os
+import queue
+import struct
+import threading
+import time
+
+# Binary record header: payload length (uint32) and timestamp (float64, seconds since the epoch)
+RECORD_HEADER = struct.Struct("<Id")
+
+class TelemetryRecorder:
+    """
+    Appends every decoded frame to rotating capture files.
+
+    record() never blocks the caller: frames go through a bounded queue to a
+    dedicated writer thread, and frames that do not fit are dropped and counted.
+
+    Two formats are supported:
+        "ndjson": one {"t": timestamp, "frame": {...}} JSON object per line.
+        "binary": RECORD_HEADER followed by the compact JSON frame, per record.
+    """
+    FORMATS = {"ndjson": ".ndjson", "binary": ".bin"}
+
+    def __init__(self, directory="recordings", file_format="binary", compress=False,
+                 max_file_bytes=64 * 1024 * 1024, queue_size=10000):
+        """
+        Parameters:
+            directory (str): Folder the capture files are written to; created if missing.
+            file_format (str): "ndjson" or "binary".
+            compress (bool): Write gzip compressed files.
+            max_file_bytes (int): Start a new file once the current one reaches this many
+                (uncompressed) bytes.
+            queue_size (int): Frames that may wait for the writer before new ones are dropped.
+        """
+        if file_format not in self.FORMATS:
+            raise ValueError(f"Unknown recording format '{file_format}', expected one of {', '.join(self.FORMATS)}")
+        self.directory = directory
+        self.file_format = file_format
+        self.compress = compress
+        self.max_file_bytes = max_file_bytes
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.thread = None
+        self.file = None
+        self.file_bytes = 0
+        self.sequence = 0
+        self.paths = []
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        # Number of separate episodes in which the queue was full
+        self.full_events = 0
+        self.queue_full = False
+        self.high_water = 0
+        self.bytes_written = 0
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self.run, name="TelemetryRecorder", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """
+        Write the frames still queued, close the file and end the writer thread.
+        """
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def record(self, frame, timestamp=None):
+        """
+        Queue a decoded frame for writing without blocking.
+
+        Parameters:
+            frame (dict): The decoded JSON frame.
+            timestamp (float): Arrival time in seconds since the epoch; now when None.
+
+        Returns:
+            bool: False when the queue was full and the frame was dropped.
+        """
+        self.recorded += 1
+        try:
+            self.queue.put_nowait((time.time() if timestamp is None else timestamp, frame))
+        except queue.Full:
+            self.dropped += 1
+            if not self.queue_full:
+                self.queue_full = True
+                self.full_events += 1
+            return False
+        self.queue_full = False
+        depth = self.queue.qsize()
+        if depth > self.high_water:
+            self.high_water = depth
+        return True
+
+    def stats(self):
+        """
+        Return the recorder counters.
+
+        Returns:
+            dict: recorded, written and dropped frame counts, number of queue-full
+            episodes, queue depth, high-water mark and capacity, bytes written and
+            files created.
+        """
+        return {
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "full_events": self.full_events,
+            "queue_depth": self.queue.qsize(),
+            "queue_high_water": self.high_water,
+            "queue_capacity": self.queue.maxsize,
+            "bytes_written": self.bytes_written,
+            "files": len(self.paths),
+        }
+
+    def run(self):
+        try:
+            while True:
+                item = self.queue.get()
+                items = [item]
+                # Drain what is already queued so each write() call covers many frames
+                while item is not None and len(items) < 1024:
+                    try:
+                        item = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    items.append(item)
+                stop = items[-1] is None
+                if stop:
+                    items.pop()
+                if items:
+                    self.write(items)
+                if stop:
+                    break
+        finally:
+            self.close_file()
+
+    def encode(self, timestamp, frame):
+        if self.file_format == "ndjson":
+            return (json.dumps({"t": timestamp, "frame": frame}, separators=(",", ":")) + "\n").encode("utf-8")
+        payload = json.dumps(frame, separators=(",", ":")).encode("utf-8")
+        return RECORD_HEADER.pack(len(payload), timestamp) + payload
+
+    def write(self, items):
+        data = b"".join(self.encode(timestamp, frame) for timestamp, frame in items)
+        if self.file is None or self.file_bytes >= self.max_file_bytes:
+            self.open_file()
+        self.file.write(data)
+        self.file_bytes += len(data)
+        self.bytes_written += len(data)
+        self.written += len(items)
+
+    def open_file(self):
+        self.close_file()
+        os.makedirs(self.directory, exist_ok=True)
+        current_datetime = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        extension = self.FORMATS[self.file_format] + (".gz" if self.compress else "")
+        path = os.path.join(self.directory, f"Telemetry_{current_datetime}_{self.sequence:04d}{extension}")
+        self.sequence += 1
+        self.file = gzip.open(path, "wb", compresslevel=1) if self.compress else open(path, "wb")
+        self.file_bytes = 0
+        self.paths.append(path)
+
+    def close_file(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
@@ -0,0 +1,115 @@
+import numpy as np
+
+class TelemetryStore:
+    """
+    Fixed-capacity column store backed by a preallocated NumPy structured array.
+
+    Rows are written in a ring: once the capacity is reached the oldest rows are
+    overwritten, so memory use never grows after construction.
+    """
+    def __init__(self, fields, capacity=100000):
+        """
+        Parameters:
+            fields (list): (name, dtype) pairs, one per column.
+            capacity (int): Maximum number of rows kept.
+        """
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.data = np.zeros(capacity, dtype=np.dtype(fields))
+        self.count = 0
+
+    @property
+    def fields(self):
+        return self.data.dtype.names
+
+    @property
+    def nbytes(self):
+        """
+        Memory used by the preallocated rows, in bytes.
+        """
+        return self.data.nbytes
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, row):
+        """
+        Write one row.
+
+        Parameters:
+            row (tuple): One value per column, in column order.
+        """
+        self.data[self.count % self.capacity] = row
+        self.count += 1
+
+    def extend(self, rows):
+        """
+        Write several rows at once.
+
+        Parameters:
+            rows: Structured array with this store's columns, or a sequence of row tuples.
+        """
+        if not (isinstance(rows, np.ndarray) and rows.dtype == self.data.dtype):
+            rows = np.array(rows, dtype=self.data.dtype)
+        n = len(rows)
+        if n == 0:
+            return
+        if n >= self.capacity:
+            rows = rows[n - self.capacity:]
+            self.count += n - self.capacity
+            n = self.capacity
+        start = self.count % self.capacity
+        first = min(n, self.capacity - start)
+        self.data[start:start + first] = rows[:first]
+        self.data[:n - first] = rows[first:]
+        self.count += n
+
+    def latest(self, field):
+        """
+        Return the most recent value of a column.
+
+        Parameters:
+            field (str): Column name.
+
+        Raises:
+            IndexError: If no row has been written yet.
+        """
+        if self.count == 0:
+            raise IndexError(f"no data for '{field}'")
+        return self.data[field][(self.count - 1) % self.capacity]
+
+    def latest_row(self):
+        """
+        Return a copy of the most recent row, indexable by column name.
+
+        Raises:
+            IndexError: If no row has been written yet.
+        """
+        if self.count == 0:
+            raise IndexError("no rows written")
+        return self.data[(self.count - 1) % self.capacity].copy()
+
+    def window(self, field, n=None):
+        """
+        Return the last n values of a column, oldest first.
+
+        Parameters:
+            field (str): Column name.
+            n (int): Number of values; all stored values when None.
+
+        Returns:
+            numpy.ndarray: A copy of the requested values.
+        """
+        size = len(self)
+        n = size if n is None else min(n, size)
+        column = self.data[field]
+        end = self.count % self.capacity
+        if end == 0:
+            end = size
+        if n <= end:
+            return column[end - n:end].copy()
+        return np.concatenate((column[self.capacity - (n - end):], column[:end]))
+
+    def clear(self):
+        self.count = 0
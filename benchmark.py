@@ -0,0 +1,1135 @@
+"""
+Benchmarks for the telemetry pipeline.
+
+Run all benchmarks:
+    python benchmark.py
+
+Run selected benchmarks:
+    python benchmark.py ingest
+
+Save the results and compare them with an earlier run:
+    python benchmark.py --output before.json
+    python benchmark.py --output after.json --compare before.json
+
+Check the cold start time against its budget, relative to an earlier run on the
+same machine (exits with 1 when over):
+    python benchmark.py startup --output startup.json
+    python benchmark.py startup --compare startup.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from JSONHandler import JSONHandler
+
+CONTROLS_FRAME = {
+    "Controls": {
+        "state": 2,
+        "yawAngle": 12.345678,
+        "warninglevel": 0,
+        "yawAngleStdDeviation": 0.0421,
+        "errorAxis1": 0,
+        "errorAxis2": 0
+    }
+}
+
+GENERAL_SETTINGS_FRAME = {
+    "General settings": {
+        "yawOffset": 1.5,
+        "AAROffset": -0.25,
+        "controlInstabilityProtection": 1,
+        "minVoltage": -10.0,
+        "maxVoltage": 10.0,
+        "openLoopMaxSpeed": 2.0,
+        "closedLoopMaxSpeed": 50.0,
+        "minPIDLimit": -5.0,
+        "maxPIDLimit": 5.0
+    }
+}
+
+CONTROL_SETTINGS_FRAME = {
+    "Control settings": {
+        "prefilterNumerator": [0.1, 0.2, 0.3, 0.4],
+        "prefilterDenominator": [1.0, -0.5],
+        "filter1Numerator": [0.5, 0.25, 0.125, 0.0625],
+        "filter1Denominator": [1.0, -0.25],
+        "filter2Numerator": [0.3, 0.7],
+        "filter2Denominator": 1.0,
+        "filter3Numerator": [0.6, 0.4],
+        "filter3Denominator": 1.0,
+        "hysteresisCompensation": 1,
+        "compensationOffset": 0.05,
+        "quadraticParameters": [0.001, 0.02],
+        "fParameters": [1.1, 2.2],
+        "kParameters": [3.3, 4.4]
+    }
+}
+
+SAMPLE_FRAMES = {
+    "Controls": CONTROLS_FRAME,
+    "General settings": GENERAL_SETTINGS_FRAME,
+    "Control settings": CONTROL_SETTINGS_FRAME,
+}
+
+BENCHMARKS = {}
+
+# Metrics recorded by the benchmarks of the current run, see record()
+RESULTS = {}
+
+# Slowdown allowed against the --compare baseline for these metrics, instead of --threshold.
+# Cold starts vary more from run to run than the other metrics; times depend on the
+# machine, so budgets are only checked against a baseline recorded on the same one.
+BUDGETS = {
+    "startup.import_ms": 0.5,
+    "startup.window_ms": 0.5,
+}
+
+
+def benchmark(name):
+    """
+    Register a benchmark function under the given name.
+    """
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def record(metric, value, unit, higher_is_better=True):
+    """
+    Keep a metric for the JSON results file.
+
+    Parameters:
+        metric (str): Name, "<benchmark>.<measurement>"; stable across commits so runs can be compared.
+        value (float): Measured value.
+        unit (str): Unit shown in comparisons.
+        higher_is_better (bool): False for times and sizes.
+    """
+    RESULTS[metric] = {"value": float(value), "unit": unit, "higher_is_better": higher_is_better}
+
+
+def frames_per_second(func, frames, repeat=3):
+    """
+    Call func once per frame and return the best rate over several runs.
+
+    Parameters:
+        func (callable): Function taking one frame.
+        frames (list): Frames to feed to func.
+        repeat (int): Number of runs.
+
+    Returns:
+        float: Frames per second of the fastest run.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for frame in frames:
+            func(frame)
+        best = min(best, time.perf_counter() - start)
+    return len(frames) / best
+
+
+@benchmark("ingest")
+def benchmark_ingest(n_frames=100000):
+    """
+    Compare the old str()/parse_json_string() round trip with ingest().
+    """
+    frames = [CONTROLS_FRAME] * n_frames
+    handler = JSONHandler()
+    before = frames_per_second(lambda frame: handler.parse_json_string(str(frame)), frames)
+    handler = JSONHandler()
+    after = frames_per_second(handler.ingest, frames)
+    print(f"ingest: parse_json_string(str(frame)) {before:12.0f} frames/s")
+    print(f"ingest: ingest(frame)                 {after:12.0f} frames/s  ({after / before:.1f}x)")
+    record("ingest.parse_json_string", before, "frames/s")
+    record("ingest.ingest", after, "frames/s")
+
+
+@benchmark("framing")
+def benchmark_framing(n_frames=200000, chunk_size=4096, corrupt_every=100):
+    """
+    Measure FrameParser line framing, JSON decoding and schema checks on an
+    in-memory byte stream: clean, and with one frame in corrupt_every garbled
+    (bytes dropped, flipped or a bad value), which the parser must skip and count.
+    """
+    from Serial import FrameParser
+    line = (json.dumps(CONTROLS_FRAME) + "\n").encode("latin-1")
+    corruptions = [
+        line[:22] + line[29:],                              # bytes lost: invalid JSON
+        line[:-1],                                          # newline lost: two frames on one line
+        b"\xff\x00" + line,                                 # noise before the frame
+        line.replace(b'"yawAngle"', b'"yawAngel"'),         # misspelt key: schema error
+    ]
+    clean = line * n_frames
+    corrupted = b"".join(corruptions[i // corrupt_every % len(corruptions)] if i % corrupt_every == 0 else line
+                         for i in range(n_frames))
+    for name, stream in (("clean", clean), ("corrupted", corrupted)):
+        chunks = [stream[i:i + chunk_size] for i in range(0, len(stream), chunk_size)]
+        best = float("inf")
+        for _ in range(3):
+            parser = FrameParser()
+            decoded = 0
+            start = time.perf_counter()
+            for chunk in chunks:
+                decoded += len(parser.feed(chunk)[0])
+            best = min(best, time.perf_counter() - start)
+        errors = sum(parser.errors.values())
+        print(f"framing: {name:9s} {chunk_size} byte chunks  {n_frames / best:10.0f} frames/s  {len(stream) / best / 1e6:6.1f} MB/s  "
+              f"{decoded} frames, errors {parser.errors}")
+        record(f"framing.{name}", n_frames / best, "frames/s")
+
+
+@benchmark("binary_framing")
+def benchmark_binary_framing(n_frames=200000, records_per_frame=20, chunk_size=4096, baudrate=921600):
+    """
+    Compare JSON lines with binary frames: wire size, decode rate and ingest rate.
+    """
+    from BinaryFraming import encode_frame
+    from Serial import FrameParser
+    values = CONTROLS_FRAME["Controls"]
+    rows = [tuple(values.values())] * records_per_frame
+    binary = b"".join(encode_frame("Controls", rows) for _ in range(n_frames // records_per_frame))
+    text = (json.dumps(CONTROLS_FRAME) + "\n").encode("latin-1") * n_frames
+    for name, stream in (("json", text), ("binary", binary)):
+        chunks = [stream[i:i + chunk_size] for i in range(0, len(stream), chunk_size)]
+        parser = FrameParser(binary=name == "binary")
+        handler = JSONHandler()
+        batch = []
+        start = time.perf_counter()
+        for chunk in chunks:
+            frames, blocks = parser.feed(chunk)
+            batch.extend(frames)
+            batch.extend(blocks)
+        decode_s = time.perf_counter() - start
+        start = time.perf_counter()
+        handler.ingest_batch(batch)
+        ingest_s = time.perf_counter() - start
+        assert handler.controls_store.count == n_frames
+        bytes_per_frame = len(stream) / n_frames
+        # 10 bits per byte on the wire (start, 8 data, stop)
+        line_rate = baudrate / 10 / bytes_per_frame
+        print(f"binary_framing: {name:6s} {bytes_per_frame:6.1f} bytes/frame ({line_rate:7.0f} frames/s at {baudrate} baud)  "
+              f"decode {n_frames / decode_s:10.0f} frames/s  ingest {n_frames / ingest_s:10.0f} frames/s")
+        record(f"binary_framing.{name}_decode", n_frames / decode_s, "frames/s")
+        record(f"binary_framing.{name}_ingest", n_frames / ingest_s, "frames/s")
+
+
+@benchmark("decode")
+def benchmark_decode(n_frames=200000, batch_size=500):
+    """
+    Measure schema decoding per message type, frame by frame and in batches.
+    """
+    for name, frame in SAMPLE_FRAMES.items():
+        handler = JSONHandler()
+        single = frames_per_second(handler.ingest, [frame] * n_frames)
+        batches = [[frame] * batch_size] * (n_frames // batch_size)
+        batched = frames_per_second(handler.ingest_batch, batches) * batch_size
+        text = json.dumps(frame)
+        parsed = frames_per_second(handler.parse_json_string, [text] * (n_frames // 10))
+        print(f"decode: {name:18s} parse_json_string {parsed:10.0f}   ingest {single:10.0f}   "
+              f"ingest_batch {batched:10.0f} frames/s")
+        key = name.lower().replace(" ", "_")
+        record(f"decode.{key}.parse_json_string", parsed, "frames/s")
+        record(f"decode.{key}.ingest", single, "frames/s")
+        record(f"decode.{key}.ingest_batch", batched, "frames/s")
+
+
+@benchmark("store")
+def benchmark_store(n_frames=1000000, capacity=200000):
+    """
+    Ingest more frames than the ring buffer holds and check memory stays bounded.
+    """
+    handler = JSONHandler(capacity=capacity)
+    footprint = handler.memory_footprint()["total"]
+    rate = frames_per_second(handler.ingest, [CONTROLS_FRAME] * n_frames, repeat=1)
+    assert handler.memory_footprint()["total"] == footprint
+    start = time.perf_counter()
+    for _ in range(10000):
+        handler.latest("yaw_angle_list")
+    latest_us = (time.perf_counter() - start) / 10000 * 1e6
+    start = time.perf_counter()
+    for _ in range(1000):
+        handler.window("yaw_angle_list", 1000)
+    window_us = (time.perf_counter() - start) / 1000 * 1e6
+    print(f"store: {n_frames} frames into capacity {capacity}: {rate:.0f} frames/s, footprint {footprint / 1e6:.1f} MB")
+    print(f"store: latest() {latest_us:.2f} us, window(1000) {window_us:.2f} us")
+    record("store.ingest", rate, "frames/s")
+    record("store.latest", latest_us, "us", higher_is_better=False)
+    record("store.window_1000", window_us, "us", higher_is_better=False)
+
+
+@benchmark("logging")
+def benchmark_logging(sizes=(10000, 1000000)):
+    """
+    Measure LoggingWriter export time for each available file format and burst size.
+
+    The first CSV export of a session also imports pandas, which the GUI defers
+    until then; it is timed separately so that it does not skew the first case.
+    """
+    import tempfile
+    from LoggingWriter import LoggingWriter
+    if "pandas" not in sys.modules:
+        start = time.perf_counter()
+        import pandas
+        import_s = time.perf_counter() - start
+        print(f"logging: pandas import {import_s:.3f} s, paid by the first CSV export of a session")
+        record("logging.pandas_import", import_s, "s", higher_is_better=False)
+    with tempfile.TemporaryDirectory() as directory:
+        writer = LoggingWriter(directory)
+        for n_samples in sizes:
+            values = [0.123456789, 1.5] * n_samples
+            for file_format in LoggingWriter.FORMATS:
+                try:
+                    writer.file_format = file_format
+                except ImportError:
+                    print(f"logging: {file_format:8s} skipped (not installed)")
+                    continue
+                result = writer.write(f"{file_format}_{n_samples}", values, file_format)
+                print(f"logging: {file_format:8s} {result['samples']:8d} samples, {result['bytes'] / 1e6:6.1f} MB "
+                      f"in {result['seconds']:.3f} s ({result['mb_per_s']:.1f} MB/s)")
+                record(f"logging.{file_format}_{n_samples}", result["seconds"], "s", higher_is_better=False)
+
+
+@benchmark("logging_offload")
+def benchmark_logging_offload(n_bursts=4, n_samples=1000000, processes=2):
+    """
+    Write several CSV "Logging" bursts with the writer thread and with worker
+    processes, and report the longest stall of a 1 ms GUI timer meanwhile.
+    """
+    import tempfile
+    from PySide6.QtCore import QTimer
+    from LoggingWriter import LoggingWriter
+    app = qt_application()
+    values = [0.123456789, 1.5] * n_samples
+    with tempfile.TemporaryDirectory() as directory:
+        for name, n_processes in (("thread", 0), ("processes", processes)):
+            writer = LoggingWriter(directory, processes=n_processes)
+            results = []
+            writer.write_finished.connect(results.append)
+            # Start the worker processes before the first burst and let them finish starting
+            if writer.pool is not None:
+                writer.pool.start()
+            wait_events(app, 2.0 if n_processes else 0)
+            ticks = [time.perf_counter()]
+            timer = QTimer()
+            timer.setInterval(1)
+            timer.timeout.connect(lambda: ticks.append(time.perf_counter()))
+            timer.start()
+            start = time.perf_counter()
+            for _ in range(n_bursts):
+                writer.submit(values)
+            while len(results) < n_bursts:
+                app.processEvents()
+                time.sleep(0.0005)
+            elapsed = time.perf_counter() - start
+            timer.stop()
+            writer.stop()
+            writer.wait()
+            stall_ms = max(b - a for a, b in zip(ticks, ticks[1:])) * 1000
+            print(f"logging_offload: {name:9s} {n_bursts} x {n_samples} samples in {elapsed:5.2f} s, "
+                  f"longest GUI stall {stall_ms:6.1f} ms")
+            record(f"logging_offload.{name}_seconds", elapsed, "s", higher_is_better=False)
+            record(f"logging_offload.{name}_stall", stall_ms, "ms", higher_is_better=False)
+
+
+@benchmark("statistics")
+def benchmark_statistics(window=10000, batch=33, n_batches=3000):
+    """
+    Compare RollingStatistics.update() + statistics() per display refresh with
+    recomputing mean, std, min/max and the drift fit over the window each time.
+    """
+    import numpy as np
+    from TelemetryStore import TelemetryStore
+    from RollingStatistics import RollingStatistics
+    from MessageSchema import SCHEMAS
+    store = TelemetryStore(SCHEMAS["Controls"].dtype, 200000)
+    rows = np.zeros(batch * n_batches, dtype=store.data.dtype)
+    rows["yaw_angle_list"] = np.sin(np.arange(len(rows)) * 0.3) + np.arange(len(rows)) * 1e-5
+    statistics = RollingStatistics(store, "yaw_angle_list", window=window, sample_rate_hz=1000)
+    incremental = 0.0
+    recompute = 0.0
+    positions = np.arange(statistics.window)
+    for i in range(n_batches):
+        store.extend(rows[i * batch:(i + 1) * batch])
+        start = time.perf_counter()
+        statistics.update()
+        statistics.statistics()
+        incremental += time.perf_counter() - start
+        start = time.perf_counter()
+        values = store.window("yaw_angle_list", statistics.window).astype(np.float64)
+        values.mean(), values.std(), values.min(), values.max()
+        np.polyfit(positions[:len(values)], values, 1)
+        recompute += time.perf_counter() - start
+    incremental_us = incremental / n_batches * 1e6
+    recompute_us = recompute / n_batches * 1e6
+    print(f"statistics: window {statistics.window}, {batch} new samples per refresh")
+    print(f"statistics: incremental {incremental_us:8.1f} us/refresh")
+    print(f"statistics: recompute   {recompute_us:8.1f} us/refresh")
+    record("statistics.incremental", incremental_us, "us", higher_is_better=False)
+    record("statistics.recompute", recompute_us, "us", higher_is_better=False)
+
+
+# Run in a fresh interpreter: time from start to the main window being shown
+STARTUP_SCRIPT = """
+import time
+start = time.perf_counter()
+import os, sys
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PySide6.QtWidgets import QApplication
+from main import Widget, SerialThread
+imported = time.perf_counter()
+app = QApplication(sys.argv[:1])
+widget = Widget(SerialThread(batch_interval_ms=20), lazy_tabs=True, snapshot_path=":memory:")
+widget.show()
+app.processEvents()
+print((imported - start) * 1000, (time.perf_counter() - start) * 1000)
+"""
+
+
+def parse_importtime(stderr):
+    """
+    Parse the output of python -X importtime.
+
+    Returns:
+        dict: Module -> cumulative import time in milliseconds, including the
+        modules it imported first.
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative) / 1000
+    return modules
+
+
+@benchmark("startup")
+def benchmark_startup(runs=3, top=8):
+    """
+    Measure the cold start of the GUI in fresh interpreters, list the slowest
+    top-level imports. With --compare, the times are checked against BUDGETS.
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    best = None
+    for _ in range(runs):
+        process = subprocess.run([sys.executable, "-X", "importtime", "-c", STARTUP_SCRIPT],
+                                 cwd=directory, capture_output=True, text=True, timeout=120)
+        if process.returncode != 0:
+            print(process.stderr[-2000:])
+            raise RuntimeError("startup script failed")
+        import_ms, window_ms = map(float, process.stdout.split()[-2:])
+        if best is None or window_ms < best[1]:
+            best = (import_ms, window_ms, parse_importtime(process.stderr))
+    import_ms, window_ms, modules = best
+    print(f"startup: imports {import_ms:7.1f} ms, window shown after {window_ms:7.1f} ms (best of {runs})")
+    # Packages and the modules of this repository; submodules are counted in their package
+    packages = {name: ms for name, ms in modules.items() if "." not in name and name != "main"}
+    for name, ms in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"startup:   {name:30s} {ms:7.1f} ms")
+    for metric, value in (("startup.import_ms", import_ms), ("startup.window_ms", window_ms)):
+        record(metric, value, "ms", higher_is_better=False)
+
+
+@benchmark("settings")
+def benchmark_settings(repeat=200):
+    """
+    Time filling the Control settings tab from a read-back: one setValue per
+    widget with a store lookup each, against SettingsBinding.read(), for read-backs
+    that change every value and for repeated identical ones. All include the
+    repaint of the visible tab.
+    """
+    from widget import Widget
+    app = qt_application()
+    widget = Widget(snapshot_path=":memory:")
+    widget.ui_refresh_timer.stop()
+    widget.tab_widget.setCurrentWidget(widget.tab3)
+    widget.show()
+    handler = widget.jsonHandlerObj
+    binding = widget.control_settings_binding
+    frames = []
+    for i in range(2):
+        frame = json.loads(json.dumps(CONTROL_SETTINGS_FRAME))
+        for key, value in frame["Control settings"].items():
+            frame["Control settings"][key] = [v + i for v in value] if isinstance(value, list) else value + i
+        frames.append(frame)
+    app.processEvents()
+    timings = {}
+    for name in ("per widget", "binding", "unchanged"):
+        start = time.perf_counter()
+        for i in range(repeat):
+            # Alternate between two read-backs so that every widget changes
+            handler.ingest(frames[0 if name == "unchanged" else i % 2])
+            if name != "per widget":
+                binding.read(handler.control_settings_store)
+            else:
+                for spin_box, key, index, column in binding.bindings:
+                    value = handler.latest(column)
+                    if hasattr(spin_box, "setValue"):
+                        spin_box.setValue(float(value))
+                    else:
+                        spin_box.setChecked(bool(value == 1))
+            app.processEvents()
+        timings[name] = (time.perf_counter() - start) / repeat * 1000
+    widget.close()
+    for name, ms in timings.items():
+        print(f"settings: {len(binding.bindings)} control settings, {name:10s} {ms:7.3f} ms per read incl. repaint")
+    record("settings.read_per_widget", timings["per widget"], "ms", higher_is_better=False)
+    record("settings.read_binding", timings["binding"], "ms", higher_is_better=False)
+    record("settings.read_unchanged", timings["unchanged"], "ms", higher_is_better=False)
+
+
+@benchmark("history")
+def benchmark_history(days=7, rate_hz=10, max_points=2000, repeat=5):
+    """
+    Write `days` of Controls telemetry at rate_hz into a HistoryStore, then time
+    query() over the whole range, one day, one hour and one minute, and the
+    cost record() adds to JSONHandler.ingest_batch.
+    """
+    import numpy as np
+    from HistoryStore import HistoryStore
+    from MessageSchema import SCHEMAS
+    columns = SCHEMAS["Controls"].dtype
+    with tempfile.TemporaryDirectory() as directory:
+        history = HistoryStore(os.path.join(directory, "Controls"), columns)
+        rows_per_chunk = int(history.chunk_seconds * rate_hz)
+        n_chunks = int(days * 86400 / history.chunk_seconds)
+        rows = np.zeros(rows_per_chunk, np.dtype(columns))
+        t_start = 1.7e9
+        start = time.perf_counter()
+        for i in range(n_chunks):
+            times = t_start + (i * rows_per_chunk + np.arange(rows_per_chunk)) / rate_hz
+            rows["yaw_angle_list"] = np.sin(times / 3600) + np.random.normal(0, 0.01, rows_per_chunk)
+            history.write_chunk(times, rows)
+        write_s = time.perf_counter() - start
+        t_end = t_start + days * 86400
+        timings = {}
+        for name, span in (("all", t_end - t_start), ("day", 86400), ("hour", 3600), ("minute", 60)):
+            t0 = t_end - span
+            start = time.perf_counter()
+            for _ in range(repeat):
+                times, values = history.query("yaw_angle_list", t0, t_end, max_points)
+            timings[name] = ((time.perf_counter() - start) / repeat * 1000, len(values))
+    n_rows = n_chunks * rows_per_chunk
+    print(f"history: {n_rows} rows in {n_chunks} chunks written in {write_s:.1f} s")
+    for name, (ms, points) in timings.items():
+        print(f"history: query {name:6s} {ms:8.2f} ms, {points} points")
+        record(f"history.query_{name}", ms, "ms", higher_is_better=False)
+
+    # Batches of 20 frames, as the serial reader emits them; the history run
+    # includes writing out the queued rows
+    messages = [dict(CONTROLS_FRAME) for _ in range(20)]
+    n_batches = 5000
+    rates = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name in ("memory", "history"):
+            handler = JSONHandler(history_directory=directory if name == "history" else None)
+            start = time.perf_counter()
+            for _ in range(n_batches):
+                handler.ingest_batch(messages)
+            ingest_s = time.perf_counter() - start
+            handler.stop_history()
+            rates[name] = (n_batches * len(messages) / ingest_s, n_batches * len(messages) / (time.perf_counter() - start))
+    for name, (ingest, total) in rates.items():
+        print(f"history: ingest_batch {name:7s} {ingest:9.0f} frames/s, {total:9.0f} frames/s until written")
+    record("history.ingest_batch", rates["history"][0], "frames/s")
+    record("history.ingest_written", rates["history"][1], "frames/s")
+
+
+@benchmark("snapshots")
+def benchmark_snapshots(n_snapshots=5000, n_tags=50, repeat=200):
+    """
+    Time the settings snapshot store with n_snapshots stored: save, list the
+    latest of one tag, load and diff, against finding a snapshot among the
+    timestamped JSON files the settings used to be saved to.
+    """
+    from SnapshotStore import SnapshotStore
+    handler = JSONHandler()
+    sections = [
+        handler.json_to_send_controls,
+        handler.json_to_send_general_settings,
+        handler.json_to_send_control_settings,
+        handler.json_to_send_expert_precedures,
+    ]
+    body = handler.json_to_send_general_settings["General settings"]
+    key = "yawOffset"
+    with tempfile.TemporaryDirectory() as directory:
+        store = SnapshotStore(os.path.join(directory, "snapshots.sqlite"))
+        start = time.perf_counter()
+        for i in range(n_snapshots):
+            body[key] = float(i)
+            store.save(sections, tag=f"tag {i % n_tags}", created=1e9 + i)
+        save_ms = (time.perf_counter() - start) / n_snapshots * 1000
+        for i in range(n_snapshots):
+            with open(os.path.join(directory, f"General_Settings_Tab_{i:06d}.json"), "w") as json_file:
+                json.dump(handler.json_to_send_general_settings, json_file)
+
+        def per_call_ms(func):
+            start = time.perf_counter()
+            for i in range(repeat):
+                func(i)
+            return (time.perf_counter() - start) / repeat * 1000
+
+        def scan_files(i):
+            names = sorted(name for name in os.listdir(directory) if name.endswith(".json"))
+            with open(os.path.join(directory, names[i % len(names)])) as json_file:
+                json.load(json_file)
+
+        timings = {
+            "save": save_ms,
+            "list_tag": per_call_ms(lambda i: store.list(tag=f"tag {i % n_tags}")),
+            "load": per_call_ms(lambda i: store.load(1 + i * 17 % n_snapshots)),
+            "diff": per_call_ms(lambda i: store.diff(1 + i, n_snapshots - i)),
+            "json_files_load": per_call_ms(scan_files),
+        }
+        store.close()
+    for name, ms in timings.items():
+        print(f"snapshots: {n_snapshots} snapshots, {name:15s} {ms:7.3f} ms")
+    for name, ms in timings.items():
+        record(f"snapshots.{name}", ms, "ms", higher_is_better=False)
+
+
+@benchmark("widget")
+def benchmark_widget(n_frames=20000, batch_size=20):
+    """
+    Measure the GUI-thread cost of Widget.handle_serial_data, handle_serial_batch and
+    of one display refresh (labels, LEDs and live plots), on the offscreen platform.
+    """
+    from widget import Widget
+    app = qt_application()
+    widget = Widget(snapshot_path=":memory:")
+    widget.ui_refresh_timer.stop()
+    widget.show()
+    app.processEvents()
+    frames = [{"Controls": dict(CONTROLS_FRAME["Controls"], yawAngle=i * 1e-3)} for i in range(n_frames)]
+    single_us = 1e6 / frames_per_second(widget.handle_serial_data, frames)
+    batches = [frames[i:i + batch_size] for i in range(0, n_frames, batch_size)]
+    batch_us = 1e6 / frames_per_second(widget.handle_serial_batch, batches)
+    refreshes = 200
+    start = time.perf_counter()
+    for i in range(refreshes):
+        widget.handle_serial_data(frames[i])
+        widget.update_acquisition_display()
+        # Deliver the paint events the refresh scheduled
+        app.processEvents()
+    refresh_us = (time.perf_counter() - start) / refreshes * 1e6
+    widget.close()
+    print(f"widget: handle_serial_data      {single_us:8.1f} us/frame")
+    print(f"widget: handle_serial_batch({batch_size}) {batch_us:8.1f} us/batch")
+    print(f"widget: display refresh         {refresh_us:8.1f} us")
+    record("widget.handle_serial_data", single_us, "us", higher_is_better=False)
+    record(f"widget.handle_serial_batch_{batch_size}", batch_us, "us", higher_is_better=False)
+    record("widget.display_refresh", refresh_us, "us", higher_is_better=False)
+
+
+@benchmark("recorder")
+def benchmark_recorder(n_frames=200000):
+    """
+    Measure TelemetryRecorder throughput and drops when frames arrive faster than the disk.
+    """
+    import tempfile
+    from TelemetryRecorder import TelemetryRecorder
+    for file_format in TelemetryRecorder.FORMATS:
+        for compress in (False, True):
+            with tempfile.TemporaryDirectory() as directory:
+                recorder = TelemetryRecorder(directory, file_format, compress)
+                recorder.start()
+                start = time.perf_counter()
+                for _ in range(n_frames):
+                    recorder.record(CONTROLS_FRAME)
+                recorder.stop()
+                elapsed = time.perf_counter() - start
+                stats = recorder.stats()
+                print(f"recorder: {file_format:6s} gzip={compress!s:5s} {stats['written'] / elapsed:8.0f} frames/s written, "
+                      f"{stats['dropped']} dropped in {stats['full_events']} full episodes, "
+                      f"high water {stats['queue_high_water']}/{stats['queue_capacity']}")
+                record(f"recorder.{file_format}{'_gzip' if compress else ''}", stats["written"] / elapsed, "frames/s")
+
+
+def write_capture(directory, n_frames, rate_hz=1000.0, file_format="binary"):
+    """
+    Record n_frames synthetic Controls frames spaced 1/rate_hz apart.
+
+    Returns:
+        str: Path of the capture file.
+    """
+    from TelemetryRecorder import TelemetryRecorder
+    recorder = TelemetryRecorder(directory, file_format, queue_size=n_frames + 1)
+    recorder.start()
+    for i in range(n_frames):
+        frame = {"Controls": dict(CONTROLS_FRAME["Controls"], yawAngle=i * 1e-3)}
+        recorder.record(frame, 1.7e9 + i / rate_hz)
+    recorder.stop()
+    return recorder.paths[0]
+
+
+@benchmark("replay")
+def benchmark_replay(n_frames=200000):
+    """
+    Replay a capture as fast as possible into JSONHandler alone and into the full Widget.
+    """
+    import tempfile
+    from Replay import ReplayThread, read_capture
+    app = qt_application()
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_capture(directory, n_frames)
+        start = time.perf_counter()
+        count = sum(1 for _ in read_capture(path))
+        read_rate = count / (time.perf_counter() - start)
+        print(f"replay: read_capture        {read_rate:10.0f} frames/s")
+        record("replay.read_capture", read_rate, "frames/s")
+
+        handler = JSONHandler()
+        replay = ReplayThread(path, speed=0)
+        replay.batch_received.connect(handler.ingest_batch)
+        replay.start()
+        while not replay.isFinished():
+            app.processEvents()
+        app.processEvents()
+        print(f"replay: into JSONHandler    {replay.result['frames_per_s']:10.0f} frames/s")
+        record("replay.jsonhandler", replay.result["frames_per_s"], "frames/s")
+
+        from widget import Widget
+        replay = ReplayThread(path, speed=0)
+        widget = Widget(replay, snapshot_path=":memory:")
+        widget.show()
+        widget.connect_serial()
+        while not replay.isFinished():
+            app.processEvents()
+        app.processEvents()
+        print(f"replay: into Widget         {replay.result['frames_per_s']:10.0f} frames/s "
+              f"(yaw shown: {widget.info_yaw_angle.text()})")
+        record("replay.widget", replay.result["frames_per_s"], "frames/s")
+        widget.close()
+
+
+@benchmark("simulator")
+def benchmark_simulator(rates=(1000, 5000, 20000, 50000), seconds=2.0):
+    """
+    Run the simulated controller -> SerialThread -> JSONHandler pipeline at increasing rates.
+
+    Reports end-to-end latency (simulator write to GUI-thread ingest) and the
+    highest rate at which no frames fell behind.
+    """
+    import numpy as np
+    from Serial import SerialThread
+    from Simulator import ControllerSimulator
+    app = qt_application()
+    sustainable = 0
+    for rate in rates:
+        simulator = ControllerSimulator(rate)
+        port = simulator.start()
+        handler = JSONHandler()
+        latencies = []
+
+        def on_batch(frames):
+            now = time.monotonic()
+            handler.ingest_batch(frames)
+            latencies.extend(now - frame["Controls"]["simTime"] for frame in frames if "Controls" in frame)
+
+        reader = SerialThread(port, batch_interval_ms=20)
+        reader.batch_received.connect(on_batch)
+        reader.start()
+        wait_events(app, seconds)
+        # Stop streaming, give the pipeline time to drain, then close everything
+        simulator.running = False
+        wait_events(app, 0.5)
+        sent = simulator.frames_sent
+        reader.stop()
+        reader.wait()
+        simulator.stop()
+        app.processEvents()
+        received = len(latencies)
+        latency_ms = np.array(latencies) * 1000
+        p50, p99 = np.percentile(latency_ms, [50, 99]) if received else (float("nan"), float("nan"))
+        kept_up = received >= 0.99 * sent and p99 < 100
+        if kept_up:
+            sustainable = rate
+        print(f"simulator: {rate:6d} frames/s  received {received}/{sent}  latency p50 {p50:6.1f} ms  "
+              f"p99 {p99:6.1f} ms  {'ok' if kept_up else 'falling behind'}")
+    print(f"simulator: max sustainable rate {sustainable} frames/s")
+    record("simulator.max_sustainable_rate", sustainable, "frames/s")
+
+
+def open_pty_pair():
+    """
+    Open a pseudo terminal pair to stand in for the controller (Linux only).
+
+    Returns:
+        tuple: (master_fd, slave_path). Bytes written to master_fd arrive on slave_path.
+    """
+    import pty
+    import tty
+    master_fd, slave_fd = pty.openpty()
+    tty.setraw(slave_fd)
+    return master_fd, os.ttyname(slave_fd)
+
+
+def qt_application():
+    """
+    Return the running Qt application, creating a headless one if needed.
+    """
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtWidgets import QApplication
+    return QApplication.instance() or QApplication(sys.argv[:1])
+
+
+def wait_events(app, seconds):
+    """
+    Keep the Qt event loop running for the given time without spinning.
+    """
+    from PySide6.QtCore import QEventLoop, QTimer
+    loop = QEventLoop()
+    QTimer.singleShot(int(seconds * 1000), loop.quit)
+    loop.exec()
+
+
+def run_serial_loopback(n_frames, idle_seconds=0.0, latency=None, **serial_kwargs):
+    """
+    Stream n_frames Controls frames through SerialThread over a pty loopback.
+
+    Parameters:
+        n_frames (int): Number of frames to write.
+        idle_seconds (float): Idle time measured before streaming starts.
+        latency (LatencyMonitor): Attached to the reader when given.
+        **serial_kwargs: Extra SerialThread arguments.
+
+    Returns:
+        dict: frames received, GUI events delivered, elapsed seconds and idle CPU %.
+    """
+    from Serial import SerialThread
+    app = qt_application()
+    master_fd, slave_path = open_pty_pair()
+    counts = {"frames": 0, "events": 0}
+
+    def on_frame(data):
+        counts["frames"] += 1
+        counts["events"] += 1
+
+    def on_batch(frames):
+        counts["frames"] += len(frames)
+        counts["events"] += 1
+
+    reader = SerialThread(slave_path, **serial_kwargs)
+    reader.latency = latency
+    reader.data_received.connect(on_frame)
+    reader.batch_received.connect(on_batch)
+    reader.start()
+    wait_events(app, 0.2)
+
+    cpu_start = time.process_time()
+    wait_events(app, idle_seconds)
+    idle_cpu = (time.process_time() - cpu_start) / idle_seconds * 100 if idle_seconds else 0.0
+
+    payload = (json.dumps(CONTROLS_FRAME) + "\n").encode("latin-1") * n_frames
+    writer = threading.Thread(target=os.write, args=(master_fd, payload))
+    start = time.perf_counter()
+    writer.start()
+    while counts["frames"] < n_frames and time.perf_counter() - start < 60:
+        app.processEvents()
+    elapsed = time.perf_counter() - start
+    writer.join()
+
+    reader.stop()
+    reader.wait()
+    os.close(master_fd)
+    app.processEvents()
+    return dict(counts, elapsed=elapsed, idle_cpu=idle_cpu)
+
+
+@benchmark("serial_reader")
+def benchmark_serial_reader(idle_seconds=2.0, n_frames=100000):
+    """
+    Run SerialThread against a pty loopback and report idle CPU and max frame rate.
+    """
+    result = run_serial_loopback(n_frames, idle_seconds)
+    print(f"serial_reader: idle CPU {result['idle_cpu']:5.1f} %")
+    print(f"serial_reader: {result['frames']}/{n_frames} frames in {result['elapsed']:.2f} s "
+          f"({result['frames'] / result['elapsed']:.0f} frames/s)")
+    record("serial_reader.idle_cpu", result["idle_cpu"], "%", higher_is_better=False)
+    record("serial_reader.rate", result["frames"] / result["elapsed"], "frames/s")
+
+
+@benchmark("serial_batching")
+def benchmark_serial_batching(n_frames=100000):
+    """
+    Compare per-frame signals with batched signals over a pty loopback.
+    """
+    for batch_interval_ms in (0, 20):
+        result = run_serial_loopback(n_frames, batch_interval_ms=batch_interval_ms)
+        print(f"serial_batching: batch {batch_interval_ms:3d} ms  {result['events']:7d} GUI events  "
+              f"{result['frames'] / result['elapsed']:8.0f} frames/s")
+        record(f"serial_batching.batch_{batch_interval_ms}ms", result["frames"] / result["elapsed"], "frames/s")
+
+
+@benchmark("commands")
+def benchmark_commands(n_sessions=1000):
+    """
+    Compare the bytes of full and delta-encoded commands for a typical sequence of GUI actions.
+    """
+    handler = JSONHandler()
+    controls = handler.json_to_send_controls["Controls"]
+    general = handler.json_to_send_general_settings["General settings"]
+    expert = handler.json_to_send_expert_precedures["Expert procedures"]
+
+    def pulse(message, values, key, **changes):
+        values.update(changes, **{key: 1})
+        handler.command(message)
+        values[key] = 0
+        handler.command(message)
+
+    start = time.perf_counter()
+    for i in range(n_sessions):
+        controls["Mode"] = i % 3
+        handler.command(handler.json_to_send_controls)
+        pulse(handler.json_to_send_controls, controls, "StartM", **{"SP (V/urad)": float(i % 100)})
+        pulse(handler.json_to_send_controls, controls, "StopM")
+        pulse(handler.json_to_send_controls, controls, "Re contr prot")
+        pulse(handler.json_to_send_general_settings, general, "Write general settings", maxVoltage=5.0 + i % 5)
+        pulse(handler.json_to_send_expert_precedures, expert, "Ramp cycles motion Start", numberCycles=i % 10)
+    elapsed = time.perf_counter() - start
+    n_commands = n_sessions * 11
+    sent, full = handler.command_bytes["sent"], handler.command_bytes["full"]
+    print(f"commands: {n_commands} commands, full {full / n_commands:6.1f} bytes/command, "
+          f"delta {sent / n_commands:6.1f} bytes/command ({sent / full * 100:.0f} %), "
+          f"{elapsed / n_commands * 1e6:.1f} us/command to build")
+    record("commands.delta_bytes", sent / n_commands, "bytes", higher_is_better=False)
+    record("commands.build", elapsed / n_commands * 1e6, "us", higher_is_better=False)
+
+
+@benchmark("tx")
+def benchmark_tx(n_commands=2000):
+    """
+    Measure how long write_to_serial() holds the GUI thread and how fast the
+    serial thread delivers the queued commands over a pty loopback.
+    """
+    import numpy as np
+    from Serial import SerialThread
+    app = qt_application()
+    master_fd, slave_path = open_pty_pair()
+    os.set_blocking(master_fd, False)
+    reader = SerialThread(slave_path, batch_interval_ms=20)
+    reader.start()
+    wait_events(app, 0.2)
+    command = json.dumps(JSONHandler().json_to_send_controls)
+    expected = len(command) * n_commands
+    received = 0
+    calls = []
+    start = time.perf_counter()
+    for i in range(n_commands):
+        call_start = time.perf_counter()
+        reader.write_to_serial(command, key="Mode" if i % 2 else None)
+        calls.append(time.perf_counter() - call_start)
+    queued = time.perf_counter() - start
+    while time.perf_counter() - start < 10:
+        try:
+            received += len(os.read(master_fd, 65536))
+        except BlockingIOError:
+            if received + len(command) * reader.tx_coalesced >= expected:
+                break
+            time.sleep(0.0005)
+    delivered = time.perf_counter() - start
+    reader.stop()
+    reader.wait()
+    os.close(master_fd)
+    calls_us = np.array(calls) * 1e6
+    print(f"tx: write_to_serial p50 {np.percentile(calls_us, 50):6.1f} us  max {calls_us.max():7.1f} us  "
+          f"({n_commands} commands queued in {queued * 1e3:.1f} ms)")
+    print(f"tx: {reader.tx_written} written, {reader.tx_coalesced} coalesced, all delivered after {delivered * 1e3:.1f} ms")
+    record("tx.write_to_serial_p50", np.percentile(calls_us, 50), "us", higher_is_better=False)
+
+
+@benchmark("async_ports")
+def benchmark_async_ports(port_counts=(1, 4, 16), n_frames=20000):
+    """
+    Stream frames over several pty loopbacks at once, with one SerialThread per
+    port and with AsyncSerialSource on the shared event loop thread.
+    """
+    from AsyncSerial import AsyncSerialSource
+    from Serial import SerialThread
+    app = qt_application()
+    payload = (json.dumps(CONTROLS_FRAME) + "\n").encode("latin-1") * n_frames
+    for n_ports in port_counts:
+        for name, source_class in (("SerialThread", SerialThread), ("AsyncSerialSource", AsyncSerialSource)):
+            counts = {"frames": 0}
+
+            def on_batch(frames):
+                counts["frames"] += len(frames)
+
+            pairs = [open_pty_pair() for _ in range(n_ports)]
+            sources = [source_class(slave_path, batch_interval_ms=20) for master_fd, slave_path in pairs]
+            threads_before = threading.active_count()
+            for source in sources:
+                source.batch_received.connect(on_batch)
+                source.start()
+            wait_events(app, 0.3)
+            threads = threading.active_count() - threads_before
+            writers = [threading.Thread(target=os.write, args=(master_fd, payload)) for master_fd, slave_path in pairs]
+            start = time.perf_counter()
+            for writer in writers:
+                writer.start()
+            while counts["frames"] < n_frames * n_ports and time.perf_counter() - start < 60:
+                app.processEvents()
+            elapsed = time.perf_counter() - start
+            for writer in writers:
+                writer.join()
+            for source in sources:
+                source.stop()
+            for source in sources:
+                source.wait()
+            for master_fd, slave_path in pairs:
+                os.close(master_fd)
+            app.processEvents()
+            rate = counts["frames"] / elapsed
+            # QThreads are not Python threads; count them as one per source
+            threads = n_ports if source_class is SerialThread else threads
+            print(f"async_ports: {n_ports:3d} ports  {name:18s} {rate:9.0f} frames/s total  {threads:3d} threads")
+            record(f"async_ports.{name}_{n_ports}", rate, "frames/s")
+
+
+@benchmark("devices")
+def benchmark_devices(device_counts=(1, 4, 8), rate_hz=2000, seconds=2.0):
+    """
+    Run DeviceManager and DeviceOverview against several simulated controllers and
+    report the GUI thread CPU load next to the total frame rate.
+    """
+    from DeviceManager import DeviceManager, DeviceOverview
+    from Simulator import ControllerSimulator
+    app = qt_application()
+    for n_devices in device_counts:
+        simulators = [ControllerSimulator(rate_hz) for _ in range(n_devices)]
+        manager = DeviceManager(capacity=50000)
+        for i, simulator in enumerate(simulators):
+            manager.add_device(f"axis{i}", simulator.start())
+        overview = DeviceOverview(manager)
+        overview.show()
+        manager.connect_devices()
+        wait_events(app, 0.3)
+        frames = sum(device.frames for device in manager.devices.values())
+        gui_cpu = time.thread_time()
+        start = time.perf_counter()
+        wait_events(app, seconds)
+        elapsed = time.perf_counter() - start
+        gui_cpu = (time.thread_time() - gui_cpu) / elapsed * 100
+        rate = (sum(device.frames for device in manager.devices.values()) - frames) / elapsed
+        overview.close()
+        for simulator in simulators:
+            simulator.stop()
+        print(f"devices: {n_devices:2d} controllers  {rate:8.0f} frames/s stored  GUI thread CPU {gui_cpu:5.1f} %")
+        record(f"devices.gui_cpu_{n_devices}", gui_cpu, "%", higher_is_better=False)
+
+
+@benchmark("latency")
+def benchmark_latency(n_samples=1000000, n_frames=100000):
+    """
+    Cost of recording latency samples and of leaving the monitor attached to SerialThread.
+    """
+    import numpy as np
+    from Diagnostics import LatencyHistogram, LatencyMonitor
+    histogram = LatencyHistogram()
+    samples = np.random.default_rng(0).integers(1000, 10**8, n_samples).tolist()
+    start = time.perf_counter()
+    for ns in samples:
+        histogram.record(ns)
+    elapsed = time.perf_counter() - start
+    print(f"latency: record() {elapsed / n_samples * 1e9:6.0f} ns/sample")
+    record("latency.histogram_record", elapsed / n_samples * 1e9, "ns", higher_is_better=False)
+    for latency in (None, LatencyMonitor()):
+        result = run_serial_loopback(n_frames, batch_interval_ms=20, latency=latency)
+        label = "monitor off" if latency is None else "monitor on "
+        print(f"latency: {label} {result['frames'] / result['elapsed']:8.0f} frames/s")
+        record(f"latency.monitor_{label.strip().split()[-1]}", result["frames"] / result["elapsed"], "frames/s")
+        if latency is not None:
+            for stage, summary in latency.snapshot().items():
+                if summary["count"]:
+                    print(f"latency:   {stage:15s} p50 {summary['p50_us']:8.0f} us  p99 {summary['p99_us']:8.0f} us")
+
+
+def environment():
+    """
+    Describe the code and machine a run was made on.
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    import numpy
+    import PySide6
+    return {
+        "commit": commit,
+        "created": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "numpy": numpy.__version__,
+        "pyside6": PySide6.__version__,
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Print the change of each metric against a baseline run.
+
+    Parameters:
+        results (dict): Metrics of this run, as in RESULTS.
+        baseline (dict): Contents of an earlier results file.
+        threshold (float): Relative slowdown reported as a regression, e.g. 0.1 for 10 %;
+            metrics in BUDGETS use their own.
+
+    Returns:
+        list: Names of the metrics that regressed.
+    """
+    regressions = []
+    previous = baseline["results"]
+    print(f"\nComparison with {baseline['environment'].get('commit') or 'baseline'}:")
+    for metric, current in sorted(results.items()):
+        if metric not in previous or previous[metric]["value"] == 0:
+            continue
+        change = current["value"] / previous[metric]["value"] - 1
+        worse = -change if current["higher_is_better"] else change
+        regressed = worse > BUDGETS.get(metric, threshold)
+        if regressed:
+            regressions.append(metric)
+        print(f"  {metric:40s} {previous[metric]['value']:12.4g} -> {current['value']:12.4g} {current['unit']:9s} "
+              f"{change * 100:+7.1f} %{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Telemetry pipeline benchmarks")
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run (default: all of {', '.join(sorted(BENCHMARKS))})")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare with a results file written by --output")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative slowdown counted as a regression (default: 0.2)")
+    args = parser.parse_args()
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+    # Headless by default, so runs on any machine are comparable
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    for name in args.names or sorted(BENCHMARKS):
+        BENCHMARKS[name]()
+    if args.output:
+        with open(args.output, "w") as results_file:
+            json.dump({"environment": environment(), "results": RESULTS}, results_file, indent=4)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare(RESULTS, json.load(baseline_file), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold * 100:.0f} % "
+                  f"or above their budget: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,67 @@
 from PySide6.QtWidgets import QApplication
 from widget import Widget
+from Serial import SerialThread
+from Replay import ReplayThread
+import argparse
 import sys
 
-app = QApplication(sys.argv)
+def main():
+    parser = argparse.ArgumentParser(description="Sapphire Testbench")
+    parser.add_argument("--port", default="COM12", help="serial port of the controller")
+    parser.add_argument("--replay", metavar="FILE", help="replay a recorded telemetry capture instead of using the serial port")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed factor, 0 replays as fast as possible")
+    parser.add_argument("--binary", action="store_true", help="ask the controller for binary telemetry frames instead of JSON lines")
+    parser.add_argument("--asyncio", action="store_true", help="read the serial port with the asyncio transport instead of a thread per port")
+    parser.add_argument("--device", action="append", metavar="ID=PORT", default=[],
+                        help="show the overview of several controllers instead of the single-controller window (repeat per device)")
+    parser.add_argument("--logging-processes", type=int, default=0, metavar="N",
+                        help="write \"Logging\" bursts in N worker processes instead of a background thread")
+    parser.add_argument("--eager-tabs", action="store_true",
+                        help="build every tab before the window opens instead of when first shown")
+    parser.add_argument("--history", metavar="DIR",
+                        help="also keep the telemetry on disk in DIR, queryable by time range (see HistoryStore)")
+    parser.add_argument("--simulate", type=float, metavar="RATE", help="run against a simulated controller sending RATE frames/s (Linux only)")
+    args, qt_args = parser.parse_known_args()
 
-widget = Widget()
-widget.show()
+    app = QApplication(sys.argv[:1] + qt_args)
 
-app.exec()
\ No newline at end of file
+    if args.device:
+        # Several controllers: DeviceOverview instead of the single-controller window
+        from DeviceManager import DeviceManager, DeviceOverview
+        manager = DeviceManager()
+        for device in args.device:
+            device_id, _, port = device.partition("=")
+            if not port and args.simulate:
+                from Simulator import ControllerSimulator
+                device_simulator = ControllerSimulator(args.simulate)
+                port = device_simulator.start()
+                app.aboutToQuit.connect(device_simulator.stop)
+            manager.add_device(device_id, port, binary=args.binary)
+        overview = DeviceOverview(manager)
+        overview.show()
+        sys.exit(app.exec())
+
+    if args.simulate and not args.replay:
+        # Only started when its port is read from, not for --device or --replay
+        from Simulator import ControllerSimulator
+        simulator = ControllerSimulator(args.simulate)
+        args.port = simulator.start()
+        app.aboutToQuit.connect(simulator.stop)
+
+    if args.replay:
+        data_source = ReplayThread(args.replay, args.speed)
+    elif args.asyncio:
+        from AsyncSerial import AsyncSerialSource
+        data_source = AsyncSerialSource(args.port, batch_interval_ms=20, binary=args.binary)
+    else:
+        data_source = SerialThread(args.port, batch_interval_ms=20, binary=args.binary)
+
+    widget = Widget(data_source, logging_processes=args.logging_processes, lazy_tabs=not args.eager_tabs,
+                    history_directory=args.history)
+    widget.show()
+
+    app.exec()
+
+# Guarded: OffloadPool worker processes import this module without running it
+if __name__ == "__main__":
+    main()
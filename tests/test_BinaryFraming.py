@@ -0,0 +1,45 @@
+import numpy as np
+from BinaryFraming import BinaryFrameParser, encode_frame, wire_dtype, records_to_frames
+
+# Exact in float32, the wire type of the yaw columns
+ROWS = [(2, 12.5, 0, 0.25, 0, 0), (1, -3.25, 1, 0.5, 1, 0)]
+
+def test_frames_between_text_are_decoded():
+    parser = BinaryFrameParser()
+    blocks, text = parser.feed(b'{"a": 1}\n' + encode_frame("Controls", ROWS) + b'{"b": 2}\n')
+    assert len(blocks) == 1 and blocks[0].dtype == wire_dtype("Controls")
+    assert blocks[0].tolist() == ROWS
+    assert bytes(text) == b'{"a": 1}\n{"b": 2}\n'
+    assert parser.errors == 0
+
+def test_bad_crc_is_skipped_and_the_next_frame_kept():
+    frame = bytearray(encode_frame("Controls", ROWS[:1]))
+    frame[-1] ^= 0xFF
+    parser = BinaryFrameParser()
+    blocks, text = parser.feed(bytes(frame) + encode_frame("Controls", ROWS[1:]))
+    assert [block.tolist() for block in blocks] == [ROWS[1:]]
+    assert parser.errors == 1
+
+def test_resync_after_noise_and_split_reads():
+    stream = b"\xa5\x00noise" + encode_frame("Controls", ROWS) * 3
+    parser = BinaryFrameParser()
+    records = []
+    for start in range(0, len(stream), 5):
+        blocks, text = parser.feed(stream[start:start + 5])
+        records.extend(row for block in blocks for row in block.tolist())
+    assert records == ROWS * 3
+
+def test_records_to_frames():
+    block = np.array(ROWS, dtype=wire_dtype("Controls"))
+    frames = records_to_frames(block)
+    assert frames[1]["Controls"]["yawAngle"] == -3.25
+    assert frames[0]["Controls"]["state"] == 2
+
+def test_float32_values_are_shown_with_their_own_digits():
+    from JSONHandler import JSONHandler
+    handler = JSONHandler(capacity=10)
+    handler.ingest_batch([np.array([(2, -0.008674, 0, 0.04, 0, 0)], dtype=wire_dtype("Controls"))])
+    assert handler.latest("yaw_angle_list") != -0.008674
+    assert handler.latest_text("yaw_angle_list") == "-0.008674"
+    assert handler.latest_text("yaw_std_list") == "0.04"
+    assert handler.latest_text("controller_state_list") == "2"
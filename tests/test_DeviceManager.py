@@ -0,0 +1,35 @@
+import os
+import threading
+import pytest
+from PySide6.QtWidgets import QApplication
+from DeviceManager import DeviceManager
+
+@pytest.fixture
+def manager():
+    app = QApplication.instance() or QApplication([])
+    manager = DeviceManager(capacity=100)
+    yield manager
+    manager.close()
+    app.processEvents()
+
+def test_write_failure_resyncs_in_the_gui_thread(manager):
+    device = manager.add_device("axis1", "/dev/null")
+    device.handler.command(device.handler.json_to_send_general_settings)
+    assert device.handler.command_state
+    thread = threading.Thread(target=device.source.write_failed.emit, args=("SerialException: gone",))
+    thread.start()
+    thread.join()
+    # Queued: the known state is only forgotten once the GUI thread handles the signal
+    assert device.handler.command_state
+    QApplication.instance().processEvents()
+    assert not device.handler.command_state
+
+def test_remove_device_writes_its_queued_logging_burst(manager, tmp_path):
+    device = manager.add_device("axis1", "/dev/null")
+    writer = device.handler.logging_writer
+    writer.directory = str(tmp_path)
+    writer.submit([0.5, 1.5] * 1000)
+    manager.remove_device("axis1")
+    assert not writer.isRunning()
+    assert len(os.listdir(tmp_path)) == 1
+    assert "axis1" not in manager.devices
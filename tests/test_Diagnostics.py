@@ -0,0 +1,28 @@
+from Diagnostics import LatencyMonitor
+
+def test_each_signal_gets_its_own_timestamps():
+    latency = LatencyMonitor()
+    for i in range(3):
+        latency.stamp(i * 10, i * 10 + 1)
+    assert [latency.take() for _ in range(3)] == [(0, 1), (10, 11), (20, 21)]
+    assert latency.dropped == 0
+
+def test_dropped_timestamps_are_counted_not_mispaired():
+    latency = LatencyMonitor()
+    for i in range(LatencyMonitor.PENDING_SIZE + 5):
+        latency.stamp(i, i)
+    # The first 5 signals lost their timestamps while the GUI was behind
+    assert [latency.take() for _ in range(5)] == [None] * 5
+    assert latency.take() == (5, 5)
+    assert latency.dropped == 5
+    latency.stamp(-1, -1)
+    for _ in range(LatencyMonitor.PENDING_SIZE - 1):
+        latency.take()
+    assert latency.take() == (-1, -1)
+
+def test_source_without_timestamps_is_not_measured():
+    latency = LatencyMonitor()
+    assert latency.measured
+    assert latency.take() is None
+    assert not latency.measured
+    assert latency.dropped == 0
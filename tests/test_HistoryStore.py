@@ -0,0 +1,47 @@
+import numpy as np
+from HistoryStore import HistoryStore
+
+COLUMNS = [("value", np.float64), ("state", np.int64)]
+
+def write_history(directory, n_rows=1000, rows_per_second=10, chunk_seconds=10):
+    history = HistoryStore(str(directory), COLUMNS, chunk_seconds=chunk_seconds, block_size=16)
+    history.start()
+    t0 = 1000.0
+    for i in range(0, n_rows, 5):
+        rows = [(float(j), j % 3) for j in range(i, i + 5)]
+        history.record(rows, timestamp=t0 + i / rows_per_second)
+    history.stop()
+    return history, t0
+
+def test_query_raw_rows_across_chunks(tmp_path):
+    history, t0 = write_history(tmp_path)
+    assert history.stats()["chunks"] == 10
+    # 25 s spanning three chunks, fewer rows than max_points: the rows themselves
+    times, values = history.query("value", t0 + 5, t0 + 30, max_points=1000)
+    assert values.tolist() == [float(j) for j in range(50, 305)]
+    assert np.all(np.diff(times) >= 0)
+
+def test_query_decimated_across_chunks(tmp_path):
+    history, t0 = write_history(tmp_path)
+    times, values = history.query("value", t0, t0 + 100, max_points=20)
+    assert len(values) <= 20
+    assert values.min() == 0.0 and values.max() == 999.0
+
+def test_reopened_history_is_queryable(tmp_path):
+    write_history(tmp_path)
+    history = HistoryStore(str(tmp_path), COLUMNS, chunk_seconds=10, block_size=16)
+    times, values = history.query("state", 1000.0, 1100.0, max_points=10000)
+    assert len(values) == 1000
+
+def test_idle_writer_writes_the_ended_chunk(tmp_path):
+    import time
+    history = HistoryStore(str(tmp_path), COLUMNS, chunk_seconds=0.2, flush_interval=0.05)
+    history.start()
+    history.record([(1.0, 0), (2.0, 1)])
+    deadline = time.time() + 5
+    while history.stats()["written"] < 2 and time.time() < deadline:
+        time.sleep(0.05)
+    assert history.stats()["written"] == 2
+    times, values = history.query("value", 0, time.time() + 1)
+    assert values.tolist() == [1.0, 2.0]
+    history.stop()
@@ -0,0 +1,182 @@
+import json
+import pytest
+from JSONHandler import JSONHandler
+
+CONTROLS = {"Controls": {"state": 2, "yawAngle": 12.5, "warninglevel": 0,
+                         "yawAngleStdDeviation": 0.04, "errorAxis1": 0, "errorAxis2": 0}}
+
+def test_ingest_stores_a_decoded_frame():
+    handler = JSONHandler()
+    assert handler.ingest(CONTROLS) is CONTROLS
+    assert handler.latest("yaw_angle_list") == 12.5
+    assert handler.latest("controller_state_list") == 2
+    assert handler.counter == 1
+
+def test_parse_json_string_matches_ingest():
+    text, decoded = JSONHandler(), JSONHandler()
+    text.parse_json_string(str(CONTROLS))
+    decoded.ingest(CONTROLS)
+    for field in ("yaw_angle_list", "yaw_std_list", "error_axis2_list"):
+        assert text.latest(field) == decoded.latest(field)
+
+def test_parse_json_string_rejects_bad_text():
+    handler = JSONHandler()
+    assert handler.parse_json_string("{not json") is None
+    assert handler.counter == 0
+
+PULSES_OFF = {"StartM": 0, "StopM": 0, "Re contr prot": 0, "Re intf prot": 0}
+
+class FakePort:
+    """
+    Stands in for serial.Serial: records what SerialThread.flush_tx() writes.
+    """
+    is_open = True
+
+    def __init__(self):
+        self.written = []
+
+    def cancel_read(self):
+        pass
+
+    def write(self, data):
+        self.written.append(data)
+
+def test_command_sends_the_full_section_first_then_deltas():
+    handler = JSONHandler()
+    controls = handler.json_to_send_controls
+    first = json.loads(handler.command(controls))
+    assert first == controls and handler.last_delta is None
+    controls["Controls"]["SP (V/urad)"] = 2.5
+    assert json.loads(handler.command(controls)) == {"Controls": dict(PULSES_OFF, **{"SP (V/urad)": 2.5})}
+    assert handler.last_delta == {"SP (V/urad)"}
+    handler.resync_commands()
+    assert json.loads(handler.command(controls)) == controls
+    assert handler.last_delta is None
+
+def test_command_resyncs_every_resync_interval():
+    handler = JSONHandler()
+    handler.resync_interval = 3
+    message = handler.json_to_send_controls
+    sent = [handler.last_delta for _ in range(7) if handler.command(message)]
+    assert sent == [None, set(), set(), None, set(), set(), None]
+
+def test_write_triggers_are_always_sent():
+    handler = JSONHandler()
+    message = handler.json_to_send_general_settings
+    handler.command(message)
+    assert json.loads(handler.command(message)) == {"General settings": {"Write general settings": 0}}
+
+def test_pulse_reset_only_locally_is_sent_again():
+    handler = JSONHandler()
+    message = handler.json_to_send_expert_precedures
+    procedures = message["Expert procedures"]
+    handler.command(message)
+    for _ in range(2):
+        # As Widget.start_logging(): the reset to 0 is not sent
+        procedures["Logging"] = 1
+        assert json.loads(handler.command(message))["Expert procedures"]["Logging"] == 1
+        procedures["Logging"] = 0
+
+def test_empty_delta_is_not_sent():
+    handler = JSONHandler()
+    message = {"Other section": {"value": 1}}
+    assert handler.command(message) is not None
+    assert handler.command(message) is None
+    message["Other section"]["value"] = 2
+    assert json.loads(handler.command(message)) == {"Other section": {"value": 2}}
+
+def test_only_settings_read_backs_are_acknowledged():
+    handler = JSONHandler()
+    handler.command(handler.json_to_send_controls)
+    handler.command(handler.json_to_send_general_settings)
+    state = json.loads(json.dumps(handler.command_state))
+    handler.ingest(CONTROLS)
+    handler.ingest_batch([CONTROLS])
+    assert handler.command_state == state
+    general = {key: 1.0 for key in ("yawOffset", "AAROffset", "minVoltage", "maxVoltage", "openLoopMaxSpeed",
+                                    "closedLoopMaxSpeed", "minPIDLimit", "maxPIDLimit")}
+    general["controlInstabilityProtection"] = 1
+    handler.ingest({"General settings": general})
+    assert handler.command_state["General settings"]["maxVoltage"] == 1.0
+
+def make_widget(data_source=None):
+    from PySide6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+    from widget import Widget
+    widget = Widget(data_source, snapshot_path=":memory:")
+    widget.ui_refresh_timer.stop()
+    return app, widget
+
+def close_widget(app, widget):
+    widget.jsonHandlerObj.logging_writer.stop()
+    widget.jsonHandlerObj.logging_writer.wait()
+    widget.deleteLater()
+    app.processEvents()
+
+@pytest.fixture
+def widget():
+    app, widget = make_widget()
+    widget.serial_thread.serial = FakePort()
+    yield widget
+    widget.serial_thread.serial = None
+    close_widget(app, widget)
+
+def written_commands(serial_thread):
+    serial_thread.flush_tx()
+    data = b"".join(serial_thread.serial.written).decode("latin-1")
+    serial_thread.serial.written.clear()
+    return [json.loads(part) for part in data.replace("}{", "}\n{").split("\n")] if data else []
+
+def select_modes(widget, *modes):
+    for mode in modes:
+        widget.combo_box_mode.setCurrentIndex(mode)
+
+def mode_command(mode):
+    return {"Controls": dict(PULSES_OFF, Mode=mode)}
+
+def test_full_command_is_not_coalesced_by_the_next_mode_change(widget):
+    widget.jsonHandlerObj.resync_commands()
+    select_modes(widget, 1, 2)
+    commands = written_commands(widget.serial_thread)
+    assert commands == [{"Controls": dict(widget.jsonHandlerObj.json_to_send_controls["Controls"], Mode=1)},
+                        mode_command(2)]
+
+def test_quick_mode_changes_are_coalesced(widget):
+    widget.jsonHandlerObj.resync_commands()
+    widget.jsonHandlerObj.command(widget.jsonHandlerObj.json_to_send_controls)
+    select_modes(widget, 1, 2, 1)
+    assert written_commands(widget.serial_thread) == [mode_command(1)]
+    assert widget.serial_thread.tx_coalesced == 2
+
+def test_pulse_between_mode_changes_keeps_the_order(widget):
+    handler = widget.jsonHandlerObj
+    handler.resync_commands()
+    handler.command(handler.json_to_send_controls)
+    select_modes(widget, 1)
+    handler.json_to_send_controls["Controls"]["StartM"] = 1
+    widget.serial_thread.write_to_serial(handler.command(handler.json_to_send_controls))
+    handler.json_to_send_controls["Controls"]["StartM"] = 0
+    select_modes(widget, 2)
+    assert written_commands(widget.serial_thread) == [
+        mode_command(1), {"Controls": dict(PULSES_OFF, StartM=1)}, mode_command(2)]
+
+def test_repeated_start_logging_sends_the_pulse_each_time(widget):
+    widget.jsonHandlerObj.resync_commands()
+    widget.start_logging()
+    widget.start_logging()
+    commands = written_commands(widget.serial_thread)
+    assert [command["Expert procedures"]["Logging"] for command in commands] == [1, 1]
+
+def test_write_error_resyncs(widget):
+    handler = widget.jsonHandlerObj
+    handler.command(handler.json_to_send_controls)
+    widget.serial_thread.write_failed.emit("device disconnected")
+    assert handler.command_state == {}
+    select_modes(widget, 2)
+    assert handler.last_delta is None
+
+def test_widget_on_a_replay(tmp_path):
+    from Replay import ReplayThread
+    app, widget = make_widget(ReplayThread(str(tmp_path / "capture.jsonl")))
+    widget.on_combobox_mode_changed()
+    close_widget(app, widget)
@@ -0,0 +1,14 @@
+from LoggingWriter import LoggingWriter
+
+def test_workers_start_with_the_first_burst(tmp_path):
+    writer = LoggingWriter(str(tmp_path), processes=1)
+    assert writer.pool.executor is None
+    writer.stop()
+    assert writer.pool.executor is None
+
+def test_stop_without_a_burst_stops_the_workers(tmp_path):
+    writer = LoggingWriter(str(tmp_path), processes=1)
+    writer.pool.start()
+    writer.stop()
+    assert writer.pool.executor is None
+    assert not writer.isRunning()
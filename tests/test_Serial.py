@@ -0,0 +1,96 @@
+import json
+from Serial import FrameParser
+
+CONTROLS = {"Controls": {"state": 2, "yawAngle": 12.5, "warninglevel": 0,
+                         "yawAngleStdDeviation": 0.04, "errorAxis1": 0, "errorAxis2": 0}}
+LINE = (json.dumps(CONTROLS) + "\n").encode("latin-1")
+
+def feed_in_chunks(parser, data, chunk_size=4096):
+    frames = []
+    for start in range(0, len(data), chunk_size):
+        frames.extend(parser.feed(data[start:start + chunk_size])[0])
+    return frames
+
+def test_logging_burst_longer_than_max_line_bytes():
+    values = [0.123456789, 1.5] * 20000
+    burst = (json.dumps({"Logging": values}) + "\n").encode("latin-1")
+    assert len(burst) > 4 * FrameParser().max_line_bytes
+    parser = FrameParser()
+    frames = feed_in_chunks(parser, LINE + burst + LINE)
+    assert [next(iter(frame)) for frame in frames] == ["Controls", "Logging", "Controls"]
+    assert frames[1]["Logging"] == values
+    assert parser.errors == {"framing": 0, "decode": 0, "schema": 0}
+
+def test_noise_before_a_frame_is_skipped():
+    parser = FrameParser()
+    frames, blocks = parser.feed(b"\xff\x00" + LINE + b"garbage\n" + LINE)
+    assert frames == [CONTROLS, CONTROLS]
+    assert parser.errors == {"framing": 2, "decode": 0, "schema": 0}
+
+def test_lost_newline_keeps_both_frames():
+    parser = FrameParser()
+    frames, blocks = parser.feed(LINE[:-1] + LINE)
+    assert frames == [CONTROLS, CONTROLS]
+    assert parser.errors["framing"] == 1
+
+def test_broken_and_unknown_frames_are_counted():
+    parser = FrameParser()
+    misspelt = LINE.replace(b'"yawAngle"', b'"yawAngel"')
+    frames, blocks = parser.feed(LINE[:22] + LINE[29:] + misspelt + LINE)
+    assert frames == [CONTROLS]
+    assert parser.errors == {"framing": 0, "decode": 1, "schema": 1}
+    assert parser.error_counts()["frames"] == 1
+
+def test_over_long_line_is_dropped_up_to_the_next_newline():
+    parser = FrameParser(max_line_bytes=1024)
+    frames = feed_in_chunks(parser, LINE + b"{" + b"x" * 5000 + b"}\n" + LINE, chunk_size=256)
+    assert frames == [CONTROLS, CONTROLS]
+    assert parser.errors == {"framing": 1, "decode": 0, "schema": 0}
+
+def test_frame_split_over_reads():
+    parser = FrameParser()
+    assert feed_in_chunks(parser, LINE * 3, chunk_size=7) == [CONTROLS] * 3
+
+class FakePort:
+    """
+    Stands in for serial.Serial: records what SerialThread.flush_tx() writes.
+    """
+    is_open = True
+
+    def __init__(self):
+        self.written = []
+
+    def cancel_read(self):
+        pass
+
+    def write(self, data):
+        self.written.append(data)
+
+def queued_thread():
+    from Serial import SerialThread
+    thread = SerialThread()
+    thread.serial = FakePort()
+    return thread
+
+def test_write_to_serial_coalesces_at_the_tail_only():
+    thread = queued_thread()
+    thread.write_to_serial("a1", key="Mode")
+    thread.write_to_serial("a2", key="Mode")
+    thread.write_to_serial("start")
+    thread.write_to_serial("a3", key="Mode")
+    thread.flush_tx()
+    assert thread.serial.written == [b"a2starta3"]
+    assert thread.tx_coalesced == 1 and thread.tx_written == 3
+
+def test_write_error_is_reported():
+    import serial
+    thread = queued_thread()
+    errors = []
+    thread.write_failed.connect(errors.append)
+
+    def fail(data):
+        raise serial.SerialException("gone")
+    thread.serial.write = fail
+    thread.write_to_serial("a")
+    thread.flush_tx()
+    assert errors == ["gone"] and thread.tx_written == 0
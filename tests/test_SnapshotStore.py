@@ -0,0 +1,46 @@
+import json
+from SnapshotStore import SnapshotStore
+
+GENERAL = {"General settings": {"Write general settings": 0, "maxVoltage": 10.0, "yawOffset": 1.5}}
+CONTROL = {"Control settings": {"Write control settings": 0, "prefilterNumerator": [0.1, 0.2, 0.3, 0.4]}}
+
+def test_round_trip(tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshots.sqlite"))
+    first = store.save([GENERAL, CONTROL], tag="axis 2", note="tuned", created=1000.0)
+    changed = json.loads(json.dumps(GENERAL))
+    changed["General settings"]["maxVoltage"] = 8.0
+    second = store.save([changed, CONTROL], tag="axis 2", created=2000.0)
+    store.close()
+
+    store = SnapshotStore(str(tmp_path / "snapshots.sqlite"))
+    assert store.load(first) == dict(GENERAL, **CONTROL)
+    assert [row[0] for row in store.list(tag="axis 2")] == [second, first]
+    assert store.list(tag="other") == []
+    assert store.diff(first, second) == [("General settings", "maxVoltage", 10.0, 8.0)]
+    store.delete(first)
+    assert not store.exists(first) and store.count() == 1
+    try:
+        store.load(first)
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("load() of a deleted snapshot must raise KeyError")
+    store.close()
+
+def test_export(tmp_path):
+    store = SnapshotStore(":memory:")
+    snapshot_id = store.save([GENERAL], tag="t")
+    store.export(snapshot_id, str(tmp_path / "snapshot.json"))
+    with open(tmp_path / "snapshot.json") as json_file:
+        exported = json.load(json_file)
+    assert exported["sections"] == GENERAL and exported["tag"] == "t"
+
+def test_export_of_an_unknown_snapshot(tmp_path):
+    store = SnapshotStore(":memory:")
+    try:
+        store.export(42, str(tmp_path / "snapshot.json"))
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("export() of an unknown snapshot must raise KeyError")
+    assert not (tmp_path / "snapshot.json").exists()
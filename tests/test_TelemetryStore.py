@@ -0,0 +1,33 @@
+import numpy as np
+from TelemetryStore import TelemetryStore
+
+FIELDS = [("a", np.int64), ("b", np.float64)]
+
+def test_append_wraps_around():
+    store = TelemetryStore(FIELDS, capacity=4)
+    for i in range(10):
+        store.append((i, i / 2))
+    assert len(store) == 4 and store.count == 10
+    assert store.window("a").tolist() == [6, 7, 8, 9]
+    assert store.window("b", 2).tolist() == [4.0, 4.5]
+    assert store.latest("a") == 9
+    assert store.latest_row()["b"] == 4.5
+
+def test_extend_across_the_end_of_the_ring():
+    store = TelemetryStore(FIELDS, capacity=5)
+    store.extend([(i, 0.0) for i in range(3)])
+    store.extend([(i, 0.0) for i in range(3, 7)])
+    assert store.window("a").tolist() == [2, 3, 4, 5, 6]
+    store.extend([(i, 0.0) for i in range(7, 20)])
+    assert store.window("a").tolist() == [15, 16, 17, 18, 19]
+    assert store.count == 20
+
+def test_empty_store():
+    store = TelemetryStore(FIELDS, capacity=3)
+    assert len(store) == 0 and store.window("a").tolist() == []
+    try:
+        store.latest("a")
+    except IndexError:
+        pass
+    else:
+        raise AssertionError("latest() of an empty store must raise IndexError")
@@ -5,24 +5,43 @@ from PySide6.QtWidgets import (
     QGridLayout, QCheckBox,
     QPushButton, QSpinBox,
     QDoubleSpinBox, QComboBox,
-    QFrame, QMessageBox
+    QFrame, QMessageBox,
+    QTableWidget, QTableWidgetItem
     )
 from PySide6.QtCore import Qt, QTimer
-from PySide6.QtGui import QIcon, QFont
+from PySide6.QtGui import QIcon, QFont, QPalette, QColor
 from datetime import datetime
-from Serial import SerialThread
+from Serial import SerialThread, FrameParser
 from JSONHandler import JSONHandler
-import json
+from LivePlot import LivePlot, SpectrumPlot
+from LoggingWriter import LoggingWriter
+from TelemetryRecorder import TelemetryRecorder
+from Diagnostics import LatencyMonitor
+from RollingStatistics import RollingStatistics
+from SettingsBinding import SettingsBinding
+from SnapshotStore import SnapshotStore, RESTORED_SECTIONS, WRITTEN_SECTIONS
+import copy
+import time
 
 class Widget(QWidget):
-    def __init__(self):
+    def __init__(self, data_source=None, ui_refresh_hz=30, logging_processes=0, lazy_tabs=False,
+                 history_directory=None, snapshot_path="settings_snapshots.sqlite"):
         """
         Initializes the widget.
 
         This method sets up the window title, geometry, layout, tab widget, and adds tabs to the widget.
 
         Args:
-            None
+            data_source: Thread providing telemetry (SerialThread or ReplayThread).
+                Defaults to a SerialThread on the controller port.
+            ui_refresh_hz (int): Rate at which the acquisition widgets are refreshed from the latest telemetry.
+            logging_processes (int): Worker processes writing "Logging" bursts; 0 uses the writer thread.
+            lazy_tabs (bool): Build the settings, expert and diagnostics tabs the first time
+                they are shown instead of before the window opens.
+            history_directory (str): Folder the telemetry is also kept in on disk
+                (see HistoryStore); None keeps it in memory only.
+            snapshot_path (str): Settings snapshot database, opened on the first save or
+                listing (see SnapshotStore).
 
         Returns:
             None
@@ -41,26 +60,80 @@ class Widget(QWidget):
         
         self.setup_tabs()
         
-        self.jsonHandlerObj = JSONHandler()
+        self.jsonHandlerObj = JSONHandler(logging_processes=logging_processes, history_directory=history_directory)
+
+        # Telemetry only marks the display dirty; the timer repaints at most ui_refresh_hz times per second.
+        self.display_dirty = False
+        self.displayed_values = {}
+        self.led_palettes = {}
+        self.led_colors = {}
+        self.ui_refresh_timer = QTimer(self)
+        self.ui_refresh_timer.setInterval(int(1000 / ui_refresh_hz))
+        self.ui_refresh_timer.timeout.connect(self.update_acquisition_display)
+        self.ui_refresh_timer.start()
+
+        # Pipeline latency, from serial read to the widgets showing the value
+        self.latency = LatencyMonitor()
+        # (read_ns, stored_ns) of the oldest frame stored but not yet displayed
+        self.pending_display = None
+        self.snapshot_path = snapshot_path
+        self.snapshot_store = None
 
         self.create_tab_controls_ui()
-        self.create_tab_general_settings_ui()
-        self.create_tab3_control_settings_ui()
-        self.create_tab4_expert_procedures_ui()
-
-        self.serial_thread = SerialThread()
+        # Tab -> builder, removed once the tab is built
+        self.tab_builders = {
+            self.tab2: self.create_tab_general_settings_ui,
+            self.tab3: self.create_tab3_control_settings_ui,
+            self.tab4: self.create_tab4_expert_procedures_ui,
+            self.tab5: self.create_tab5_diagnostics_ui,
+            self.tab6: self.create_tab6_snapshots_ui,
+        }
+        self.tab_widget.currentChanged.connect(self.on_tab_changed)
+        if not lazy_tabs:
+            self.build_all_tabs()
+
+        self.serial_thread = data_source if data_source is not None else SerialThread(batch_interval_ms=20)
+        self.serial_thread.latency = self.latency
         self.serial_thread.data_received.connect(self.handle_serial_data)
+        self.serial_thread.batch_received.connect(self.handle_serial_batch)
+        self.serial_thread.write_failed.connect(self.on_write_failed)
 
     def setup_tabs(self):
         self.tab1 = QWidget()
         self.tab2 = QWidget()
         self.tab3 = QWidget()
         self.tab4 = QWidget()
+        self.tab5 = QWidget()
+        self.tab6 = QWidget()
 
         self.tab_widget.addTab(self.tab1, "Controls")
         self.tab_widget.addTab(self.tab2, "General settings")
         self.tab_widget.addTab(self.tab3, "Control settings")
         self.tab_widget.addTab(self.tab4, "Expert procedures")
+        self.tab_widget.addTab(self.tab5, "Diagnostics")
+        self.tab_widget.addTab(self.tab6, "Snapshots")
+
+    def on_tab_changed(self, index):
+        tab = self.tab_widget.widget(index)
+        self.build_tab(tab)
+        if tab is self.tab6:
+            # The snapshot database is only opened once the list is looked at
+            self.refresh_snapshots()
+
+    def build_tab(self, tab):
+        """
+        Builds a tab's widgets if that has not been done yet.
+
+        Args:
+            tab (QWidget): One of tab2 to tab5.
+        """
+        builder = self.tab_builders.pop(tab, None)
+        if builder is not None:
+            builder()
+
+    def build_all_tabs(self):
+        for tab in list(self.tab_builders):
+            self.build_tab(tab)
 
     # -- Methods tab 1 -- #
     def create_tab_controls_ui(self):
@@ -80,12 +153,16 @@ class Widget(QWidget):
         self.create_motion_control_section(layout)
         # Acquisition
         self.create_acquisition_section(layout)
+        # Yaw statistics
+        self.create_statistics_section(layout)
         # Errors
-        self.create_errors_section(layout, self.jsonHandlerObj.warning_level_list[-1])
+        self.create_errors_section(layout, self.jsonHandlerObj.latest("warning_level_list", 0))
         # Error reset
         self.create_error_reset_section(layout)
         # Serial Connection
         self.create_serial_connection_section(layout)
+        # Live plots
+        self.create_plot_section(layout)
 
     def create_control_mode_section(self, layout):
         """
@@ -159,6 +236,72 @@ class Widget(QWidget):
         self.info_yaw_std.setReadOnly(True)
         layout.addWidget(self.info_yaw_std, 10, 1)
 
+    def create_statistics_section(self, layout):
+        """
+        Creates the rolling yaw angle statistics section.
+
+        Args:
+            layout: Layout for the Controls tab.
+
+        Returns:
+            None
+        """
+        self.yaw_statistics = RollingStatistics(self.jsonHandlerObj.controls_store, "yaw_angle_list")
+        statistics_layout = QGridLayout()
+        statistics_layout.addWidget(QLabel("<b>Yaw statistics</b>"), 0, 0)
+        statistics_layout.addWidget(QLabel("Window (samples)"), 0, 2)
+        self.statistics_window = QSpinBox()
+        self.statistics_window.setRange(self.yaw_statistics.block_size, self.jsonHandlerObj.controls_store.capacity)
+        self.statistics_window.setSingleStep(1000)
+        self.statistics_window.setValue(self.yaw_statistics.window)
+        self.statistics_window.editingFinished.connect(self.on_statistics_window_changed)
+        statistics_layout.addWidget(self.statistics_window, 0, 3)
+        self.info_statistics = {}
+        names = ["Mean", "Std", "Min / Max", "Peak-to-peak", "Drift", "Peak frequency"]
+        for index, name in enumerate(names):
+            row, col = index % 3 + 1, index // 3 * 2
+            statistics_layout.addWidget(QLabel(name), row, col)
+            line_edit = QLineEdit()
+            line_edit.setReadOnly(True)
+            statistics_layout.addWidget(line_edit, row, col + 1)
+            self.info_statistics[name] = line_edit
+        layout.addLayout(statistics_layout, 7, 2, 4, 3)
+
+    def on_statistics_window_changed(self):
+        """
+        Restarts the yaw statistics over the new window.
+        """
+        if self.statistics_window.value() != self.yaw_statistics.window:
+            self.yaw_statistics.set_window(self.statistics_window.value())
+            # Rounded up to whole min/max blocks
+            self.statistics_window.setValue(self.yaw_statistics.window)
+            self.display_dirty = True
+
+    def update_statistics_display(self):
+        """
+        Folds the new yaw samples into the rolling statistics and shows them.
+        """
+        self.yaw_statistics.update()
+        statistics = self.yaw_statistics.statistics()
+        if not statistics:
+            return
+        unit = statistics["drift_unit"]
+        values = {
+            "Mean": f"{statistics['mean']:.4f}",
+            "Std": f"{statistics['std']:.4f}",
+            "Min / Max": f"{statistics['min']:.4f} / {statistics['max']:.4f}",
+            "Peak-to-peak": f"{statistics['peak_to_peak']:.4f}",
+            "Drift": f"{statistics['drift']:.4g} urad {unit}",
+        }
+        spectrum = self.yaw_statistics.update_spectrum()
+        if spectrum is not None and spectrum is not self.shown_spectrum:
+            self.shown_spectrum = spectrum
+            frequency_unit = "Hz" if unit == "per s" else "cycles/sample"
+            values["Peak frequency"] = f"{spectrum['peak_frequency']:.4g} {frequency_unit} ({spectrum['peak_amplitude']:.3g} urad)"
+            self.plot_yaw_spectrum.set_spectrum(spectrum["frequencies"], spectrum["amplitudes"])
+        for name, text in values.items():
+            self.set_text_if_changed(self.info_statistics[name], text)
+
     def create_errors_section(self, layout, warning_level):
         """
         Creates Errors section.
@@ -186,22 +329,11 @@ class Widget(QWidget):
         Returns:
             None
         """
-        self.led_head_error_1 = QFrame()
-        self.led_head_error_1.setFixedSize(15, 15)
-        self.led_head_error_1.setFrameShape(QFrame.StyledPanel)
-
-        self.led_head_error_2 = QFrame()
-        self.led_head_error_2.setFixedSize(15, 15)
-        self.led_head_error_2.setFrameShape(QFrame.StyledPanel)
+        self.led_head_error_1 = self.create_led()
+        self.led_head_error_2 = self.create_led()
+        self.led_unstable_interferometer = self.create_led()
+        self.set_led_unstable_interferometer_color(warning_level)
 
-        self.led_unstable_interferometer = QFrame()
-        self.led_unstable_interferometer.setFixedSize(15, 15)
-        self.led_unstable_interferometer.setFrameShape(QFrame.StyledPanel)
-        if (warning_level == 1):
-            self.led_unstable_interferometer.setStyleSheet("background-color: red")
-        else:
-            self.led_unstable_interferometer.setStyleSheet("background-color: white")
-            
         layout.addWidget(self.led_head_error_1, 12, 1)
         layout.addWidget(self.led_head_error_2, 13, 1)
         layout.addWidget(self.led_unstable_interferometer, 12, 3)
@@ -245,6 +377,82 @@ class Widget(QWidget):
         self.button_connect_serial.setEnabled(True)
         self.button_disconnect_serial.setEnabled(False)
 
+        self.checkbox_record_telemetry = QCheckBox("Record telemetry")
+        layout.addWidget(self.checkbox_record_telemetry, 15, 0)
+        self.label_recorder_status = QLabel("")
+        layout.addWidget(self.label_recorder_status, 15, 4)
+        self.recorder = None
+        layout.addWidget(QLabel("Link errors/s"), 14, 0)
+        self.label_frame_errors = QLabel("")
+        layout.addWidget(self.label_frame_errors, 14, 1, 1, 4)
+        # (parser, error counts, time) at the last status update, and the rates since
+        self.frame_error_sample = None
+        self.frame_error_rates = {}
+        self.status_timer = QTimer(self)
+        self.status_timer.setInterval(1000)
+        self.status_timer.timeout.connect(self.update_status)
+        self.status_timer.start()
+
+    def update_status(self):
+        """
+        Shows the link error rates and the telemetry recorder counters, once per second.
+        """
+        self.update_frame_errors()
+        if self.recorder is None:
+            return
+        stats = self.recorder.stats()
+        self.label_recorder_status.setText(
+            f"Recorded {stats['written']} frames, {stats['bytes_written'] / 1e6:.1f} MB, "
+            f"dropped {stats['dropped']}, queue {stats['queue_depth']}/{stats['queue_capacity']}")
+
+    def update_frame_errors(self):
+        """
+        Computes the frames and the framing, decode and schema errors per second
+        from the counters of the data source's FrameParser.
+        """
+        parser = getattr(self.serial_thread, "parser", None)
+        if parser is None:
+            self.frame_error_sample = None
+            self.frame_error_rates = {}
+            self.label_frame_errors.setText("")
+            return
+        now = time.monotonic()
+        counts = parser.error_counts()
+        if self.frame_error_sample is not None and self.frame_error_sample[0] is parser:
+            _, last_counts, last_time = self.frame_error_sample
+            elapsed = max(now - last_time, 1e-3)
+            self.frame_error_rates = {kind: (counts[kind] - last_counts[kind]) / elapsed for kind in counts}
+        self.frame_error_sample = (parser, counts, now)
+        if self.frame_error_rates:
+            rates = self.frame_error_rates
+            self.label_frame_errors.setText(", ".join(f"{kind} {rates[kind]:.0f}" for kind in FrameParser.ERRORS))
+
+    def create_plot_section(self, layout):
+        """
+        Creates the live plots of yaw angle, yaw std and axis errors.
+
+        Args:
+            layout: Layout for the Controls tab.
+
+        Returns:
+            None
+        """
+        layout.addWidget(QLabel("<b>Live plots</b>"), 16, 0)
+        store = self.jsonHandlerObj.controls_store
+        self.plot_yaw_angle = LivePlot("Yaw angle (urad)")
+        self.plot_yaw_angle.add_trace(store, "yaw_angle_list", "blue")
+        self.plot_yaw_std = LivePlot("Yaw std (urad)")
+        self.plot_yaw_std.add_trace(store, "yaw_std_list", "darkgreen")
+        self.plot_axis_errors = LivePlot("Head errors 1 (red) / 2 (orange)")
+        self.plot_axis_errors.add_trace(store, "error_axis1_list", "red")
+        self.plot_axis_errors.add_trace(store, "error_axis2_list", "orange")
+        self.live_plots = [self.plot_yaw_angle, self.plot_yaw_std, self.plot_axis_errors]
+        for row, plot in enumerate(self.live_plots, start=17):
+            layout.addWidget(plot, row, 0, 1, 5)
+        self.plot_yaw_spectrum = SpectrumPlot("Yaw angle spectrum (urad)")
+        self.shown_spectrum = None
+        layout.addWidget(self.plot_yaw_spectrum, 17 + len(self.live_plots), 0, 1, 5)
+
     def start_motion(self):
         """
         Method to handle starting motion.
@@ -255,9 +463,9 @@ class Widget(QWidget):
         self.jsonHandlerObj.json_to_send_controls["Controls"]["StopM"] = 0
         self.jsonHandlerObj.json_to_send_controls["Controls"]["SP (V/urad)"] = setpoint_value
         self.jsonHandlerObj.json_to_send_controls["Controls"]["Mode"] = combo_box_value
-        self.serial_thread.write_to_serial(json.dumps(self.jsonHandlerObj.json_to_send_controls))
+        self.serial_thread.write_to_serial(self.jsonHandlerObj.command(self.jsonHandlerObj.json_to_send_controls))
         self.jsonHandlerObj.json_to_send_controls["Controls"]["StartM"] = 0
-        self.serial_thread.write_to_serial(json.dumps(self.jsonHandlerObj.json_to_send_controls))
+        self.serial_thread.write_to_serial(self.jsonHandlerObj.command(self.jsonHandlerObj.json_to_send_controls))
 
     def stop_motion(self):
         """
@@ -269,38 +477,78 @@ class Widget(QWidget):
         self.jsonHandlerObj.json_to_send_controls["Controls"]["StopM"] = 1
         self.jsonHandlerObj.json_to_send_controls["Controls"]["SP (V/urad)"] = setpoint_value
         self.jsonHandlerObj.json_to_send_controls["Controls"]["Mode"] = combo_box_value
-        self.serial_thread.write_to_serial(json.dumps(self.jsonHandlerObj.json_to_send_controls))
+        self.serial_thread.write_to_serial(self.jsonHandlerObj.command(self.jsonHandlerObj.json_to_send_controls))
         self.jsonHandlerObj.json_to_send_controls["Controls"]["StopM"] = 0
-        self.serial_thread.write_to_serial(json.dumps(self.jsonHandlerObj.json_to_send_controls))
+        self.serial_thread.write_to_serial(self.jsonHandlerObj.command(self.jsonHandlerObj.json_to_send_controls))
     
     def reset_control_protection(self):
         """
         Method to handle reset control protection.
         """
         self.jsonHandlerObj.json_to_send_controls["Controls"]["Re contr prot"] = 1
-        self.serial_thread.write_to_serial(json.dumps(self.jsonHandlerObj.json_to_send_controls))
+        self.serial_thread.write_to_serial(self.jsonHandlerObj.command(self.jsonHandlerObj.json_to_send_controls))
         self.jsonHandlerObj.json_to_send_controls["Controls"]["Re contr prot"] = 0
-        self.serial_thread.write_to_serial(json.dumps(self.jsonHandlerObj.json_to_send_controls))
+        self.serial_thread.write_to_serial(self.jsonHandlerObj.command(self.jsonHandlerObj.json_to_send_controls))
     
     '''def reset_interferometer_protection(self):
         """
         Method to handle reset interferometer protection.
         """
         self.jsonHandlerObj.json_to_send_controls["Controls"]["Re intf prot"] = 1
-        self.serial_thread.write_to_serial(json.dumps(self.jsonHandlerObj.json_to_send_controls))
+        self.serial_thread.write_to_serial(self.jsonHandlerObj.command(self.jsonHandlerObj.json_to_send_controls))
         self.jsonHandlerObj.json_to_send_controls["Controls"]["Re intf prot"] = 0'''
 
+    def create_led(self):
+        """
+        Creates an LED indicator whose colour is driven by its palette.
+
+        Returns:
+            QFrame: The LED widget.
+        """
+        led = QFrame()
+        led.setFixedSize(15, 15)
+        led.setFrameShape(QFrame.StyledPanel)
+        led.setAutoFillBackground(True)
+        return led
+
+    def set_led_color(self, led, color):
+        """
+        Sets the colour of an LED indicator.
+
+        Palettes are built once per colour and only applied when the colour changes,
+        which avoids the style sheet parse and re-polish of setStyleSheet.
+
+        Args:
+            led (QFrame): LED created by create_led.
+            color (str): Colour name, e.g. "red".
+        """
+        if self.led_colors.get(led) == color:
+            return
+        palette = self.led_palettes.get(color)
+        if palette is None:
+            palette = QPalette(led.palette())
+            palette.setColor(QPalette.Window, QColor(color))
+            self.led_palettes[color] = palette
+        led.setPalette(palette)
+        self.led_colors[led] = color
+
     def set_led_head_error_1_color(self, error_signal):
         if (error_signal == "0"):
-            self.led_head_error_1.setStyleSheet("background-color: " + "green")
+            self.set_led_color(self.led_head_error_1, "green")
         else:
-            self.led_head_error_1.setStyleSheet("background-color: " + "red")
+            self.set_led_color(self.led_head_error_1, "red")
     
     def set_led_head_error_2_color(self, error_signal):
         if (error_signal == "0"):
-            self.led_head_error_2.setStyleSheet("background-color: " + "green")
+            self.set_led_color(self.led_head_error_2, "green")
         else:
-            self.led_head_error_2.setStyleSheet("background-color: " + "red")
+            self.set_led_color(self.led_head_error_2, "red")
+
+    def set_led_unstable_interferometer_color(self, warning_level):
+        if (warning_level == 1):
+            self.set_led_color(self.led_unstable_interferometer, "red")
+        else:
+            self.set_led_color(self.led_unstable_interferometer, "white")
 
     def on_combobox_mode_changed(self):
         """
@@ -310,7 +558,18 @@ class Widget(QWidget):
         print(f"Combobox changed: {selected_item}")
         combo_box_value = self.handle_selection_mode(selected_item)
         self.jsonHandlerObj.json_to_send_controls["Controls"]["Mode"] = combo_box_value
-        self.serial_thread.write_to_serial(json.dumps(self.jsonHandlerObj.json_to_send_controls))
+        # Only the last of several quick mode changes needs to reach the controller.
+        # Full commands and deltas carrying other changes must all be sent.
+        command = self.jsonHandlerObj.command(self.jsonHandlerObj.json_to_send_controls)
+        coalesce = self.jsonHandlerObj.last_delta == {"Mode"}
+        self.serial_thread.write_to_serial(command, key="Mode" if coalesce else None)
+
+    def on_write_failed(self, error):
+        """
+        Method to be executed when queued commands could not be written.
+        The controller state is unknown, so the next commands are sent in full.
+        """
+        self.jsonHandlerObj.resync_commands()
            
     def handle_selection_mode(self, selection):
         if selection == "Standby":
@@ -326,14 +585,29 @@ class Widget(QWidget):
             print("Unknown mode selected.")
 
     def connect_serial(self):
+        # The controller state is unknown until the first full command of each section
+        self.jsonHandlerObj.resync_commands()
+        if self.checkbox_record_telemetry.isChecked():
+            self.recorder = TelemetryRecorder()
+            self.recorder.start()
+            self.serial_thread.recorder = self.recorder
         self.serial_thread.start()
         self.button_connect_serial.setEnabled(False)
         self.button_disconnect_serial.setEnabled(True)
+        self.checkbox_record_telemetry.setEnabled(False)
 
     def disconnect_serial(self):
         self.serial_thread.stop()
+        if self.serial_thread.recorder is not None:
+            # Let the reader finish before the recorder flushes and closes its file
+            self.serial_thread.wait()
+            self.serial_thread.recorder = None
+            self.recorder.stop()
+            self.update_status()
+            print("Telemetry recorder:", self.recorder.stats())
         self.button_connect_serial.setEnabled(True)
         self.button_disconnect_serial.setEnabled(False)
+        self.checkbox_record_telemetry.setEnabled(True)
 
     # -- Methods Tab 2 -- #
     def create_tab_general_settings_ui(self):
@@ -393,6 +667,20 @@ class Widget(QWidget):
         self.info_max_pid_limit = self.create_spin_box()
         self.add_widget(layout, self.info_max_pid_limit, 12, 1)
 
+        self.general_settings_binding = SettingsBinding("General settings", self.jsonHandlerObj.json_to_send_general_settings)
+        for widget, key in [
+            (self.info_yaw_offset, "yawOffset"),
+            (self.info_aar_offset, "AAROffset"),
+            (self.checkbox_control_instability_protection, "controlInstabilityProtection"),
+            (self.info_min_voltage, "minVoltage"),
+            (self.info_max_voltage, "maxVoltage"),
+            (self.info_open_loop_max_speed, "openLoopMaxSpeed"),
+            (self.info_closed_loop_max_speed, "closedLoopMaxSpeed"),
+            (self.info_min_pid_limit, "minPIDLimit"),
+            (self.info_max_pid_limit, "maxPIDLimit"),
+        ]:
+            self.general_settings_binding.bind(widget, key)
+
         # -- Buttons Send/Read -- #
         button_read_settings = QPushButton("Read Settings")
         button_read_settings.clicked.connect(self.read_settings_general_settings_tab)
@@ -402,6 +690,9 @@ class Widget(QWidget):
         button_write_settings.clicked.connect(self.write_settings_general_settings_tab)
         layout.addWidget(button_write_settings, 13, 3)
 
+        self.label_general_settings_status = QLabel("")
+        layout.addWidget(self.label_general_settings_status, 14, 0, 1, 4)
+
     def add_label(self, layout, text, row, col):
         label = QLabel(text)
         layout.addWidget(label, row, col)
@@ -422,35 +713,17 @@ class Widget(QWidget):
         return checkbox
 
     def read_settings_general_settings_tab(self):
-        self.info_yaw_offset.setValue(float(self.jsonHandlerObj.yaw_offset_list[-1]))
-        self.info_aar_offset.setValue(float(self.jsonHandlerObj.aar_offset_list[-1]))
-        if (self.jsonHandlerObj.control_instability_protection_list[-1] == 1):
-            self.checkbox_control_instability_protection.setChecked(True)
-        else:
-            self.checkbox_control_instability_protection.setChecked(False)
-        self.info_min_voltage.setValue(float(self.jsonHandlerObj.min_voltage_list[-1]))
-        self.info_max_voltage.setValue(float(self.jsonHandlerObj.max_voltage_list[-1]))
-        self.info_open_loop_max_speed.setValue(float(self.jsonHandlerObj.open_loop_max_speed_list[-1]))
-        self.info_closed_loop_max_speed.setValue(float(self.jsonHandlerObj.closed_loop_max_speed_list[-1]))
-        self.info_min_pid_limit.setValue(float(self.jsonHandlerObj.min_PID_limit_list[-1]))
-        self.info_max_pid_limit.setValue(float(self.jsonHandlerObj.max_PID_limit_list[-1]))
+        if not self.general_settings_binding.read(self.jsonHandlerObj.general_settings_store):
+            self.label_general_settings_status.setText("No general settings received yet.")
+            return
+        self.label_general_settings_status.setText(self.general_settings_binding.status())
 
     def write_settings_general_settings_tab(self):
         self.jsonHandlerObj.json_to_send_general_settings["General settings"]["Write general settings"] = 1
-        self.jsonHandlerObj.json_to_send_general_settings["General settings"]["yawOffset"] = self.info_yaw_offset.value()
-        self.jsonHandlerObj.json_to_send_general_settings["General settings"]["AAROffset"] = self.info_aar_offset.value()
-        if (self.checkbox_control_instability_protection.isChecked() == True):
-            self.jsonHandlerObj.json_to_send_general_settings["General settings"]["controlInstabilityProtection"] = 1
-        else:
-            self.jsonHandlerObj.json_to_send_general_settings["General settings"]["controlInstabilityProtection"] = 0
-        self.jsonHandlerObj.json_to_send_general_settings["General settings"]["minVoltage"] = self.info_min_voltage.value()
-        self.jsonHandlerObj.json_to_send_general_settings["General settings"]["maxVoltage"] = self.info_max_voltage.value()
-        self.jsonHandlerObj.json_to_send_general_settings["General settings"]["openLoopMaxSpeed"] = self.info_open_loop_max_speed.value()
-        self.jsonHandlerObj.json_to_send_general_settings["General settings"]["closedLoopMaxSpeed"] = self.info_closed_loop_max_speed.value()
-        self.jsonHandlerObj.json_to_send_general_settings["General settings"]["minPIDLimit"] = self.info_min_pid_limit.value()
-        self.jsonHandlerObj.json_to_send_general_settings["General settings"]["maxPIDLimit"] = self.info_max_pid_limit.value()
-        self.serial_thread.write_to_serial(json.dumps(self.jsonHandlerObj.json_to_send_general_settings))
+        self.general_settings_binding.write()
+        self.serial_thread.write_to_serial(self.jsonHandlerObj.command(self.jsonHandlerObj.json_to_send_general_settings))
         self.jsonHandlerObj.json_to_send_general_settings["General settings"]["Write general settings"] = 0
+        self.label_general_settings_status.setText(self.general_settings_binding.status())
 
     # -- Methods Tab 3 -- #
     def create_tab3_control_settings_ui(self):
@@ -647,6 +920,37 @@ class Widget(QWidget):
         self.info_k_parameters_arg2.setDecimals(3)
         layout.addWidget(self.info_k_parameters_arg2, 17, 2)
 
+        self.control_settings_binding = SettingsBinding("Control settings", self.jsonHandlerObj.json_to_send_control_settings)
+        for widget, key, index in [
+            (self.info_prefilter_numerator_arg1, "prefilterNumerator", 0),
+            (self.info_prefilter_numerator_arg2, "prefilterNumerator", 1),
+            (self.info_prefilter_numerator_arg3, "prefilterNumerator", 2),
+            (self.info_prefilter_numerator_arg4, "prefilterNumerator", 3),
+            (self.info_prefilter_denominator_arg1, "prefilterDenominator", 0),
+            (self.info_prefilter_denominator_arg2, "prefilterDenominator", 1),
+            (self.info_filter_1_numerator_arg1, "filter1Numerator", 0),
+            (self.info_filter_1_numerator_arg2, "filter1Numerator", 1),
+            (self.info_filter_1_numerator_arg3, "filter1Numerator", 2),
+            (self.info_filter_1_numerator_arg4, "filter1Numerator", 3),
+            (self.info_filter_1_denominator_arg1, "filter1Denominator", 0),
+            (self.info_filter_1_denominator_arg2, "filter1Denominator", 1),
+            (self.info_filter_2_numerator_arg1, "filter2Numerator", 0),
+            (self.info_filter_2_numerator_arg2, "filter2Numerator", 1),
+            (self.info_filter_2_denominator_arg1, "filter2Denominator", None),
+            (self.info_filter_3_numerator_arg1, "filter3Numerator", 0),
+            (self.info_filter_3_numerator_arg2, "filter3Numerator", 1),
+            (self.info_filter_3_denominator_arg1, "filter3Denominator", None),
+            (self.checkbox_hysteresis_compensation, "hysteresisCompensation", None),
+            (self.info_compensation_offset_arg1, "compensationOffset", None),
+            (self.info_quadratic_parameters_arg1, "quadraticParameters", 0),
+            (self.info_quadratic_parameters_arg2, "quadraticParameters", 1),
+            (self.info_f_parameters_arg1, "fParameters", 0),
+            (self.info_f_parameters_arg2, "fParameters", 1),
+            (self.info_k_parameters_arg1, "kParameters", 0),
+            (self.info_k_parameters_arg2, "kParameters", 1),
+        ]:
+            self.control_settings_binding.bind(widget, key, index)
+
         # -- Buttons Send/Read -- #
         button_read_settings = QPushButton("Read Settings")
         button_read_settings.clicked.connect(self.read_settings_control_settings_tab)
@@ -655,89 +959,22 @@ class Widget(QWidget):
         button_write_settings = QPushButton("Write settings")
         button_write_settings.clicked.connect(self.write_settings_control_settings_tab)
         layout.addWidget(button_write_settings, 18, 5)
+
+        self.label_control_settings_status = QLabel("")
+        layout.addWidget(self.label_control_settings_status, 19, 0, 1, 6)
     
     def read_settings_control_settings_tab(self):
-        # read prefilter
-        self.info_prefilter_numerator_arg1.setValue(float(self.jsonHandlerObj.prefilter_numerator_arg1[-1]))
-        self.info_prefilter_numerator_arg2.setValue(float(self.jsonHandlerObj.prefilter_numerator_arg2[-1]))
-        self.info_prefilter_numerator_arg3.setValue(float(self.jsonHandlerObj.prefilter_numerator_arg3[-1]))
-        self.info_prefilter_numerator_arg4.setValue(float(self.jsonHandlerObj.prefilter_numerator_arg4[-1]))
-        self.info_prefilter_denominator_arg1.setValue(float(self.jsonHandlerObj.prefilter_denominator_arg1[-1]))
-        self.info_prefilter_denominator_arg2.setValue(float(self.jsonHandlerObj.prefilter_denominator_arg2[-1]))
-        # read filter 1
-        self.info_filter_1_numerator_arg1.setValue(float(self.jsonHandlerObj.filter_1_numerator_arg1[-1]))
-        self.info_filter_1_numerator_arg2.setValue(float(self.jsonHandlerObj.filter_1_numerator_arg2[-1]))
-        self.info_filter_1_numerator_arg3.setValue(float(self.jsonHandlerObj.filter_1_numerator_arg3[-1]))
-        self.info_filter_1_numerator_arg4.setValue(float(self.jsonHandlerObj.filter_1_numerator_arg4[-1]))
-        self.info_filter_1_denominator_arg1.setValue(float(self.jsonHandlerObj.filter_1_denominator_arg1[-1]))
-        self.info_filter_1_denominator_arg2.setValue(float(self.jsonHandlerObj.filter_1_denominator_arg2[-1]))
-        # read filter 2
-        self.info_filter_2_numerator_arg1.setValue(float(self.jsonHandlerObj.filter_2_numerator_arg1[-1]))
-        self.info_filter_2_numerator_arg2.setValue(float(self.jsonHandlerObj.filter_2_numerator_arg2[-1]))
-        self.info_filter_2_denominator_arg1.setValue(float(self.jsonHandlerObj.filter_2_denominator_arg1[-1]))
-        # read filter 3
-        self.info_filter_3_numerator_arg1.setValue(float(self.jsonHandlerObj.filter_3_numerator_arg1[-1]))
-        self.info_filter_3_numerator_arg2.setValue(float(self.jsonHandlerObj.filter_3_numerator_arg2[-1]))
-        self.info_filter_3_denominator_arg1.setValue(float(self.jsonHandlerObj.filter_3_denominator_arg1[-1]))
-        # read hysteresis compensation
-        if (self.jsonHandlerObj.hysteresis_compensation_list[-1] == 1):
-            self.checkbox_hysteresis_compensation.setChecked(True)
-        else:
-            self.checkbox_hysteresis_compensation.setChecked(False)
-        # read compensation offset
-        self.info_compensation_offset_arg1.setValue(float(self.jsonHandlerObj.compensation_offset_list[-1]))
-        # read quadratic parameters
-        self.info_quadratic_parameters_arg1.setValue(float(self.jsonHandlerObj.quadratic_parameters_arg1_list[-1]))
-        self.info_quadratic_parameters_arg2.setValue(float(self.jsonHandlerObj.quadratic_parameters_arg2_list[-1]))
-        # read f parameters
-        self.info_f_parameters_arg1.setValue(float(self.jsonHandlerObj.f_parameters_arg1_list[-1]))
-        self.info_f_parameters_arg2.setValue(float(self.jsonHandlerObj.f_parameters_arg2_list[-1]))
-        # read k parameters
-        self.info_k_parameters_arg1.setValue(float(self.jsonHandlerObj.k_parameters_arg1_list[-1]))
-        self.info_k_parameters_arg2.setValue(float(self.jsonHandlerObj.k_parameters_arg2_list[-1]))
+        if not self.control_settings_binding.read(self.jsonHandlerObj.control_settings_store):
+            self.label_control_settings_status.setText("No control settings received yet.")
+            return
+        self.label_control_settings_status.setText(self.control_settings_binding.status())
 
     def write_settings_control_settings_tab(self):
-        # write prefilter
         self.jsonHandlerObj.json_to_send_control_settings["Control settings"]["Write control settings"] = 1
-        self.jsonHandlerObj.json_to_send_control_settings["Control settings"]["prefilterNumerator"][0] = self.info_prefilter_numerator_arg1.value()
-        self.jsonHandlerObj.json_to_send_control_settings["Control settings"]["prefilterNumerator"][1] = self.info_prefilter_numerator_arg2.value()
-        self.jsonHandlerObj.json_to_send_control_settings["Control settings"]["prefilterNumerator"][2] = self.info_prefilter_numerator_arg3.value()
-        self.jsonHandlerObj.json_to_send_control_settings["Control settings"]["prefilterNumerator"][3] = self.info_prefilter_numerator_arg4.value()
-        self.jsonHandlerObj.json_to_send_control_settings["Control settings"]["prefilterDenominator"][0] = self.info_prefilter_denominator_arg1.value()
-        self.jsonHandlerObj.json_to_send_control_settings["Control settings"]["prefilterDenominator"][1] = self.info_prefilter_denominator_arg2.value()
-        # write filter 1
-        self.jsonHandlerObj.json_to_send_control_settings["Control settings"]["filter1Numerator"][0] = self.info_filter_1_numerator_arg1.value()
-        self.jsonHandlerObj.json_to_send_control_settings["Control settings"]["filter1Numerator"][1] = self.info_filter_1_numerator_arg2.value()
-        self.jsonHandlerObj.json_to_send_control_settings["Control settings"]["filter1Numerator"][2] = self.info_filter_1_numerator_arg3.value()
-        self.jsonHandlerObj.json_to_send_control_settings["Control settings"]["filter1Numerator"][3] = self.info_filter_1_numerator_arg4.value()
-        self.jsonHandlerObj.json_to_send_control_settings["Control settings"]["filter1Denominator"][0] = self.info_filter_1_denominator_arg1.value()
-        self.jsonHandlerObj.json_to_send_control_settings["Control settings"]["filter1Denominator"][1] = self.info_filter_1_denominator_arg2.value()
-        # write filter 2
-        self.jsonHandlerObj.json_to_send_control_settings["Control settings"]["filter2Numerator"][0] = self.info_filter_2_numerator_arg1.value()
-        self.jsonHandlerObj.json_to_send_control_settings["Control settings"]["filter2Numerator"][1] = self.info_filter_2_numerator_arg2.value()
-        self.jsonHandlerObj.json_to_send_control_settings["Control settings"]["filter2Denominator"]= self.info_filter_2_denominator_arg1.value()
-        # write filter 3
-        self.jsonHandlerObj.json_to_send_control_settings["Control settings"]["filter3Numerator"][0] = self.info_filter_3_numerator_arg1.value()
-        self.jsonHandlerObj.json_to_send_control_settings["Control settings"]["filter3Numerator"][1] = self.info_filter_3_numerator_arg2.value()
-        self.jsonHandlerObj.json_to_send_control_settings["Control settings"]["filter3Denominator"] = self.info_filter_3_denominator_arg1.value()
-        # write hysteresis compensation
-        if (self.checkbox_hysteresis_compensation.isChecked() == True):
-            self.jsonHandlerObj.json_to_send_control_settings["Control settings"]["hysteresisCompensation"] = 1
-        else:
-            self.jsonHandlerObj.json_to_send_control_settings["Control settings"]["hysteresisCompensation"] = 0
-        # write compensation offset
-        self.jsonHandlerObj.json_to_send_control_settings["Control settings"]["compensationOffset"] = self.info_compensation_offset_arg1.value()
-        # write quadratic parameters
-        self.jsonHandlerObj.json_to_send_control_settings["Control settings"]["quadraticParameters"][0] = self.info_quadratic_parameters_arg1.value()
-        self.jsonHandlerObj.json_to_send_control_settings["Control settings"]["quadraticParameters"][1] = self.info_quadratic_parameters_arg2.value()
-        # write f parameters
-        self.jsonHandlerObj.json_to_send_control_settings["Control settings"]["fParameters"][0] = self.info_f_parameters_arg1.value()
-        self.jsonHandlerObj.json_to_send_control_settings["Control settings"]["fParameters"][1] = self.info_f_parameters_arg2.value()
-        # write k parameters
-        self.jsonHandlerObj.json_to_send_control_settings["Control settings"]["kParameters"][0] = self.info_k_parameters_arg1.value()
-        self.jsonHandlerObj.json_to_send_control_settings["Control settings"]["kParameters"][1] = self.info_k_parameters_arg2.value()
+        self.control_settings_binding.write()
+        self.label_control_settings_status.setText(self.control_settings_binding.status())
         # send json
-        #self.serial_thread.write_to_serial(json.dumps(self.jsonHandlerObj.json_to_send_control_settings))
+        #self.serial_thread.write_to_serial(self.jsonHandlerObj.command(self.jsonHandlerObj.json_to_send_control_settings))
         #self.jsonHandlerObj.json_to_send_control_settings["Control settings"]["Write control settings"] = 0
     
     def create_tab4_expert_procedures_ui(self):
@@ -792,9 +1029,43 @@ class Widget(QWidget):
         self.button_logging = QPushButton("Start logging")
         self.button_logging.clicked.connect(self.start_logging)
         layout.addWidget(self.button_logging, 8, 1)
+        layout.addWidget(QLabel("Logging format"), 8, 2)
+        self.combo_box_logging_format = QComboBox()
+        self.combo_box_logging_format.addItems(list(LoggingWriter.FORMATS))
+        self.combo_box_logging_format.currentTextChanged.connect(self.on_combobox_logging_format_changed)
+        layout.addWidget(self.combo_box_logging_format, 8, 3)
+        self.label_logging_status = QLabel("")
+        layout.addWidget(self.label_logging_status, 10, 0, 1, 4)
+        self.jsonHandlerObj.logging_writer.write_finished.connect(self.on_logging_written)
+        if self.jsonHandlerObj.logging_writer.last_result is not None:
+            # Written before this tab was first shown
+            self.on_logging_written(self.jsonHandlerObj.logging_writer.last_result)
         button_save_settings = QPushButton("Save settings")
         button_save_settings.clicked.connect(self.button_save_settings_clicked)
         layout.addWidget(button_save_settings, 9, 1)
+        self.label_save_settings_status = QLabel("")
+        layout.addWidget(self.label_save_settings_status, 9, 2, 1, 2)
+
+    def on_combobox_logging_format_changed(self, file_format):
+        """
+        Method to be executed when the logging file format changes
+        """
+        try:
+            self.jsonHandlerObj.logging_writer.file_format = file_format
+        except ImportError as e:
+            QMessageBox.warning(self, "Logging format", f"{file_format} logging is not available: {e}")
+            self.combo_box_logging_format.setCurrentText(self.jsonHandlerObj.logging_writer.file_format)
+
+    def on_logging_written(self, result):
+        """
+        Shows where the last logging burst was written, how fast, and its yaw angle statistics.
+        """
+        text = (f"Saved {result['samples']} samples to {result['path']} "
+                f"({result['bytes'] / 1e6:.2f} MB, {result['mb_per_s']:.1f} MB/s)")
+        yaw = result.get("statistics", {}).get("Yaw angle (urad)")
+        if yaw is not None:
+            text += f"\nYaw angle mean {yaw['mean']:.3f} urad, std {yaw['std']:.3f} urad"
+        self.label_logging_status.setText(text)
               
     def start_logging(self):
         state = self.combo_box_mode.currentText()
@@ -805,44 +1076,56 @@ class Widget(QWidget):
             #QMessageBox.information(self, "Notification", "Logging Started.")
             self.jsonHandlerObj.json_to_send_expert_precedures["Expert procedures"]["Logging"]  = 1
             # send json
-            self.serial_thread.write_to_serial(json.dumps(self.jsonHandlerObj.json_to_send_expert_precedures))
+            self.serial_thread.write_to_serial(self.jsonHandlerObj.command(self.jsonHandlerObj.json_to_send_expert_precedures))
             self.jsonHandlerObj.json_to_send_expert_precedures["Expert procedures"]["Logging"] = 0
         
     def button_save_settings_clicked(self):
-        current_datetime = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        filename_ControlsTab = f"Controls_Tab_{current_datetime}.json"
-        filename_GeneralSettingsTab = f"General_Settings_Tab_{current_datetime}.json"
-        filename_ControlSettingsTab = f"Control_Settings_Tab_{current_datetime}.json"
-        filename_ExpertProceduresTab = f"Expert_Preocedures_Tab_{current_datetime}.json"
-        with open(filename_ControlsTab, "w") as json_file:
-            json.dump(self.jsonHandlerObj.json_to_send_controls, json_file, indent=4)
-            
-        with open(filename_GeneralSettingsTab, "w") as json_file:
-            json.dump(self.jsonHandlerObj.json_to_send_general_settings, json_file, indent=4)
-            
-        with open(filename_ControlSettingsTab, "w") as json_file:
-            json.dump(self.jsonHandlerObj.json_to_send_control_settings, json_file, indent=4)
-            
-        with open(filename_ExpertProceduresTab, "w") as json_file:
-            json.dump(self.jsonHandlerObj.json_to_send_expert_precedures, json_file, indent=4)
-    
+        """
+        Saves the four command sections as a snapshot (see the Snapshots tab).
+        """
+        tag = self.snapshot_tag.text() if hasattr(self, "snapshot_tag") else ""
+        note = self.snapshot_note.text() if hasattr(self, "snapshot_note") else ""
+        snapshot_id = self.snapshots().save(self.command_sections(), tag, note)
+        # Either tab may not be built yet
+        if hasattr(self, "label_save_settings_status"):
+            self.label_save_settings_status.setText(f"Saved snapshot {snapshot_id}")
+        if hasattr(self, "table_snapshots"):
+            self.label_snapshot_status.setText(f"Saved snapshot {snapshot_id}")
+            self.refresh_snapshots()
+
+    def command_sections(self):
+        return [
+            self.jsonHandlerObj.json_to_send_controls,
+            self.jsonHandlerObj.json_to_send_general_settings,
+            self.jsonHandlerObj.json_to_send_control_settings,
+            self.jsonHandlerObj.json_to_send_expert_precedures,
+        ]
+
+    def snapshots(self):
+        """
+        Returns the settings snapshot store, opening it on first use.
+        """
+        if self.snapshot_store is None:
+            self.snapshot_store = SnapshotStore(self.snapshot_path)
+        return self.snapshot_store
+
     def start_motion_profile_motion(self):
         self.jsonHandlerObj.json_to_send_expert_precedures["Expert procedures"]["Profile motion Start"] = 1
         self.jsonHandlerObj.json_to_send_expert_precedures["Expert procedures"]["Profile motion Stop"]  = 0
         self.jsonHandlerObj.json_to_send_expert_precedures["Expert procedures"]["waveformID"]  = self.waveform_id.value()
         # send json
-        self.serial_thread.write_to_serial(json.dumps(self.jsonHandlerObj.json_to_send_expert_precedures))
+        self.serial_thread.write_to_serial(self.jsonHandlerObj.command(self.jsonHandlerObj.json_to_send_expert_precedures))
         self.jsonHandlerObj.json_to_send_expert_precedures["Expert procedures"]["Profile motion Start"] = 0
-        self.serial_thread.write_to_serial(json.dumps(self.jsonHandlerObj.json_to_send_expert_precedures))
+        self.serial_thread.write_to_serial(self.jsonHandlerObj.command(self.jsonHandlerObj.json_to_send_expert_precedures))
         
     def stop_motion_profile_motion(self):
         self.jsonHandlerObj.json_to_send_expert_precedures["Expert procedures"]["Profile motion Start"] = 0
         self.jsonHandlerObj.json_to_send_expert_precedures["Expert procedures"]["Profile motion Stop"]  = 1
         self.jsonHandlerObj.json_to_send_expert_precedures["Expert procedures"]["waveform id"]  = self.waveform_id.value()
         # send json
-        self.serial_thread.write_to_serial(json.dumps(self.jsonHandlerObj.json_to_send_expert_precedures))
+        self.serial_thread.write_to_serial(self.jsonHandlerObj.command(self.jsonHandlerObj.json_to_send_expert_precedures))
         self.jsonHandlerObj.json_to_send_expert_precedures["Expert procedures"]["Profile motion Stop"]  = 0
-        self.serial_thread.write_to_serial(json.dumps(self.jsonHandlerObj.json_to_send_expert_precedures))
+        self.serial_thread.write_to_serial(self.jsonHandlerObj.command(self.jsonHandlerObj.json_to_send_expert_precedures))
         
     def start_motion_ramp_cycles(self):
        self.jsonHandlerObj.json_to_send_expert_precedures["Expert procedures"]["Ramp cycles motion Start"] = 1
@@ -850,9 +1133,9 @@ class Widget(QWidget):
        self.jsonHandlerObj.json_to_send_expert_precedures["Expert procedures"]["numberCycles"]  = self.number_cycles.value()
        self.jsonHandlerObj.json_to_send_expert_precedures["Expert procedures"]["rampRate"]      = self.spinbox_ramp_rate.value()
        # send json
-       self.serial_thread.write_to_serial(json.dumps(self.jsonHandlerObj.json_to_send_expert_precedures))
+       self.serial_thread.write_to_serial(self.jsonHandlerObj.command(self.jsonHandlerObj.json_to_send_expert_precedures))
        self.jsonHandlerObj.json_to_send_expert_precedures["Expert procedures"]["Ramp cycles motion Start"] = 0
-       self.serial_thread.write_to_serial(json.dumps(self.jsonHandlerObj.json_to_send_expert_precedures))
+       self.serial_thread.write_to_serial(self.jsonHandlerObj.command(self.jsonHandlerObj.json_to_send_expert_precedures))
         
     def stop_motion_ramp_cycles(self):
        self.jsonHandlerObj.json_to_send_expert_precedures["Expert procedures"]["Ramp cycles motion Start"] = 0
@@ -860,30 +1143,328 @@ class Widget(QWidget):
        self.jsonHandlerObj.json_to_send_expert_precedures["Expert procedures"]["numberCycles"]  = self.number_cycles.value()
        self.jsonHandlerObj.json_to_send_expert_precedures["Expert procedures"]["rampRate"]      = self.spinbox_ramp_rate.value()
        # send json
-       self.serial_thread.write_to_serial(json.dumps(self.jsonHandlerObj.json_to_send_expert_precedures))
+       self.serial_thread.write_to_serial(self.jsonHandlerObj.command(self.jsonHandlerObj.json_to_send_expert_precedures))
        self.jsonHandlerObj.json_to_send_expert_precedures["Expert procedures"]["Ramp cycles motion Stop"]  = 0
-       self.serial_thread.write_to_serial(json.dumps(self.jsonHandlerObj.json_to_send_expert_precedures))
+       self.serial_thread.write_to_serial(self.jsonHandlerObj.command(self.jsonHandlerObj.json_to_send_expert_precedures))
     
     def handle_serial_data(self, data):
         """
         Handles incoming serial data.
         
         Args:
-            data (bytes): The serial data received.
+            data (dict): The decoded JSON frame emitted by SerialThread.
         
         Returns:
             None
         
-        This method parses the JSON string data, updates the UI elements with the latest values from the JSON data.
+        This method stores the frame; the UI elements are updated by the refresh timer.
+        """
+        handle_ns = time.monotonic_ns()
+        self.jsonHandlerObj.ingest(data)
+        self.record_store_latency(handle_ns)
+        self.display_dirty = True
+
+    def handle_serial_batch(self, frames):
+        """
+        Handles a batch of frames collected by SerialThread.
+
+        Args:
+            frames (list): Decoded JSON frames, oldest first, and blocks of binary telemetry records.
+
+        Returns:
+            None
+
+        Every frame is stored for history; the refresh timer then shows only the latest values.
+        """
+        handle_ns = time.monotonic_ns()
+        self.jsonHandlerObj.ingest_batch(frames)
+        self.record_store_latency(handle_ns)
+        self.display_dirty = True
+
+    def record_store_latency(self, handle_ns):
+        """
+        Times the emit->handle and handle->store stages of the frames just stored.
+
+        Args:
+            handle_ns (int): time.monotonic_ns() when the slot started.
+        """
+        timestamps = self.latency.take()
+        if timestamps is None:
+            return
+        read_ns, emit_ns = timestamps
+        stored_ns = time.monotonic_ns()
+        self.latency.record("emit->handle", emit_ns, handle_ns)
+        self.latency.record("handle->store", handle_ns, stored_ns)
+        if self.pending_display is None:
+            self.pending_display = (read_ns, stored_ns)
+
+    def update_acquisition_display(self):
+        """
+        Shows the latest controller state, yaw values and head errors.
+
+        Runs from the refresh timer. Nothing is done unless new telemetry arrived,
+        and only widgets whose value changed are touched.
+        """
+        if not self.display_dirty or self.jsonHandlerObj.controls_store.count == 0:
+            return
+        self.display_dirty = False
+        self.set_text_if_changed(self.info_controller_state, self.jsonHandlerObj.latest_text("controller_state_list"))
+        self.set_text_if_changed(self.info_yaw_angle, self.jsonHandlerObj.latest_text("yaw_angle_list"))
+        self.set_text_if_changed(self.info_yaw_std, self.jsonHandlerObj.latest_text("yaw_std_list"))
+        self.set_led_head_error_1_color(str(self.jsonHandlerObj.latest("error_axis1_list")))
+        self.set_led_head_error_2_color(str(self.jsonHandlerObj.latest("error_axis2_list")))
+        self.set_led_unstable_interferometer_color(self.jsonHandlerObj.latest("warning_level_list"))
+        for plot in self.live_plots:
+            plot.refresh()
+        self.update_statistics_display()
+        if self.pending_display is not None:
+            read_ns, stored_ns = self.pending_display
+            self.pending_display = None
+            displayed_ns = time.monotonic_ns()
+            self.latency.record("store->display", stored_ns, displayed_ns)
+            self.latency.record("read->display", read_ns, displayed_ns)
+
+    def set_text_if_changed(self, line_edit, text):
         """
-        self.jsonHandlerObj.parse_json_string(str(data))
-        self.info_controller_state.setText(str(self.jsonHandlerObj.controller_state_list[-1]))
-        self.info_yaw_angle.setText(str(self.jsonHandlerObj.yaw_angle_list[-1]))
-        self.info_yaw_std.setText(str(self.jsonHandlerObj.yaw_std_list[-1]))
-        self.set_led_head_error_1_color(str(self.jsonHandlerObj.error_axis1_list[-1]))
-        self.set_led_head_error_2_color(str(self.jsonHandlerObj.error_axis2_list[-1]))
+        Calls setText only when the shown text differs.
+
+        Args:
+            line_edit (QLineEdit): Widget to update.
+            text (str): New text.
+        """
+        if self.displayed_values.get(line_edit) != text:
+            line_edit.setText(text)
+            self.displayed_values[line_edit] = text
+
+    # -- Methods Tab 5 -- #
+    def create_tab5_diagnostics_ui(self):
+        """
+        Creates UI elements for the 'Diagnostics' tab.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        layout = QGridLayout(self.tab5)
+        layout.addWidget(QLabel("<b>Latency</b>"), 0, 0)
+        self.table_latency = QTableWidget(len(LatencyMonitor.STAGES), 4)
+        self.table_latency.setHorizontalHeaderLabels(["Samples", "p50 (us)", "p99 (us)", "max (us)"])
+        self.table_latency.setVerticalHeaderLabels(LatencyMonitor.STAGES)
+        for row in range(len(LatencyMonitor.STAGES)):
+            for col in range(4):
+                self.table_latency.setItem(row, col, QTableWidgetItem(""))
+        layout.addWidget(self.table_latency, 1, 0, 1, 3)
+        self.label_latency_status = QLabel("")
+        layout.addWidget(self.label_latency_status, 6, 0, 1, 3)
+        button_dump_diagnostics = QPushButton("Dump JSON")
+        button_dump_diagnostics.clicked.connect(self.dump_diagnostics)
+        layout.addWidget(button_dump_diagnostics, 2, 0)
+        button_reset_diagnostics = QPushButton("Reset")
+        button_reset_diagnostics.clicked.connect(self.reset_diagnostics)
+        layout.addWidget(button_reset_diagnostics, 2, 1)
+        self.label_diagnostics_status = QLabel("")
+        layout.addWidget(self.label_diagnostics_status, 3, 0, 1, 3)
+        layout.addWidget(QLabel("<b>Link errors</b>"), 4, 0)
+        self.frame_error_kinds = ["frames"] + FrameParser.ERRORS
+        self.table_frame_errors = QTableWidget(len(self.frame_error_kinds), 2)
+        self.table_frame_errors.setHorizontalHeaderLabels(["Per second", "Total"])
+        self.table_frame_errors.setVerticalHeaderLabels(self.frame_error_kinds)
+        for row in range(len(self.frame_error_kinds)):
+            for col in range(2):
+                self.table_frame_errors.setItem(row, col, QTableWidgetItem(""))
+        layout.addWidget(self.table_frame_errors, 5, 0, 1, 3)
+        self.status_timer.timeout.connect(self.update_diagnostics)
+
+    def update_diagnostics(self):
+        """
+        Refreshes the latency and link error tables once per second while the Diagnostics tab is shown.
+        """
+        if self.tab_widget.currentWidget() is not self.tab5:
+            return
+        for row, summary in enumerate(self.latency.snapshot().values()):
+            values = [str(summary["count"]), f"{summary['p50_us']:.0f}", f"{summary['p99_us']:.0f}", f"{summary['max_us']:.0f}"]
+            for col, value in enumerate(values):
+                self.table_latency.item(row, col).setText(value)
+        if not self.latency.measured:
+            self.label_latency_status.setText("Latency is not measured for this data source.")
+        elif self.latency.dropped:
+            self.label_latency_status.setText(
+                f"{self.latency.dropped} signals not timed: the GUI fell more than "
+                f"{self.latency.PENDING_SIZE} signals behind.")
+        else:
+            self.label_latency_status.setText("")
+        counts = self.frame_error_sample[1] if self.frame_error_sample is not None else {}
+        for row, kind in enumerate(self.frame_error_kinds):
+            rate = self.frame_error_rates.get(kind)
+            self.table_frame_errors.item(row, 0).setText("" if rate is None else f"{rate:.0f}")
+            self.table_frame_errors.item(row, 1).setText(str(counts.get(kind, "")))
+
+    def dump_diagnostics(self):
+        path = self.latency.dump()
+        self.label_diagnostics_status.setText(f"Diagnostics written to {path}")
+
+    def reset_diagnostics(self):
+        self.latency.reset()
+        self.pending_display = None
+        self.update_diagnostics()
+
+    # -- Methods Tab 6 -- #
+    def create_tab6_snapshots_ui(self):
+        """
+        Creates UI elements for the 'Snapshots' tab.
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        layout = QGridLayout(self.tab6)
+        layout.addWidget(QLabel("<b>Save</b>"), 0, 0)
+        layout.addWidget(QLabel("Tag"), 1, 0)
+        self.snapshot_tag = QLineEdit()
+        layout.addWidget(self.snapshot_tag, 1, 1)
+        layout.addWidget(QLabel("Note"), 1, 2)
+        self.snapshot_note = QLineEdit()
+        layout.addWidget(self.snapshot_note, 1, 3)
+        button_save_snapshot = QPushButton("Save snapshot")
+        button_save_snapshot.clicked.connect(self.button_save_settings_clicked)
+        layout.addWidget(button_save_snapshot, 1, 4)
+
+        layout.addWidget(QLabel("<b>Snapshots</b>"), 2, 0)
+        layout.addWidget(QLabel("Show tag"), 3, 0)
+        self.snapshot_filter = QLineEdit()
+        self.snapshot_filter.setPlaceholderText("all")
+        self.snapshot_filter.editingFinished.connect(self.refresh_snapshots)
+        layout.addWidget(self.snapshot_filter, 3, 1)
+        self.table_snapshots = QTableWidget(0, 4)
+        self.table_snapshots.setHorizontalHeaderLabels(["Id", "Created", "Tag", "Note"])
+        self.table_snapshots.verticalHeader().setVisible(False)
+        self.table_snapshots.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table_snapshots.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table_snapshots, 4, 0, 1, 5)
+
+        buttons = [
+            ("Diff selected", self.diff_snapshots),
+            ("Restore selected", self.restore_snapshot),
+            ("Export JSON", self.export_snapshot),
+            ("Delete", self.delete_snapshot),
+        ]
+        for col, (text, slot) in enumerate(buttons):
+            button = QPushButton(text)
+            button.clicked.connect(slot)
+            layout.addWidget(button, 5, col)
+
+        self.table_snapshot_diff = QTableWidget(0, 4)
+        self.table_snapshot_diff.setHorizontalHeaderLabels(["Section", "Key", "First", "Second"])
+        self.table_snapshot_diff.verticalHeader().setVisible(False)
+        self.table_snapshot_diff.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table_snapshot_diff, 6, 0, 1, 5)
+        self.label_snapshot_status = QLabel("")
+        layout.addWidget(self.label_snapshot_status, 7, 0, 1, 5)
+
+    def refresh_snapshots(self):
+        """
+        Lists the 200 most recent snapshots with the tag being filtered on.
+        """
+        rows = self.snapshots().list(tag=self.snapshot_filter.text().strip(), limit=200)
+        self.table_snapshots.setRowCount(len(rows))
+        for row, (snapshot_id, created, tag, note) in enumerate(rows):
+            values = [str(snapshot_id), datetime.fromtimestamp(created).strftime("%Y-%m-%d %H:%M:%S"), tag, note]
+            for col, value in enumerate(values):
+                self.table_snapshots.setItem(row, col, QTableWidgetItem(value))
+        self.table_snapshots.resizeColumnsToContents()
+
+    def selected_snapshots(self):
+        rows = sorted({index.row() for index in self.table_snapshots.selectedIndexes()})
+        return [int(self.table_snapshots.item(row, 0).text()) for row in rows]
+
+    def diff_snapshots(self):
+        """
+        Shows the keys that differ between the two selected snapshots, older first.
+        """
+        selected = self.selected_snapshots()
+        if len(selected) != 2:
+            self.label_snapshot_status.setText("Select two snapshots to compare.")
+            return
+        first, second = sorted(selected)
+        differences = self.snapshots().diff(first, second)
+        self.table_snapshot_diff.setRowCount(len(differences))
+        for row, values in enumerate(differences):
+            for col, value in enumerate(values):
+                self.table_snapshot_diff.setItem(row, col, QTableWidgetItem("" if value is None else str(value)))
+        self.table_snapshot_diff.resizeColumnsToContents()
+        self.label_snapshot_status.setText(f"{len(differences)} difference(s) between snapshots {first} and {second}")
+
+    def restore_snapshot(self):
+        """
+        Loads the selected snapshot into the General settings and Control settings
+        tabs and writes the WRITTEN_SECTIONS to the controller.
+
+        The commands are built from the stored values, not read back from the spin
+        boxes, whose range and decimals would clamp and round them.
+        """
+        selected = self.selected_snapshots()
+        if len(selected) != 1:
+            self.label_snapshot_status.setText("Select one snapshot to restore.")
+            return
+        if not self.serial_thread.isRunning():
+            QMessageBox.information(self, "Notification", "Connect to the controller to restore a snapshot.")
+            return
+        sections = self.snapshots().load(selected[0])
+        bindings = {
+            "General settings": (self.tab2, "general_settings_binding", self.jsonHandlerObj.json_to_send_general_settings, "Write general settings"),
+            "Control settings": (self.tab3, "control_settings_binding", self.jsonHandlerObj.json_to_send_control_settings, "Write control settings"),
+        }
+        written = []
+        for section in RESTORED_SECTIONS:
+            if section not in sections:
+                continue
+            tab, binding_name, message, trigger = bindings[section]
+            body = sections[section]
+            message[section].update((key, copy.deepcopy(value)) for key, value in body.items() if key in message[section])
+            message[section][trigger] = 0
+            self.build_tab(tab)
+            getattr(self, binding_name).show(body)
+            if section in WRITTEN_SECTIONS:
+                command = {section: dict(body, **{trigger: 1})}
+                self.serial_thread.write_to_serial(self.jsonHandlerObj.command(command, full=True))
+                written.append(section)
+        self.label_snapshot_status.setText(
+            f"Restored snapshot {selected[0]} (written: {', '.join(written) or 'nothing'})")
+
+    def export_snapshot(self):
+        selected = self.selected_snapshots()
+        if len(selected) != 1:
+            self.label_snapshot_status.setText("Select one snapshot to export.")
+            return
+        path = f"Settings_snapshot_{selected[0]}.json"
+        try:
+            self.snapshots().export(selected[0], path)
+        except KeyError:
+            self.label_snapshot_status.setText(f"Snapshot {selected[0]} no longer exists.")
+            self.refresh_snapshots()
+            return
+        self.label_snapshot_status.setText(f"Exported to {path}")
+
+    def delete_snapshot(self):
+        selected = self.selected_snapshots()
+        if not selected:
+            return
+        if QMessageBox.question(self, "Delete snapshots", f"Delete {len(selected)} snapshot(s)?") != QMessageBox.Yes:
+            return
+        for snapshot_id in selected:
+            self.snapshots().delete(snapshot_id)
+        self.refresh_snapshots()
 
     def closeEvent(self, event):
         self.disconnect_serial()
+        self.jsonHandlerObj.logging_writer.stop()
+        self.jsonHandlerObj.logging_writer.wait()
+        self.jsonHandlerObj.stop_history()
+        if self.snapshot_store is not None:
+            self.snapshot_store.close()
         event.accept()
 